@@ -2,6 +2,12 @@
 window.AdminInterface = function AdminInterface({ onClose, servers, onUpdateServers, config, onUpdateConfig }) {
   const [activeTab, setActiveTab] = React.useState('servers');
   const [serverList, setServerList] = React.useState([]);
+  // Inventory is loaded a page at a time and saved one server at a time, so large fleets stay fast
+  const ADMIN_PAGE_SIZE = 100;
+  const [nextCursor, setNextCursor] = React.useState(null);
+  const [changedServers, setChangedServers] = React.useState(new Set());
+  const [removedServers, setRemovedServers] = React.useState(new Set());
+  const [newServers, setNewServers] = React.useState(new Set());
   const [configSettings, setConfigSettings] = React.useState(config || {});
   const [isLoading, setIsLoading] = React.useState(false);
   const [error, setError] = React.useState(null);
@@ -66,18 +72,12 @@ window.AdminInterface = function AdminInterface({ onClose, servers, onUpdateServ
     };
   };
   
-  // Load servers if not provided
+  // Load the first page of the inventory once; edits in progress must not be reset by fleet updates
+  React.useEffect(() => {
+    fetchServers();
+  }, []);
+  
   React.useEffect(() => {
-    if (!servers || servers.length === 0) {
-      fetchServers();
-    } else {
-      // Normalize all servers to ensure they have the proper structure
-      const normalizedServers = Array.isArray(servers) ? 
-        servers.map(server => normalizeServer(server)).filter(Boolean) : 
-        [];
-      setServerList(normalizedServers);
-    }
-    
     if (!config || Object.keys(config).length === 0) {
       fetchConfig();
     } else {
@@ -86,28 +86,29 @@ window.AdminInterface = function AdminInterface({ onClose, servers, onUpdateServ
     
     // Fetch WinRM configuration
     fetchWinRMConfig();
-  }, [servers, config]);
+  }, [config]);
 
-  // Fetch servers from API
+  // Fetch the first page of servers from the inventory, dropping unsaved changes
   const fetchServers = async () => {
     try {
       setIsLoading(true);
       setError(null);
       
       // Check if API is available
-      if (window.API && typeof window.API.getServers === 'function') {
-        const data = await window.API.getServers();
-        
-        // Ensure data is an array
-        const serversArray = Array.isArray(data) ? data : [];
+      if (window.API && typeof window.API.getServersPage === 'function') {
+        const page = await window.API.getServersPage(ADMIN_PAGE_SIZE);
         
         // Normalize each server object
-        const formattedData = serversArray.map(server => normalizeServer(server)).filter(Boolean);
+        const formattedData = (page.servers || []).map(server => normalizeServer(server)).filter(Boolean);
         
         setServerList(formattedData);
-        console.log("Fetched servers:", formattedData);
+        setNextCursor(page.next_cursor || null);
+        setChangedServers(new Set());
+        setRemovedServers(new Set());
+        setNewServers(new Set());
+        console.log("Fetched servers:", formattedData.length);
       } else {
-        console.error("API.getServers is not available");
+        console.error("API.getServersPage is not available");
         setError("API is not available. Please check if you're logged in.");
       }
       
@@ -119,6 +120,35 @@ window.AdminInterface = function AdminInterface({ onClose, servers, onUpdateServ
     }
   };
   
+  // Append the next page of servers, keeping unsaved changes to the ones already loaded
+  const loadMoreServers = async () => {
+    if (!nextCursor) return;
+    
+    try {
+      setIsLoading(true);
+      const page = await window.API.getServersPage(ADMIN_PAGE_SIZE, nextCursor);
+      const loaded = new Set(serverList.map(server => server.name));
+      
+      // Skip servers added here that the server already returns, and ones removed but not saved yet
+      const formattedData = (page.servers || [])
+        .map(server => normalizeServer(server))
+        .filter(server => server && !loaded.has(server.name) && !removedServers.has(server.name));
+      
+      setServerList([...serverList, ...formattedData]);
+      setNextCursor(page.next_cursor || null);
+      setIsLoading(false);
+    } catch (error) {
+      console.error('Error fetching servers:', error);
+      setError('Failed to load more servers. Please try again.');
+      setIsLoading(false);
+    }
+  };
+  
+  // Remember which servers need a PUT when changes are saved
+  const markChanged = (serverName) => {
+    setChangedServers(previous => new Set(previous).add(serverName));
+  };
+  
   // Fetch config from API
   const fetchConfig = async () => {
     try {
@@ -170,18 +200,45 @@ window.AdminInterface = function AdminInterface({ onClose, servers, onUpdateServ
     }
   };
   
-  // Save changes to servers
+  // Save changes to servers, sending only the servers that were added, edited or removed
   const saveServers = async () => {
     try {
       setIsLoading(true);
       
       // Check if API is available
-      if (window.API && typeof window.API.saveServers === 'function') {
-        await window.API.saveServers(serverList);
+      if (window.API && typeof window.API.saveServer === 'function' && typeof window.API.deleteServer === 'function') {
+        // Forget each change once it is stored, so a retry after an error only sends what is left
+        for (const serverName of removedServers) {
+          await window.API.deleteServer(serverName);
+          setRemovedServers(previous => {
+            const removed = new Set(previous);
+            removed.delete(serverName);
+            return removed;
+          });
+        }
+        const saved = serverList.filter(server => changedServers.has(server.name));
+        for (const server of saved) {
+          await window.API.saveServer(server);
+          setChangedServers(previous => {
+            const changed = new Set(previous);
+            changed.delete(server.name);
+            return changed;
+          });
+        }
+        setNewServers(new Set());
         alert('Servers saved successfully');
-        if (onUpdateServers) onUpdateServers(serverList);
+        
+        // Apply the same changes to the caller's fleet instead of replacing it with the loaded pages
+        if (onUpdateServers && Array.isArray(servers)) {
+          const savedByName = new Map(saved.map(server => [server.name, server]));
+          const updatedServers = servers
+            .filter(server => !removedServers.has(server.name))
+            .map(server => savedByName.has(server.name) ? { ...server, ...savedByName.get(server.name) } : server);
+          const known = new Set(updatedServers.map(server => server.name));
+          onUpdateServers([...updatedServers, ...saved.filter(server => !known.has(server.name))]);
+        }
       } else {
-        console.error("API.saveServers is not available");
+        console.error("API.saveServer is not available");
         alert('API is not available. Please check if you are logged in.');
       }
       
@@ -410,6 +467,7 @@ window.AdminInterface = function AdminInterface({ onClose, servers, onUpdateServ
     }
     
     setServerList(updatedServers);
+    markChanged(updatedServers[serverIndex].name);
     alert('Server updated with live data');
   };
 
@@ -423,7 +481,13 @@ window.AdminInterface = function AdminInterface({ onClose, servers, onUpdateServ
     // Ensure the server has the proper structure
     const serverToAdd = normalizeServer({...newServer});
     if (serverToAdd) {
+      if (serverList.some(server => server.name === serverToAdd.name)) {
+        alert(`Server ${serverToAdd.name} is already in the list`);
+        return;
+      }
       setServerList([...serverList, serverToAdd]);
+      markChanged(serverToAdd.name);
+      setNewServers(previous => new Set(previous).add(serverToAdd.name));
     }
     
     setNewServer({
@@ -448,10 +512,27 @@ window.AdminInterface = function AdminInterface({ onClose, servers, onUpdateServ
       return;
     }
     
-    if (window.confirm(`Are you sure you want to remove server ${serverList[index].name}?`)) {
+    const serverName = serverList[index].name;
+    if (window.confirm(`Are you sure you want to remove server ${serverName}?`)) {
       const updatedServers = [...serverList];
       updatedServers.splice(index, 1);
       setServerList(updatedServers);
+      
+      setChangedServers(previous => {
+        const changed = new Set(previous);
+        changed.delete(serverName);
+        return changed;
+      });
+      // Servers added since the last save were never stored, so there is nothing to delete
+      if (newServers.has(serverName)) {
+        setNewServers(previous => {
+          const added = new Set(previous);
+          added.delete(serverName);
+          return added;
+        });
+      } else {
+        setRemovedServers(previous => new Set(previous).add(serverName));
+      }
     }
   };
 
@@ -478,6 +559,7 @@ window.AdminInterface = function AdminInterface({ onClose, servers, onUpdateServ
     });
     
     setServerList(updatedServers);
+    markChanged(updatedServers[newService.serverIndex].name);
     setNewService({
       serverIndex: newService.serverIndex,
       name: '',
@@ -495,6 +577,7 @@ window.AdminInterface = function AdminInterface({ onClose, servers, onUpdateServ
     const updatedServers = [...serverList];
     updatedServers[serverIndex].services.splice(serviceIndex, 1);
     setServerList(updatedServers);
+    markChanged(updatedServers[serverIndex].name);
   };
 
   // Update server specs
@@ -516,6 +599,7 @@ window.AdminInterface = function AdminInterface({ onClose, servers, onUpdateServ
     
     updatedServers[serverIndex].specs[field] = value;
     setServerList(updatedServers);
+    markChanged(updatedServers[serverIndex].name);
   };
 
   // Update configuration setting
@@ -623,6 +707,7 @@ window.AdminInterface = function AdminInterface({ onClose, servers, onUpdateServ
           });
           
           setServerList(updatedServers);
+          markChanged(updatedServers[serverIndex].name);
         }
       }
       
@@ -644,6 +729,7 @@ window.AdminInterface = function AdminInterface({ onClose, servers, onUpdateServ
     const updatedServers = [...serverList];
     updatedServers[serverIndex].services.splice(serviceIndex, 1);
     setServerList(updatedServers);
+    markChanged(updatedServers[serverIndex].name);
   };
 
   return (
@@ -791,6 +877,17 @@ window.AdminInterface = function AdminInterface({ onClose, servers, onUpdateServ
                     </tbody>
                   </table>
                 </div>
+                {nextCursor && (
+                  <div className="mt-2 text-center">
+                    <button 
+                      onClick={loadMoreServers}
+                      className="bg-gray-200 dark:bg-gray-700 text-gray-800 dark:text-white px-4 py-2 rounded hover:bg-gray-300 dark:hover:bg-gray-600"
+                      disabled={isLoading}
+                    >
+                      {isLoading ? 'Loading...' : 'Load More Servers'}
+                    </button>
+                  </div>
+                )}
               </div>
               
               <div className="mb-6">
@@ -945,9 +1042,9 @@ window.AdminInterface = function AdminInterface({ onClose, servers, onUpdateServ
                 <button 
                   onClick={saveServers}
                   className="bg-success text-white px-4 py-2 rounded hover:bg-green-600"
-                  disabled={isLoading}
+                  disabled={isLoading || (changedServers.size === 0 && removedServers.size === 0)}
                 >
-                  {isLoading ? 'Saving...' : 'Save Changes'}
+                  {isLoading ? 'Saving...' : `Save Changes (${changedServers.size + removedServers.size})`}
                 </button>
               </div>
             </div>
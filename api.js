@@ -272,7 +272,16 @@ async function getWinRMStatus(serverIp) {
       if (filters.status) {
         queryParams.push(`status=${encodeURIComponent(filters.status)}`);
       }
-      
+
+      // Server-side sorting (e.g. '-cpu_usage'), field selection and paging;
+      // with limit or offset the response is { servers, total, next_offset, ... }
+      for (const key of ['sort', 'fields', 'include', 'limit', 'offset']) {
+        if (filters[key] !== undefined && filters[key] !== null && filters[key] !== '') {
+          const value = Array.isArray(filters[key]) ? filters[key].join(',') : String(filters[key]);
+          queryParams.push(`${key}=${encodeURIComponent(value)}`);
+        }
+      }
+
       if (queryParams.length > 0) {
         url += `?${queryParams.join('&')}`;
       }
@@ -291,6 +300,49 @@ async function getWinRMStatus(serverIp) {
     }
   }
   
+  // One page of servers ordered by name; pass the returned next_cursor to get the next page
+  async function getServersPage(limit = 100, cursor = null, filters = {}) {
+    try {
+      const params = new URLSearchParams({ limit: String(limit) });
+      if (cursor) {
+        params.set('cursor', cursor);
+      }
+      if (filters.status) {
+        params.set('status', filters.status);
+      }
+      
+      const response = await fetchWithAuth(`/servers?${params.toString()}`);
+      
+      if (response.ok) {
+        return await response.json();
+      } else {
+        const error = await response.json();
+        throw new Error(error.error || 'Failed to fetch servers');
+      }
+    } catch (error) {
+      console.error('Error fetching servers page:', error);
+      throw error;
+    }
+  }
+  
+  // Servers running a service, optionally only those where it is in the given status
+  async function getServiceServers(serviceName, status = '') {
+    try {
+      const query = status ? `?status=${encodeURIComponent(status)}` : '';
+      const response = await fetchWithAuth(`/services/${encodeURIComponent(serviceName)}/servers${query}`);
+      
+      if (response.ok) {
+        return await response.json();
+      } else {
+        const error = await response.json();
+        throw new Error(error.error || 'Failed to fetch service servers');
+      }
+    } catch (error) {
+      console.error('Error fetching service servers:', error);
+      throw error;
+    }
+  }
+  
   async function getServerDetails(serverName) {
     try {
       const response = await fetchWithAuth(`/servers/${serverName}`);
@@ -307,6 +359,24 @@ async function getWinRMStatus(serverIp) {
     }
   }
   
+  // Metric history for trend charts, e.g. getServerHistory('VXSQL1', 'cpu_usage', '1h')
+  async function getServerHistory(serverName, metric = 'cpu_usage', window = '1h') {
+    try {
+      const params = new URLSearchParams({ metric, window });
+      const response = await fetchWithAuth(`/servers/${serverName}/history?${params.toString()}`);
+      
+      if (response.ok) {
+        return await response.json();
+      } else {
+        const error = await response.json();
+        throw new Error(error.error || 'Failed to fetch server history');
+      }
+    } catch (error) {
+      console.error(`Error fetching history for server ${serverName}:`, error);
+      throw error;
+    }
+  }
+  
   // Service management
   async function startService(serverName, serviceName) {
     try {
@@ -457,6 +527,7 @@ async function getWinRMStatus(serverIp) {
   }
   
   // Admin Interface Functions
+  // Replaces the whole inventory; the admin interface saves changed servers with saveServer and deleteServer
   async function saveServers(servers) {
     try {
       const response = await fetchWithAuth('/servers', {
@@ -476,6 +547,44 @@ async function getWinRMStatus(serverIp) {
     }
   }
   
+  // Add or replace a single server without sending the whole inventory
+  async function saveServer(server) {
+    try {
+      const response = await fetchWithAuth(`/servers/${encodeURIComponent(server.name)}`, {
+        method: 'PUT',
+        body: JSON.stringify(server)
+      });
+      
+      if (response.ok) {
+        return await response.json();
+      } else {
+        const error = await response.json();
+        throw new Error(error.error || 'Failed to save server');
+      }
+    } catch (error) {
+      console.error(`Error saving server ${server.name}:`, error);
+      throw error;
+    }
+  }
+  
+  async function deleteServer(serverName) {
+    try {
+      const response = await fetchWithAuth(`/servers/${encodeURIComponent(serverName)}`, {
+        method: 'DELETE'
+      });
+      
+      if (response.ok) {
+        return await response.json();
+      } else {
+        const error = await response.json();
+        throw new Error(error.error || 'Failed to delete server');
+      }
+    } catch (error) {
+      console.error(`Error deleting server ${serverName}:`, error);
+      throw error;
+    }
+  }
+  
   async function getConfig() {
     try {
       const response = await fetchWithAuth('/config');
@@ -638,6 +747,45 @@ async function getWinRMStatus(serverIp) {
     }
   }
 
+  // Stream metrics for the whole fleet over one connection; onResult is
+  // called for each server as soon as it answers
+  async function streamFleetMetricsWinRM(onResult) {
+    try {
+      const response = await fetchWithAuth('/winrm/metrics');
+      
+      if (!response.ok) {
+        const errorData = await response.json();
+        throw new Error(errorData.error || 'Failed to get fleet metrics');
+      }
+      
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      const results = [];
+      let buffer = '';
+      
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        
+        for (const line of lines) {
+          if (!line.trim()) continue;
+          const result = JSON.parse(line);
+          results.push(result);
+          if (onResult) onResult(result);
+        }
+      }
+      
+      return results;
+    } catch (error) {
+      console.error('Error streaming fleet metrics:', error);
+      throw error;
+    }
+  }
+
   async function getServicesWinRM(serverIp) {
     try {
       const response = await fetchWithAuth(`/winrm/server/${serverIp}/services`);
@@ -879,7 +1027,10 @@ async function getWinRMStatus(serverIp) {
     
     // Server data
     getServers,
+    getServersPage,
+    getServiceServers,
     getServerDetails,
+    getServerHistory,
     
     // Service management
     startService,
@@ -894,6 +1045,8 @@ async function getWinRMStatus(serverIp) {
     
     // Admin Interface
     saveServers,
+    saveServer,
+    deleteServer,
     getConfig,
     saveConfig,
     
@@ -909,6 +1062,7 @@ async function getWinRMStatus(serverIp) {
     testWinRMConnection,
     getServerInfoWinRM,
     getServerMetricsWinRM,
+    streamFleetMetricsWinRM,
     getServicesWinRM,
     getServiceStatusWinRM,
     startServiceWinRM,
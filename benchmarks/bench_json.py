@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Measure JSON encode and decode throughput for fleets of different sizes with
+the stdlib json module, with orjson (when installed) and through json_provider
+as configured by JSON_BACKEND.
+
+Each server is shaped like the ones simulate_server_status returns, so the
+numbers reflect the /api/servers response and the server-delta payloads.
+
+Usage:
+    python benchmarks/bench_json.py [--sizes 10,1000,10000] [--seconds 1]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+# Add parent directory to path to import shared modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import json_provider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+SERVICES = ['VoxcoCATIService', 'VoxcoDialerService', 'Voxco.InstallationService.exe', 'IIS']
+LOCATIONS = ['Montreal', 'Toronto', 'Paris', 'Cloud']
+
+
+def build_fleet(size):
+    rng = random.Random(size)
+    return [
+        {
+            'name': f'VXSRV{i:05d}',
+            'ip': f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}',
+            'location': rng.choice(LOCATIONS),
+            'services': [
+                {'name': name, 'status': rng.choice(['online', 'online', 'warning', 'offline'])}
+                for name in SERVICES
+            ],
+            'cpu_usage': rng.randint(5, 95),
+            'memory_usage': rng.randint(20, 90),
+            'disk_usage': rng.randint(30, 85),
+            'uptime': rng.randint(1, 30) * 86400,
+            'last_updated': '2025-03-11T10:00:00.000000'
+        }
+        for i in range(size)
+    ]
+
+
+def measure(function, argument, seconds):
+    # Repeat until the time budget is spent, so small fleets are not lost in timer noise
+    runs = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < seconds:
+        function(argument)
+        runs += 1
+        elapsed = time.perf_counter() - start
+    return runs / elapsed
+
+
+def backends():
+    result = [('stdlib', lambda obj: json.dumps(obj).encode('utf-8'), json.loads)]
+    if orjson is not None:
+        result.append(('orjson', orjson.dumps, orjson.loads))
+    result.append((f'provider:{json_provider.BACKEND}', json_provider.dumps_bytes, json_provider.loads))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSON encode and decode throughput of fleet payloads')
+    parser.add_argument('--sizes', default='10,1000,10000', help='Comma-separated fleet sizes')
+    parser.add_argument('--seconds', type=float, default=1, help='Time spent per measurement')
+    args = parser.parse_args()
+
+    print(f"{'servers':>8}  {'backend':<18}{'size KB':>10}{'enc/s':>10}{'enc MB/s':>10}{'dec/s':>10}{'dec MB/s':>10}")
+    for size in [int(value) for value in args.sizes.split(',')]:
+        fleet = build_fleet(size)
+        for name, encode, decode in backends():
+            document = encode(fleet)
+            megabytes = len(document) / 1e6
+            encodes = measure(encode, fleet, args.seconds)
+            decodes = measure(decode, document, args.seconds)
+            print(f"{size:>8}  {name:<18}{len(document) / 1024:>10.1f}{encodes:>10.0f}{encodes * megabytes:>10.1f}"
+                  f"{decodes:>10.0f}{decodes * megabytes:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
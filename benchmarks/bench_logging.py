@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Measure request latency with logging off, with synchronous handlers and with
+the queue-based pipeline from logging_setup.
+
+Each simulated request logs a burst of status change lines, as
+simulate_server_status does when many services change state in one refresh.
+
+Usage:
+    python benchmarks/bench_logging.py [--requests 2000] [--lines 30] [--interval 2]
+"""
+import argparse
+import logging
+import logging.handlers
+import os
+import queue
+import statistics
+import sys
+import tempfile
+import time
+
+# Add parent directory to path to import shared modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from logging_setup import LOG_FORMAT, CountingQueueHandler, DrainingQueueListener
+
+
+def build_handlers(log_dir):
+    formatter = logging.Formatter(LOG_FORMAT)
+    file_handler = logging.FileHandler(os.path.join(log_dir, 'bench.log'))
+    file_handler.setFormatter(formatter)
+    # Console output goes to /dev/null so the terminal does not skew the numbers
+    stream_handler = logging.StreamHandler(open(os.devnull, 'w'))
+    stream_handler.setFormatter(formatter)
+    return [file_handler, stream_handler]
+
+
+def simulate_request(logger, lines):
+    for i in range(lines):
+        logger.info(f"Service status change: VXCATI{i % 8} - VoxcoCATIService changed from online to warning")
+
+
+def run(mode, requests, lines, interval, log_dir):
+    logger = logging.getLogger(f'bench.{mode}')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    listener = None
+    queue_handler = None
+
+    if mode == 'off':
+        logger.disabled = True
+    elif mode == 'sync':
+        for handler in build_handlers(log_dir):
+            logger.addHandler(handler)
+    elif mode == 'queue':
+        log_queue = queue.Queue(maxsize=10000)
+        queue_handler = CountingQueueHandler(log_queue)
+        logger.addHandler(queue_handler)
+        listener = DrainingQueueListener(log_queue, *build_handlers(log_dir))
+        listener.start()
+
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        simulate_request(logger, lines)
+        latencies.append((time.perf_counter() - start) * 1e6)
+        # Idle time between requests, as between real API calls
+        time.sleep(interval / 1000)
+
+    if listener is not None:
+        listener.stop()
+
+    latencies.sort()
+    result = {
+        'mode': mode,
+        'mean': statistics.mean(latencies),
+        'p50': latencies[len(latencies) // 2],
+        'p99': latencies[int(len(latencies) * 0.99) - 1]
+    }
+    if queue_handler is not None:
+        result['dropped'] = queue_handler.dropped
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark request latency with and without logging')
+    parser.add_argument('--requests', type=int, default=2000, help='Number of simulated requests per mode')
+    parser.add_argument('--lines', type=int, default=30, help='Log lines per request')
+    parser.add_argument('--interval', type=float, default=2, help='Milliseconds between requests')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        print(f"{args.requests} requests, {args.lines} log lines each (latency in microseconds)")
+        print(f"{'mode':<8}{'mean':>10}{'p50':>10}{'p99':>10}{'dropped':>10}")
+        for mode in ('off', 'sync', 'queue'):
+            result = run(mode, args.requests, args.lines, args.interval, log_dir)
+            dropped = result.get('dropped', '-')
+            print(f"{result['mode']:<8}{result['mean']:>10.1f}{result['p50']:>10.1f}{result['p99']:>10.1f}{dropped:>10}")
+
+
+if __name__ == '__main__':
+    main()
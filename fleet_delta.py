@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+import threading
+from datetime import datetime
+
+
+def copy_server(server):
+    """Copy a server dict deeply enough that later status changes do not leak into it"""
+    copied = dict(server)
+    copied['services'] = [dict(service) for service in server.get('services', [])]
+    return copied
+
+
+def diff_server(old, new):
+    """
+    Get the fields and services of a server that differ between two versions.
+
+    Args:
+        old (dict): Previous version of the server
+        new (dict): Current version of the server
+
+    Returns:
+        dict or None: Server name plus changed fields and changed services, or None if unchanged
+    """
+    change = {}
+    for key, value in new.items():
+        if key != 'services' and old.get(key) != value:
+            change[key] = value
+
+    old_services = {service.get('name'): service for service in old.get('services', [])}
+    changed_services = []
+    for service in new.get('services', []):
+        old_service = old_services.get(service.get('name'))
+        if old_service is None:
+            changed_services.append(service)
+            continue
+        service_change = {key: value for key, value in service.items() if old_service.get(key) != value}
+        if service_change:
+            service_change['name'] = service.get('name')
+            changed_services.append(service_change)
+    if changed_services:
+        change['services'] = changed_services
+
+    removed_services = [name for name in old_services
+                        if name not in {service.get('name') for service in new.get('services', [])}]
+    if removed_services:
+        change['removed_services'] = removed_services
+
+    if not change:
+        return None
+    change['name'] = new.get('name')
+    return change
+
+
+class DeltaBroadcaster:
+    """
+    Track what clients last saw of the fleet and turn changes into sequenced deltas.
+
+    Every delta carries a sequence number one higher than the previous one, so a
+    client that sees a gap knows it missed an update and can ask for a snapshot.
+    Each server also has its own version, bumped whenever that server changes,
+    for clients that only follow some servers.
+
+    Deltas are handed to send, e.g. a Socket.IO emit, while the lock is held,
+    so clients receive them in sequence order even when several threads
+    refresh the fleet at once.
+    """
+
+    def __init__(self, send):
+        self.send = send
+        self.seq = 0
+        self._snapshot = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def diff(self, servers):
+        """
+        Compare the fleet with the last broadcast state and send a delta of the changes.
+
+        Args:
+            servers (list): Current server dicts
+
+        Returns:
+            dict or None: The delta sent, with seq, changed and removed servers, or None if nothing changed
+        """
+        with self._lock:
+            snapshot = {}
+            changed = []
+            for server in servers:
+                snapshot[server['name']] = copy_server(server)
+                old = self._snapshot.get(server['name'])
+                if old is None:
+                    changed.append(server)
+                else:
+                    change = diff_server(old, server)
+                    if change:
+                        changed.append(change)
+            removed = [name for name in self._snapshot if name not in snapshot]
+            self._snapshot = snapshot
+
+            if not changed and not removed:
+                return None
+            return self._send_delta(changed, removed)
+
+    def record_change(self, server):
+        """
+        Send a delta for a change to a single server without diffing the whole fleet.
+
+        Args:
+            server (dict): The server after the change
+
+        Returns:
+            dict or None: The delta sent for the server, or None if nothing changed
+        """
+        with self._lock:
+            old = self._snapshot.get(server['name'])
+            change = server if old is None else diff_server(old, server)
+            self._snapshot[server['name']] = copy_server(server)
+            if not change:
+                return None
+            return self._send_delta([change], [])
+
+    def _send_delta(self, changed, removed):
+        # Caller holds self._lock
+        self.seq += 1
+        versions = {}
+        for name in [change['name'] for change in changed] + removed:
+            versions[name] = self._versions.get(name, 0) + 1
+        self._versions.update(versions)
+        delta = {
+            'seq': self.seq,
+            'changed': changed,
+            'removed': removed,
+            'versions': versions,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+        self.send(delta)
+        return delta
+
+    def snapshot(self, send=None):
+        """
+        Get the full fleet as last broadcast, for clients that need to resync.
+
+        Args:
+            send (callable): Optionally called with the snapshot before any later delta is sent
+
+        Returns:
+            dict: seq of the last delta and the servers it describes
+        """
+        with self._lock:
+            snapshot = {
+                'seq': self.seq,
+                'servers': list(self._snapshot.values()),
+                'timestamp': datetime.utcnow().isoformat()
+            }
+            if send is not None:
+                send(snapshot)
+            return snapshot
+
+    def server_snapshot(self, server_name, send=None):
+        """
+        Get one server as last broadcast, for clients following that server.
+
+        Args:
+            server_name (str): Name of the server
+            send (callable): Optionally called with the snapshot before any later delta is sent
+
+        Returns:
+            dict: Server name, its current version and its data (None if unknown)
+        """
+        with self._lock:
+            snapshot = {
+                'server': server_name,
+                'version': self._versions.get(server_name, 0),
+                'data': self._snapshot.get(server_name),
+                'timestamp': datetime.utcnow().isoformat()
+            }
+            if send is not None:
+                send(snapshot)
+            return snapshot
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Defaults can be tuned per deployment through environment variables
+DEFAULT_MAX_WORKERS = int(os.getenv('POLL_MAX_WORKERS', 32))
+DEFAULT_REQUEST_TIMEOUT = float(os.getenv('POLL_REQUEST_TIMEOUT', 5))
+DEFAULT_CYCLE_DEADLINE = float(os.getenv('POLL_CYCLE_DEADLINE', 8))
+
+# Number of per-host connection pools each worker session keeps alive
+SESSION_POOL_CONNECTIONS = int(os.getenv('POLL_POOL_CONNECTIONS', 256))
+
+_thread_local = threading.local()
+
+
+def get_session():
+    """
+    Get the keep-alive HTTP session bound to the current worker thread.
+
+    requests.Session is not safe to share between threads, so each worker
+    keeps its own session and reuses its connections across poll cycles.
+
+    Returns:
+        requests.Session: Session for the calling thread
+    """
+    session = getattr(_thread_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=SESSION_POOL_CONNECTIONS, pool_maxsize=1, max_retries=0)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _thread_local.session = session
+    return session
+
+
+class FleetPoller:
+    """Poll every host of the fleet concurrently on a bounded thread pool"""
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, request_timeout=DEFAULT_REQUEST_TIMEOUT,
+                 cycle_deadline=DEFAULT_CYCLE_DEADLINE):
+        self.request_timeout = request_timeout
+        self.cycle_deadline = cycle_deadline
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fleet-poller')
+
+    def poll(self, servers, fetch, on_missed, deadline=None):
+        """
+        Run fetch(server, session, timeout) for every server and wait for the cycle deadline.
+
+        Hosts that have not answered when the deadline hits are reported through
+        on_missed(server), so the cycle returns partial results instead of
+        waiting on the slowest host.
+
+        Args:
+            servers (list): Inventory entries to poll
+            fetch (callable): Function returning the result for one server
+            on_missed (callable): Function returning the placeholder for a late server
+            deadline (float): Optional override of the cycle deadline in seconds
+
+        Returns:
+            list: One result per server, in inventory order
+        """
+        if deadline is None:
+            deadline = self.cycle_deadline
+
+        futures = [self._executor.submit(self._run, fetch, server) for server in servers]
+        wait(futures, timeout=deadline)
+
+        results = []
+        for server, future in zip(servers, futures):
+            if future.done():
+                results.append(future.result())
+            else:
+                # Drop queued work; requests already in flight end on their own timeout
+                future.cancel()
+                results.append(on_missed(server))
+        return results
+
+    def poll_iter(self, servers, fetch, on_missed, host_timeout=None):
+        """
+        Run fetch(server, session, timeout) for every server and yield results as they arrive.
+
+        Each host gets host_timeout seconds from the moment a worker picks it up,
+        so hosts still waiting for a free worker are never reported as late.
+        fetch receives host_timeout and must stop by then, since a late host's
+        worker is not interrupted; hosts not started yet are cancelled when the
+        caller stops iterating.
+
+        Args:
+            servers (list): Inventory entries to poll
+            fetch (callable): Function returning the result for one server
+            on_missed (callable): Function returning the placeholder for a late server
+            host_timeout (float): Optional override of the per-host timeout in seconds
+
+        Yields:
+            Results in completion order, followed by placeholders for late hosts
+        """
+        if host_timeout is None:
+            host_timeout = self.request_timeout
+
+        # Start time of each host, keyed by the id of its inventory entry
+        started = {}
+        pending = {}
+        for server in servers:
+            future = self._executor.submit(self._run_timed, fetch, server, started, host_timeout)
+            pending[future] = server
+
+        try:
+            while pending:
+                done, _ = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+                for future in done:
+                    del pending[future]
+                    yield future.result()
+
+                now = time.monotonic()
+                for future, server in list(pending.items()):
+                    start = started.get(id(server))
+                    if start is not None and now - start > host_timeout:
+                        del pending[future]
+                        yield on_missed(server)
+        finally:
+            # The caller stopped early, e.g. the client disconnected: drop hosts no worker
+            # has picked up yet; running ones end on the timeout passed to fetch
+            for future in pending:
+                future.cancel()
+
+    def _run(self, fetch, server):
+        return fetch(server, get_session(), self.request_timeout)
+
+    def _run_timed(self, fetch, server, started, timeout):
+        started[id(server)] = time.monotonic()
+        return fetch(server, get_session(), timeout)
+
+    def shutdown(self):
+        """Stop the worker threads"""
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+import heapq
+import os
+
+# Largest page handed out, whatever limit is asked for
+MAX_PAGE_SIZE = int(os.getenv('FLEET_MAX_PAGE_SIZE', 1000))
+
+# Server fields that sort=field or sort=-field may use
+SORT_FIELDS = ('name', 'ip', 'location', 'type', 'os', 'uptime', 'cpu_usage', 'memory_usage', 'disk_usage')
+
+
+def parse_fleet_query(args):
+    """
+    Parse the paging, projection and sorting parameters of /api/servers.
+
+    Args:
+        args (MultiDict): Request query arguments
+
+    Returns:
+        dict: limit and offset (None without paging), fields (None for full objects),
+        include_services, sort field and sort_descending
+
+    Raises:
+        ValueError: If a parameter is malformed or names an unknown sort field
+    """
+    query = {'limit': None, 'offset': 0, 'fields': None, 'include_services': False,
+             'sort': None, 'sort_descending': False}
+
+    if 'limit' in args or 'offset' in args:
+        try:
+            query['limit'] = max(1, min(int(args.get('limit', MAX_PAGE_SIZE)), MAX_PAGE_SIZE))
+            query['offset'] = max(0, int(args.get('offset', 0)))
+        except ValueError:
+            raise ValueError('limit and offset must be integers')
+
+    fields = args.get('fields', '')
+    if fields:
+        query['fields'] = [field.strip() for field in fields.split(',') if field.strip()]
+    query['include_services'] = 'services' in args.get('include', '').split(',')
+
+    sort = args.get('sort', '')
+    if sort:
+        query['sort_descending'] = sort.startswith('-')
+        query['sort'] = sort.lstrip('-+')
+        if query['sort'] not in SORT_FIELDS:
+            raise ValueError(f'Unknown sort field, expected one of: {", ".join(SORT_FIELDS)}')
+    return query
+
+
+def project(server, fields, include_services):
+    """Get the requested fields of a server, plus its services if they were opted into"""
+    projected = {field: server[field] for field in fields if field in server}
+    if include_services:
+        projected['services'] = server.get('services', [])
+    return projected
+
+
+def run_fleet_query(servers, query):
+    """
+    Sort, page and project servers without copying the server dicts.
+
+    With a page requested, only offset + limit servers are selected from the
+    fleet instead of sorting all of it.
+
+    Args:
+        servers (list): Server dicts, e.g. the cached fleet after search and status filters
+        query (dict): As returned by parse_fleet_query
+
+    Returns:
+        list or dict: The servers, or with paging a dict of servers, total, offset, limit and next_offset
+    """
+    total = len(servers)
+    limit = query['limit']
+    offset = query['offset']
+
+    if query['sort']:
+        field = query['sort']
+        if query['sort_descending']:
+            # Missing values go last in either direction
+            def key(server):
+                value = server.get(field)
+                return (value is not None, value if value is not None else 0, server.get('name', ''))
+            pick = heapq.nlargest
+        else:
+            def key(server):
+                value = server.get(field)
+                return (value is None, value if value is not None else 0, server.get('name', ''))
+            pick = heapq.nsmallest
+        if limit is not None:
+            selected = pick(offset + limit, servers, key=key)[offset:]
+        else:
+            selected = sorted(servers, key=key, reverse=query['sort_descending'])
+    elif limit is not None:
+        selected = servers[offset:offset + limit]
+    else:
+        selected = servers
+
+    if query['fields'] is not None:
+        selected = [project(server, query['fields'], query['include_services']) for server in selected]
+
+    if limit is None:
+        return selected
+    next_offset = offset + limit if offset + limit < total else None
+    return {'servers': selected, 'total': total, 'offset': offset, 'limit': limit, 'next_offset': next_offset}
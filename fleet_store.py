@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+import hashlib
+import secrets
+import threading
+from collections import Counter, defaultdict
+
+from search_index import SearchIndex
+
+# Per-server resource metrics averaged by stats()
+METRICS = ('cpu_usage', 'memory_usage', 'disk_usage')
+
+
+class FleetStore:
+    """
+    In-memory fleet state with O(1) lookup by server name, IP and (server, service) pair,
+    and an n-gram and CIDR search index over name, IP and location.
+
+    Servers are also indexed by the statuses of their services and by service
+    name, with per-server counts so set_service_status() keeps the sets exact;
+    combined filters are answered by intersecting them.
+
+    Service status counts and metric sums are kept as running aggregates, rebuilt
+    by replace() and adjusted by set_service_status(), so stats() is a
+    constant-time read instead of a walk over the fleet.
+
+    version is bumped on every change; together with the per-instance
+    instance_id it identifies a state of the fleet, e.g. for HTTP ETags.
+    Stores mirroring shared state pass the shared instance_id and version,
+    so every process tags the same state alike.
+    """
+
+    def __init__(self, instance_id=None):
+        self._lock = threading.RLock()
+        self.instance_id = instance_id or secrets.token_hex(4)
+        self.version = 0
+        self.servers = []
+        self._by_name = {}
+        self._by_ip = {}
+        self._services = {}
+        self._positions = {}
+        self._servers_by_status = {}
+        self._servers_by_service = {}
+        self._servers_by_service_status = {}
+        self._status_counts = Counter()
+        self._metric_sums = dict.fromkeys(METRICS, 0.0)
+        self._metric_counts = dict.fromkeys(METRICS, 0)
+        self._search_index = SearchIndex()
+
+    def replace(self, servers, version=None):
+        """
+        Replace the whole fleet and rebuild the indexes.
+
+        Args:
+            servers (list): Server dicts, each with a 'services' list
+            version (int): Version to take over from shared state instead of bumping our own
+        """
+        by_name = {}
+        by_ip = {}
+        services = {}
+        positions = {}
+        by_status = defaultdict(Counter)
+        by_service = defaultdict(set)
+        by_service_status = defaultdict(set)
+        status_counts = Counter()
+        metric_sums = dict.fromkeys(METRICS, 0.0)
+        metric_counts = dict.fromkeys(METRICS, 0)
+        for position, server in enumerate(servers):
+            name = server.get('name')
+            by_name[name] = server
+            positions[name] = position
+            if server.get('ip'):
+                by_ip[server['ip']] = server
+            for service in server.get('services', []):
+                services[(name, service.get('name'))] = service
+                status_counts[service.get('status')] += 1
+                by_status[service.get('status')][name] += 1
+                by_service[service.get('name')].add(name)
+                by_service_status[(service.get('name'), service.get('status'))].add(name)
+            for metric in METRICS:
+                if server.get(metric) is not None:
+                    metric_sums[metric] += server[metric]
+                    metric_counts[metric] += 1
+
+        with self._lock:
+            self._search_index.update(servers)
+            self.servers = servers
+            self._by_name = by_name
+            self._by_ip = by_ip
+            self._services = services
+            self._positions = positions
+            self._servers_by_status = by_status
+            self._servers_by_service = by_service
+            self._servers_by_service_status = by_service_status
+            self._status_counts = status_counts
+            self._metric_sums = metric_sums
+            self._metric_counts = metric_counts
+            self.version = self.version + 1 if version is None else version
+
+    def etag(self, *parts):
+        """
+        Get a strong ETag for a response derived from the current fleet state.
+
+        Args:
+            *parts: Anything else the response depends on, e.g. the endpoint and query string
+
+        Returns:
+            str: Unquoted entity tag
+        """
+        digest = hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:12]
+        return f'{self.instance_id}-{self.version}-{digest}'
+
+    def get_server(self, server_name):
+        """Get a server by name, or None"""
+        return self._by_name.get(server_name)
+
+    def get_server_by_ip(self, server_ip):
+        """Get a server by IP address, or None"""
+        return self._by_ip.get(server_ip)
+
+    def search(self, term='', cidr=''):
+        """
+        Get the servers whose name, IP or location contains term and whose IP is in cidr.
+
+        Args:
+            term (str): Case-insensitive search term; empty matches all
+            cidr (str): CIDR range such as 172.16.1.0/24; empty matches all
+
+        Returns:
+            list or None: Matching servers in fleet order, or None if neither filter is given
+
+        Raises:
+            ValueError: If cidr is not a valid network
+        """
+        return self._search_index.search(term, cidr)
+
+    def filter(self, search='', cidr='', status='', service=''):
+        """
+        Get the servers matching all given filters, in fleet order, by intersecting the indexes.
+
+        Args:
+            search (str): Case-insensitive substring of the name, IP or location
+            cidr (str): CIDR range the server IP must be in, e.g. 172.16.1.0/24
+            status (str): Only servers with a service in this status, or with service given,
+                only servers where that service is in this status
+            service (str): Only servers running a service with this name
+
+        Returns:
+            list: Matching servers; the whole fleet if no filter is given
+
+        Raises:
+            ValueError: If cidr is not a valid network
+        """
+        with self._lock:
+            names = None
+            if service and status:
+                names = self._servers_by_service_status.get((service, status), set())
+            elif service:
+                names = self._servers_by_service.get(service, set())
+            elif status:
+                names = self._servers_by_status.get(status, {}).keys()
+
+            positions = self._search_index.match(search, cidr)
+            if names is not None:
+                named = {self._positions[name] for name in names}
+                positions = named if positions is None else positions & named
+            if positions is None:
+                return self.servers
+            return [self.servers[position] for position in sorted(positions)]
+
+    def get_service(self, server_name, service_name):
+        """Get a service of a server, or None"""
+        return self._services.get((server_name, service_name))
+
+    def set_service_status(self, server_name, service_name, status):
+        """
+        Update the status of a service.
+
+        Args:
+            server_name (str): Name of the server
+            service_name (str): Name of the service
+            status (str): New status
+
+        Returns:
+            str or None: Previous status, or None if the service is unknown
+        """
+        with self._lock:
+            service = self._services.get((server_name, service_name))
+            if service is None:
+                return None
+            old_status = service.get('status')
+            service['status'] = status
+            self._status_counts[old_status] -= 1
+            self._status_counts[status] += 1
+
+            old_servers = self._servers_by_status[old_status]
+            old_servers[server_name] -= 1
+            if old_servers[server_name] <= 0:
+                del old_servers[server_name]
+            self._servers_by_status[status][server_name] += 1
+            self._servers_by_service_status[(service_name, old_status)].discard(server_name)
+            self._servers_by_service_status[(service_name, status)].add(server_name)
+            self.version += 1
+            return old_status
+
+    def stats(self):
+        """
+        Get fleet-wide counts and averages from the running aggregates.
+
+        Each average is taken over the servers that report that metric, so servers
+        without a value, e.g. ones that could not be reached, do not pull it
+        towards zero. It is 0 when no server reports the metric.
+
+        Returns:
+            dict: Server and service counts by status and average resource usage
+        """
+        with self._lock:
+            stats = {
+                'total_servers': len(self.servers),
+                'total_services': sum(self._status_counts.values()),
+                'online_services': self._status_counts['online'],
+                'warning_services': self._status_counts['warning'],
+                'offline_services': self._status_counts['offline']
+            }
+            for metric in METRICS:
+                count = self._metric_counts[metric]
+                stats[f'avg_{metric}'] = self._metric_sums[metric] / count if count > 0 else 0
+            return stats
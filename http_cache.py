@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+import gzip
+import os
+import threading
+from collections import OrderedDict
+
+from flask import Response, json, make_response, request
+
+# Browsers may keep authorized responses privately but must revalidate them on every use
+REVALIDATE_CACHE_CONTROL = 'private, no-cache'
+
+# Encoded responses kept per fleet version, and the smallest body worth compressing
+DEFAULT_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 128))
+GZIP_MIN_SIZE = int(os.getenv('GZIP_MIN_SIZE', 1024))
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', 6))
+
+
+def not_modified(etag):
+    """
+    Get a 304 response if the client already holds the representation with this ETag.
+
+    Args:
+        etag (str): Unquoted entity tag of the current representation
+
+    Returns:
+        Response or None: 304 Not Modified response, or None if the body must be sent
+    """
+    # If-None-Match uses weak comparison, so the weak tag of a gzip body matches too
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = make_response('', 304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = REVALIDATE_CACHE_CONTROL
+    return response
+
+
+def with_etag(response, etag, weak=False):
+    """
+    Attach an ETag to a response and allow clients to revalidate it.
+
+    Args:
+        response (Response): Response to send
+        etag (str): Unquoted entity tag of the representation
+        weak (bool): Mark the tag as weak, e.g. for a compressed body
+
+    Returns:
+        Response: The same response
+    """
+    response.set_etag(etag, weak=weak)
+    response.headers['Cache-Control'] = REVALIDATE_CACHE_CONTROL
+    return response
+
+
+class ResponseCache:
+    """
+    LRU of encoded JSON response bodies and their gzip-compressed form.
+
+    Entries belong to one fleet version; the first lookup with a newer
+    version drops them all, so refreshes and service actions, which bump
+    the version, invalidate the cache without extra bookkeeping.
+    """
+
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, version, key, build):
+        """
+        Get the encoded body for a request, building and encoding it on a miss.
+
+        Args:
+            version (int): Fleet version the response is derived from
+            key (tuple): Endpoint and query parameters of the request
+            build (callable): Returns the object to encode
+
+        Returns:
+            tuple: (body, gzip_body) bytes; gzip_body is None for small bodies
+        """
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Encode outside the lock so concurrent misses do not queue up behind each other
+        body = json.dumps(build(), separators=(',', ':')).encode('utf-8')
+        gzip_body = gzip.compress(body, GZIP_LEVEL) if len(body) >= GZIP_MIN_SIZE else None
+        entry = (body, gzip_body)
+
+        with self._lock:
+            if version == self._version:
+                self._entries[key] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Get cache counters.
+
+        Returns:
+            dict: Entries held, hits and misses since startup
+        """
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+def cached_json_response(entry, etag):
+    """
+    Build a JSON response from a cached entry, compressed if the client accepts gzip.
+
+    Args:
+        entry (tuple): (body, gzip_body) as returned by ResponseCache.get
+        etag (str): Unquoted entity tag of the representation
+
+    Returns:
+        Response: Response with ETag, Vary and, for gzip, Content-Encoding set
+    """
+    body, gzip_body = entry
+    if gzip_body is not None and 'gzip' in request.accept_encodings:
+        response = Response(gzip_body, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+        weak = True
+    else:
+        response = Response(body, mimetype='application/json')
+        weak = False
+    response.vary.add('Accept-Encoding')
+    return with_etag(response, etag, weak=weak)
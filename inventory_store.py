@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+import base64
+import os
+import sqlite3
+import threading
+
+import json_provider
+
+# Largest page /api/servers hands out, whatever limit is asked for
+MAX_PAGE_SIZE = int(os.getenv('INVENTORY_MAX_PAGE_SIZE', 500))
+
+# Spec fields with their own columns; anything else in 'specs' is kept in extra
+SPEC_FIELDS = ('cpu', 'cores', 'ram', 'storage', 'os')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS servers (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    ip TEXT,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS services (
+    server_id INTEGER NOT NULL REFERENCES servers (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    status TEXT,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (server_id, name)
+);
+CREATE TABLE IF NOT EXISTS specs (
+    server_id INTEGER PRIMARY KEY REFERENCES servers (id) ON DELETE CASCADE,
+    cpu TEXT,
+    cores INTEGER,
+    ram TEXT,
+    storage TEXT,
+    os TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_servers_ip ON servers (ip);
+CREATE INDEX IF NOT EXISTS idx_servers_position ON servers (position);
+CREATE INDEX IF NOT EXISTS idx_services_status ON services (status, server_id);
+CREATE TABLE IF NOT EXISTS counts (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+-- Running totals for stats(); plain INSERT ... WHERE NOT EXISTS because a trigger's
+-- OR IGNORE would be overridden by the outer INSERT OR REPLACE
+CREATE TRIGGER IF NOT EXISTS count_server_insert AFTER INSERT ON servers BEGIN
+    UPDATE counts SET value = value + 1 WHERE key = 'servers';
+END;
+CREATE TRIGGER IF NOT EXISTS count_server_delete AFTER DELETE ON servers BEGIN
+    UPDATE counts SET value = value - 1 WHERE key = 'servers';
+END;
+CREATE TRIGGER IF NOT EXISTS count_service_insert AFTER INSERT ON services BEGIN
+    INSERT INTO counts (key, value) SELECT 'status:' || COALESCE(NEW.status, ''), 0
+        WHERE NOT EXISTS (SELECT 1 FROM counts WHERE key = 'status:' || COALESCE(NEW.status, ''));
+    UPDATE counts SET value = value + 1 WHERE key = 'status:' || COALESCE(NEW.status, '');
+END;
+CREATE TRIGGER IF NOT EXISTS count_service_delete AFTER DELETE ON services BEGIN
+    UPDATE counts SET value = value - 1 WHERE key = 'status:' || COALESCE(OLD.status, '');
+END;
+CREATE TRIGGER IF NOT EXISTS count_service_update AFTER UPDATE OF status ON services BEGIN
+    UPDATE counts SET value = value - 1 WHERE key = 'status:' || COALESCE(OLD.status, '');
+    INSERT INTO counts (key, value) SELECT 'status:' || COALESCE(NEW.status, ''), 0
+        WHERE NOT EXISTS (SELECT 1 FROM counts WHERE key = 'status:' || COALESCE(NEW.status, ''));
+    UPDATE counts SET value = value + 1 WHERE key = 'status:' || COALESCE(NEW.status, '');
+END;
+'''
+
+
+def encode_cursor(name):
+    """Turn the last server name of a page into an opaque cursor"""
+    return base64.urlsafe_b64encode(name.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    Get the server name a cursor points after.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        return base64.b64decode(cursor.encode('ascii'), altchars=b'-_', validate=True).decode('utf-8')
+    except (ValueError, UnicodeError):
+        raise ValueError(f'Invalid cursor: {cursor}')
+
+
+class InventoryStore:
+    """
+    Server inventory in SQLite, with servers, services and specs in separate indexed tables.
+
+    Servers keep the order they were saved in for the full list, while pages
+    are ordered by name so a cursor stays valid when servers are added or removed.
+    Server and service status counts are kept by triggers in the counts table,
+    so stats() reads a few rows whichever process or method changed the inventory.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+            # Rows replaced by INSERT OR REPLACE must fire the delete triggers too
+            conn.execute('PRAGMA recursive_triggers=ON')
+            conn.executescript(SCHEMA)
+            self._init_counts(conn)
+            self._local.conn = conn
+        return conn
+
+    def _init_counts(self, conn):
+        # Fill the counts table once for inventories created before it existed
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            if conn.execute("SELECT 1 FROM counts WHERE key = 'servers'").fetchone() is not None:
+                return
+            conn.execute('DELETE FROM counts')
+            conn.execute("INSERT INTO counts (key, value) SELECT 'servers', COUNT(*) FROM servers")
+            conn.execute(
+                "INSERT INTO counts (key, value) SELECT 'status:' || COALESCE(status, ''), COUNT(*) "
+                "FROM services GROUP BY COALESCE(status, '')"
+            )
+
+    def is_empty(self):
+        """Check whether the inventory has no servers, e.g. before importing a JSON inventory"""
+        return self._conn().execute('SELECT 1 FROM servers LIMIT 1').fetchone() is None
+
+    def _insert_server(self, conn, server, position):
+        data = {key: value for key, value in server.items() if key not in ('services', 'specs')}
+        cursor = conn.execute(
+            'INSERT INTO servers (name, ip, position, data) VALUES (?, ?, ?, ?)',
+            (server['name'], server.get('ip'), position, json_provider.dumps(data))
+        )
+        server_id = cursor.lastrowid
+
+        conn.executemany(
+            'INSERT OR REPLACE INTO services (server_id, name, status, position, data) VALUES (?, ?, ?, ?, ?)',
+            [
+                (server_id, service['name'], service.get('status'), service_position,
+                 json_provider.dumps({key: value for key, value in service.items() if key not in ('name', 'status')}))
+                for service_position, service in enumerate(server.get('services', []))
+            ]
+        )
+
+        specs = server.get('specs')
+        if specs is not None:
+            extra = {key: value for key, value in specs.items() if key not in SPEC_FIELDS}
+            conn.execute(
+                'INSERT INTO specs (server_id, cpu, cores, ram, storage, os, extra) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (server_id, *(specs.get(field) for field in SPEC_FIELDS), json_provider.dumps(extra))
+            )
+
+    def replace_all(self, servers):
+        """
+        Replace the whole inventory, as the admin interface's bulk save does.
+
+        Args:
+            servers (list): Server dicts, each with a unique 'name'
+        """
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.execute('DELETE FROM servers')
+                for position, server in enumerate(servers):
+                    self._insert_server(conn, server, position)
+
+    def upsert_server(self, server):
+        """
+        Add a server or replace the server with the same name, keeping its position.
+
+        Args:
+            server (dict): Server dict with 'name'
+        """
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                row = conn.execute('SELECT position FROM servers WHERE name = ?', (server['name'],)).fetchone()
+                if row is None:
+                    position = conn.execute('SELECT COALESCE(MAX(position) + 1, 0) FROM servers').fetchone()[0]
+                else:
+                    position = row[0]
+                    conn.execute('DELETE FROM servers WHERE name = ?', (server['name'],))
+                self._insert_server(conn, server, position)
+
+    def delete_server(self, server_name):
+        """
+        Remove a server with its services and specs.
+
+        Returns:
+            bool: True if the server existed
+        """
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                return conn.execute('DELETE FROM servers WHERE name = ?', (server_name,)).rowcount > 0
+
+    def _build(self, conn, rows, whole_inventory=False):
+        # Assemble server dicts for rows of (id, data), fetching their services and specs in
+        # two queries; the whole inventory is read without an IN list, which could get too long
+        if not rows:
+            return []
+        servers = {}
+        for server_id, data in rows:
+            server = json_provider.loads(data)
+            server['services'] = []
+            servers[server_id] = server
+
+        where = ''
+        ids = []
+        if not whole_inventory:
+            where = f" WHERE server_id IN ({','.join('?' * len(servers))})"
+            ids = list(servers)
+        for server_id, name, status, data in conn.execute(
+            f'SELECT server_id, name, status, data FROM services{where} ORDER BY server_id, position', ids
+        ):
+            service = {'name': name, 'status': status}
+            service.update(json_provider.loads(data))
+            servers[server_id]['services'].append(service)
+        for server_id, cpu, cores, ram, storage, os_name, extra in conn.execute(
+            f'SELECT server_id, cpu, cores, ram, storage, os, extra FROM specs{where}', ids
+        ):
+            specs = {field: value for field, value in zip(SPEC_FIELDS, (cpu, cores, ram, storage, os_name))
+                     if value is not None}
+            specs.update(json_provider.loads(extra))
+            servers[server_id]['specs'] = specs
+        return [servers[server_id] for server_id, _ in rows]
+
+    def list_servers(self):
+        """Get the whole inventory in saved order"""
+        conn = self._conn()
+        return self._build(conn, conn.execute('SELECT id, data FROM servers ORDER BY position').fetchall(),
+                           whole_inventory=True)
+
+    def get_server(self, server_name):
+        """Get a server by name, or None"""
+        conn = self._conn()
+        servers = self._build(conn, conn.execute('SELECT id, data FROM servers WHERE name = ?', (server_name,)).fetchall())
+        return servers[0] if servers else None
+
+    def page(self, limit, cursor=None, status='', ip=''):
+        """
+        Get one page of servers ordered by name.
+
+        Args:
+            limit (int): Page size, capped at MAX_PAGE_SIZE
+            cursor (str): Cursor returned with the previous page, or None for the first page
+            status (str): Only servers with at least one service in this status
+            ip (str): Only the server with this IP address
+
+        Returns:
+            tuple: (servers, next_cursor); next_cursor is None on the last page
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        clauses = []
+        params = []
+        if cursor:
+            clauses.append('name > ?')
+            params.append(decode_cursor(cursor))
+        if status:
+            clauses.append('id IN (SELECT server_id FROM services WHERE status = ?)')
+            params.append(status)
+        if ip:
+            clauses.append('ip = ?')
+            params.append(ip)
+
+        sql = 'SELECT id, data, name FROM servers'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY name LIMIT ?'
+        # One extra row tells whether another page follows
+        params.append(limit + 1)
+
+        conn = self._conn()
+        rows = conn.execute(sql, params).fetchall()
+        next_cursor = encode_cursor(rows[limit - 1][2]) if len(rows) > limit else None
+        rows = rows[:limit]
+        return self._build(conn, [(server_id, data) for server_id, data, _ in rows]), next_cursor
+
+    def stats(self):
+        """
+        Get server and service status counts from the running totals kept by the counts table.
+
+        Returns:
+            dict: total_servers, total_services, online_services, warning_services and offline_services
+        """
+        counts = dict(self._conn().execute('SELECT key, value FROM counts').fetchall())
+        status_counts = {key[len('status:'):]: value for key, value in counts.items() if key.startswith('status:')}
+        return {
+            'total_servers': counts.get('servers', 0),
+            'total_services': sum(status_counts.values()),
+            'online_services': status_counts.get('online', 0),
+            'warning_services': status_counts.get('warning', 0),
+            'offline_services': status_counts.get('offline', 0)
+        }
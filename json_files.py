@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+import os
+import tempfile
+import threading
+
+import json_provider
+
+
+def write_json_atomic(path, data, indent=2):
+    """
+    Write a JSON document so that readers see either the old or the new file, never a partial one.
+
+    The document is written to a temporary file in the same directory, flushed
+    to disk and renamed over the target.
+
+    Args:
+        path (str or Path): File to write
+        data: Object to encode
+        indent (int): Indentation of the encoded document
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json_provider.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class CachedJSONFile:
+    """
+    JSON file kept parsed in memory and re-read only when its mtime or size changes.
+
+    The parsed document is shared between callers, who must not modify it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._signature = None
+        self._data = None
+        self._lock = threading.Lock()
+
+    def _stat_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self):
+        """
+        Get the parsed document, re-reading the file only if it changed.
+
+        Returns:
+            The decoded document, or None if the file does not exist or could not be parsed before
+
+        Raises:
+            json.JSONDecodeError: If the file changed and is not valid JSON
+            OSError: If the file cannot be read
+        """
+        signature = self._stat_signature()
+        with self._lock:
+            if signature == self._signature:
+                return self._data
+            # Remember the signature before parsing so a broken file is reported once, not per call
+            self._signature = signature
+            self._data = None
+            if signature is None:
+                return None
+            with open(self.path, 'rb') as f:
+                self._data = json_provider.load(f)
+            return self._data
+
+    def save(self, data, indent=2):
+        """
+        Atomically replace the file and the cached document.
+
+        Args:
+            data: Object to encode
+            indent (int): Indentation of the encoded document
+        """
+        with self._lock:
+            write_json_atomic(self.path, data, indent=indent)
+            self._signature = self._stat_signature()
+            self._data = data
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+import json as _json
+import logging
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from flask.json.provider import DefaultJSONProvider
+except ImportError:
+    # Flask < 2.2 configures JSON through encoder and decoder classes instead
+    DefaultJSONProvider = None
+    from flask.json import JSONEncoder as FlaskJSONEncoder
+
+logger = logging.getLogger(__name__)
+
+# 'auto' uses orjson when it is installed, 'stdlib' always uses the json module
+JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto').lower()
+
+if JSON_BACKEND not in ('auto', 'orjson', 'stdlib'):
+    logger.warning(f"Unknown JSON_BACKEND '{JSON_BACKEND}', using auto")
+    JSON_BACKEND = 'auto'
+if JSON_BACKEND == 'orjson' and orjson is None:
+    logger.warning("JSON_BACKEND is orjson but orjson is not installed, using the json module")
+if JSON_BACKEND == 'stdlib':
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'stdlib'
+
+
+def dumps_bytes(obj, default=None, indent=None, sort_keys=False, **kwargs):
+    """
+    Encode an object as UTF-8 JSON bytes.
+
+    Args:
+        obj: Object to encode
+        default (callable): Called for objects the encoder does not support
+        indent (int): Pretty-print when set; orjson always indents by two spaces
+        sort_keys (bool): Sort object keys
+        **kwargs: Further json.dumps options, only honoured by the stdlib backend
+
+    Returns:
+        bytes: Encoded JSON
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if default is not None:
+            # Let the caller format datetimes, as Flask's encoder does
+            option |= orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=default, option=option)
+        except TypeError:
+            # orjson rejects some values the stdlib accepts, such as integers above 64 bits
+            pass
+    return _json.dumps(obj, default=default, indent=indent, sort_keys=sort_keys, **kwargs).encode('utf-8')
+
+
+def dumps(obj, default=None, indent=None, sort_keys=False, **kwargs):
+    """Encode an object as a JSON string; see dumps_bytes for the arguments"""
+    if orjson is None:
+        return _json.dumps(obj, default=default, indent=indent, sort_keys=sort_keys, **kwargs)
+    return dumps_bytes(obj, default=default, indent=indent, sort_keys=sort_keys, **kwargs).decode('utf-8')
+
+
+def loads(s, **kwargs):
+    """
+    Decode a JSON document.
+
+    Args:
+        s (str or bytes): JSON document
+        **kwargs: Further json.loads options, only honoured by the stdlib backend
+
+    Returns:
+        Decoded object
+
+    Raises:
+        json.JSONDecodeError: If the document is not valid JSON (orjson's error is a subclass)
+    """
+    if orjson is not None:
+        return orjson.loads(s)
+    return _json.loads(s, **kwargs)
+
+
+def load(fp):
+    """Decode a JSON document from an open file"""
+    return loads(fp.read())
+
+
+def dump(obj, fp, indent=None):
+    """Encode an object as JSON into an open text file"""
+    fp.write(dumps(obj, indent=indent))
+
+
+if DefaultJSONProvider is not None:
+    class FastJSONProvider(DefaultJSONProvider):
+        """Flask JSON provider encoding and decoding with the configured backend"""
+
+        def dumps(self, obj, **kwargs):
+            kwargs.setdefault('default', self.default)
+            kwargs.setdefault('sort_keys', self.sort_keys)
+            return dumps(obj, **kwargs)
+
+        def loads(self, s, **kwargs):
+            return loads(s, **kwargs)
+else:
+    class FastJSONEncoder(FlaskJSONEncoder):
+        """Flask JSON encoder encoding with the configured backend"""
+
+        def encode(self, o):
+            if orjson is None:
+                return super().encode(o)
+            return dumps(o, default=self.default, indent=self.indent, sort_keys=self.sort_keys)
+
+    class FastJSONDecoder(_json.JSONDecoder):
+        """Flask JSON decoder decoding with the configured backend"""
+
+        def decode(self, s, **kwargs):
+            if orjson is None:
+                return super().decode(s, **kwargs)
+            return loads(s)
+
+
+def init_app(app):
+    """
+    Make a Flask app encode and decode JSON with the configured backend.
+
+    Args:
+        app (Flask): Application whose jsonify and request.get_json should use it
+    """
+    if DefaultJSONProvider is not None:
+        app.json = FastJSONProvider(app)
+    else:
+        app.json_encoder = FastJSONEncoder
+        app.json_decoder = FastJSONDecoder
+    logger.info(f"JSON backend: {BACKEND}")
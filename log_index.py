@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+
+from log_reader import log_filter
+
+# Lines written with '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LINE_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),\d+ - (\S+) - ([A-Z]+) - ')
+
+# Bytes hashed at the start of the log to notice that it was truncated or replaced
+HEAD_SIGNATURE_SIZE = 256
+
+# Bytes of unindexed log read and indexed per step, so a large backlog is never loaded at once
+INDEX_CHUNK_SIZE = 1024 * 1024
+
+# Shortest term the trigram text index can look up; shorter ones are matched by reading the lines
+MIN_TEXT_TERM = 3
+
+# Bumped when the tables change, so older index files are rebuilt from the log
+SCHEMA_VERSION = '2'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+'''
+
+LINES_SCHEMA = '''
+CREATE TABLE lines (
+    offset INTEGER PRIMARY KEY,
+    ts TEXT NOT NULL,
+    logger TEXT NOT NULL
+);
+CREATE INDEX idx_lines_ts ON lines (ts);
+CREATE INDEX idx_lines_logger_ts ON lines (logger, ts);
+CREATE VIRTUAL TABLE line_text USING fts5(text, content='', tokenize='trigram case_sensitive 1');
+'''
+
+
+def parse_line(line):
+    """
+    Parse the record header of a log line.
+
+    Args:
+        line (str): Log line without its trailing newline
+
+    Returns:
+        tuple or None: (ts, level, logger), or None for lines without a log
+        record header such as traceback continuations
+    """
+    match = LINE_PATTERN.match(line)
+    if not match:
+        return None
+    ts, logger_name, level = match.groups()
+    return ts, level, logger_name
+
+
+def text_query(*terms):
+    """
+    Build an FTS5 query for lines containing every term long enough for the trigram index.
+
+    Returns:
+        str or None: Query of quoted phrases, or None if no term can be looked up
+    """
+    phrases = ['"' + term.replace('"', '""') + '"' for term in terms if len(term) >= MIN_TEXT_TERM]
+    return ' AND '.join(phrases) or None
+
+
+def normalize_timestamp(value):
+    """
+    Convert an ISO 8601 string or epoch seconds into the log's local timestamp format.
+
+    Args:
+        value (str): Timestamp from a query parameter
+
+    Returns:
+        str: Timestamp formatted like the log's asctime, e.g. '2025-03-11 10:00:00'
+
+    Raises:
+        ValueError: If the value is not a recognised timestamp or is out of range
+    """
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        seconds = None
+
+    try:
+        if seconds is not None:
+            dt = datetime.fromtimestamp(seconds)
+        else:
+            dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            if dt.tzinfo is not None:
+                # Log timestamps are written in local time
+                dt = dt.astimezone().replace(tzinfo=None)
+    except (OverflowError, OSError, ValueError):
+        # e.g. 1e20 or inf, which parse as numbers but are no valid time
+        raise ValueError(f'Invalid timestamp: {value}')
+    # isoformat pads the year to four digits, so timestamps compare correctly as strings
+    return dt.isoformat(sep=' ', timespec='seconds')
+
+
+class LogIndex:
+    """
+    On-disk index of a log file mapping time, logger and line text to byte offsets.
+
+    Lines are indexed by timestamp and logger, plus a trigram full-text index
+    of the whole line, which answers the substring filters of /api/logs for
+    level, server and service names. The text index is a few times the size
+    of the log it covers.
+    """
+
+    def __init__(self, log_path, index_path=None):
+        self.log_path = log_path
+        self.index_path = index_path or f'{log_path}.idx'
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.index_path, timeout=10)
+        conn.executescript(SCHEMA)
+        if self._schema_version(conn) != SCHEMA_VERSION:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Another process may have rebuilt the tables while we waited for the lock
+                if self._schema_version(conn) != SCHEMA_VERSION:
+                    conn.execute('DROP TABLE IF EXISTS lines')
+                    conn.execute('DROP TABLE IF EXISTS line_text')
+                    conn.execute('DELETE FROM meta')
+                    for statement in LINES_SCHEMA.split(';'):
+                        if statement.strip():
+                            conn.execute(statement)
+                    conn.execute("INSERT INTO meta (key, value) VALUES ('schema', ?)", (SCHEMA_VERSION,))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return conn
+
+    def _schema_version(self, conn):
+        row = conn.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+        return row[0] if row else None
+
+    def _head_signature(self, f):
+        f.seek(0)
+        return hashlib.sha1(f.read(HEAD_SIGNATURE_SIZE)).hexdigest()
+
+    def update(self):
+        """
+        Index the lines appended to the log since the last update.
+
+        Only complete lines are indexed; a partially written last line is picked
+        up by the next update. If the log was truncated or replaced, the index is
+        rebuilt from the start of the file.
+
+        Returns:
+            int: Number of newly indexed lines
+        """
+        with self._lock:
+            conn = self._connect()
+            try:
+                return self._update(conn)
+            finally:
+                conn.close()
+
+    def _update(self, conn):
+        meta = dict(conn.execute('SELECT key, value FROM meta').fetchall())
+        indexed_offset = int(meta.get('offset', 0))
+
+        try:
+            f = open(self.log_path, 'rb')
+        except FileNotFoundError:
+            return 0
+
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            signature = self._head_signature(f) if size >= HEAD_SIGNATURE_SIZE else None
+            stored_signature = meta.get('signature')
+
+            if size < indexed_offset or (stored_signature and signature and stored_signature != signature):
+                conn.execute('DELETE FROM lines')
+                conn.execute("INSERT INTO line_text (line_text) VALUES ('delete-all')")
+                indexed_offset = 0
+                stored_signature = None
+
+            if size == indexed_offset:
+                return 0
+
+            f.seek(indexed_offset)
+            position = indexed_offset
+            remainder = b''
+            indexed = 0
+            while f.tell() < size:
+                data = remainder + f.read(min(INDEX_CHUNK_SIZE, size - f.tell()))
+                end = data.rfind(b'\n')
+                if end < 0:
+                    # No complete line yet; keep reading
+                    remainder = data
+                    continue
+
+                rows = []
+                for raw_line in data[:end + 1].split(b'\n')[:-1]:
+                    line = raw_line.decode('utf-8', errors='replace').rstrip('\r')
+                    fields = parse_line(line)
+                    if fields is not None:
+                        rows.append((position, fields[0], fields[2], line))
+                    position += len(raw_line) + 1
+                remainder = data[end + 1:]
+
+                # Commit each chunk, so an interrupted first run keeps its progress
+                with conn:
+                    for offset, ts, logger_name, line in rows:
+                        inserted = conn.execute('INSERT OR IGNORE INTO lines (offset, ts, logger) VALUES (?, ?, ?)',
+                                                (offset, ts, logger_name)).rowcount
+                        # Another process may have indexed the line already; the text index has no OR IGNORE
+                        if inserted:
+                            conn.execute('INSERT INTO line_text (rowid, text) VALUES (?, ?)', (offset, line))
+                    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('offset', ?)", (str(position),))
+                    if signature and not stored_signature:
+                        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('signature', ?)", (signature,))
+                        stored_signature = signature
+                indexed += len(rows)
+            return indexed
+
+    def query(self, limit=100, since=None, until=None, level='', logger='', server='', service='', archive=None):
+        """
+        Get the last log lines in a time range matching the filters.
+
+        Level, server and service match anywhere in the line, exactly as
+        /api/logs filters without a time range. The index selects the lines in
+        the time range that contain every filter term of at least MIN_TEXT_TERM
+        characters, so only candidate lines are read; shorter terms are checked
+        on the lines read. If the live file has fewer than limit matches,
+        archived segments whose time range overlaps the query are decompressed
+        and scanned, newest first.
+
+        Args:
+            limit (int): Maximum number of lines to return
+            since (str): Optional inclusive lower time bound, as formatted by normalize_timestamp
+            until (str): Optional inclusive upper time bound, as formatted by normalize_timestamp
+            level (str): Optional log level that must appear in the line
+            logger (str): Optional logger name
+            server (str): Optional server name that must appear in the line
+            service (str): Optional service name that must appear in the line
+            archive (LogArchive): Optional archive of rotated-out segments
+
+        Returns:
+            list: Matching lines in file order (oldest first)
+        """
+        self.update()
+        matches = log_filter(server, service, level)
+
+        clauses = []
+        params = []
+        if since:
+            clauses.append('ts >= ?')
+            params.append(since)
+        if until:
+            clauses.append('ts <= ?')
+            params.append(until)
+        if logger:
+            clauses.append('logger = ?')
+            params.append(logger)
+        text = text_query(server, service, level.upper())
+        if text:
+            clauses.append('offset IN (SELECT rowid FROM line_text WHERE line_text MATCH ?)')
+            params.append(text)
+
+        sql = 'SELECT offset FROM lines'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY offset DESC'
+
+        lines = []
+        conn = self._connect()
+        try:
+            with open(self.log_path, 'rb') as f:
+                for (offset,) in conn.execute(sql, params):
+                    f.seek(offset)
+                    line = f.readline().decode('utf-8', errors='replace').strip()
+                    if matches(line):
+                        lines.append(line)
+                        if len(lines) >= limit:
+                            break
+        finally:
+            conn.close()
+        lines.reverse()
+
+        if archive is not None and len(lines) < limit:
+            archived = []
+            for segment in archive.segments(since, until):
+                for line in archive.read_lines_reversed(segment):
+                    fields = parse_line(line)
+                    if fields is None or (since and fields[0] < since) or (until and fields[0] > until):
+                        continue
+                    if (logger and fields[2] != logger) or not matches(line):
+                        continue
+                    archived.append(line.strip())
+                    if len(lines) + len(archived) >= limit:
+                        break
+                if len(lines) + len(archived) >= limit:
+                    break
+            archived.reverse()
+            lines = archived + lines
+        return lines
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+import os
+
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
+
+def read_lines_reversed(path, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Yield the lines of a file from last to first, reading backwards in blocks.
+
+    Args:
+        path (str): Path of the file
+        block_size (int): Number of bytes read per step
+
+    Yields:
+        str: Lines without their trailing newline, newest first
+    """
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b''
+
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            lines = (f.read(read_size) + remainder).split(b'\n')
+
+            # The first piece may be the tail of a line that starts in an earlier block
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                if line:
+                    yield line.decode('utf-8', errors='replace').rstrip('\r')
+
+        if remainder:
+            yield remainder.decode('utf-8', errors='replace').rstrip('\r')
+
+
+def log_filter(server='', service='', level=''):
+    """
+    Build a predicate matching log lines the way /api/logs filters them.
+
+    Args:
+        server (str): Optional server name that must appear in the line
+        service (str): Optional service name that must appear in the line
+        level (str): Optional log level that must appear in the line
+
+    Returns:
+        callable: Function taking a line and returning True if it matches
+    """
+    level = level.upper()
+
+    def matches(line):
+        if server and server not in line:
+            return False
+        if service and service not in line:
+            return False
+        if level and level not in line:
+            return False
+        return True
+
+    return matches
+
+
+def tail_matching(path, limit, server='', service='', level='', archive=None):
+    """
+    Get the last lines of a log file that match the filters.
+
+    The file is scanned backwards and the scan stops as soon as limit lines
+    match, so the cost depends on the result size rather than the file size.
+    If the live file runs out first, archived segments are read newest first.
+
+    Args:
+        path (str): Path of the log file
+        limit (int): Maximum number of lines to return
+        server (str): Optional server filter
+        service (str): Optional service filter
+        level (str): Optional level filter
+        archive (LogArchive): Optional archive of rotated-out segments
+
+    Returns:
+        list: Matching lines in file order (oldest first)
+    """
+    matches = log_filter(server, service, level)
+    results = []
+    if limit <= 0:
+        return results
+
+    sources = [read_lines_reversed(path)]
+    if archive is not None:
+        sources.extend(archive.read_lines_reversed(segment) for segment in archive.segments())
+
+    for source in sources:
+        for line in source:
+            if matches(line):
+                results.append(line.strip())
+                if len(results) >= limit:
+                    break
+        if len(results) >= limit:
+            break
+
+    results.reverse()
+    return results
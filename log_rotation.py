@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+import gzip
+import json
+import logging.handlers
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from log_index import parse_line
+
+try:
+    import fcntl
+except ImportError:
+    # No inter-process locking on Windows; only one process may write the log there
+    fcntl = None
+
+# Rotation limits can be tuned per deployment through environment variables
+DEFAULT_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024))
+DEFAULT_MAX_AGE_SECONDS = int(os.getenv('LOG_MAX_AGE_SECONDS', 24 * 3600))
+DEFAULT_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 30))
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+@contextmanager
+def file_lock(path, shared=False):
+    """
+    Hold a lock on a lock file, shared between processes and threads, blocking until it is granted.
+
+    Args:
+        path (str): Lock file, created if missing
+        shared (bool): Take a shared lock, which only excludes exclusive holders
+    """
+    if fcntl is None:
+        yield
+        return
+    # flock locks belong to the open file, so each holder opens its own; closing releases it
+    with open(path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        yield
+
+
+class LogArchive:
+    """Compressed segments rotated out of a log file, described by a JSON manifest of time ranges"""
+
+    def __init__(self, log_path):
+        self.log_path = os.path.abspath(log_path)
+        self.directory = os.path.dirname(self.log_path)
+        self.manifest_path = f'{self.log_path}.manifest.json'
+        self.lock_path = f'{self.manifest_path}.lock'
+        self._lock = threading.Lock()
+
+    def load_manifest(self):
+        """
+        Get the archived segments.
+
+        Returns:
+            list: Segment entries with file, start, end and size, oldest first
+        """
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return []
+
+    def _save_manifest(self, segments):
+        # Caller holds the manifest lock, so the temporary file is never shared
+        temp_path = f'{self.manifest_path}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(segments, f, indent=2)
+        os.replace(temp_path, self.manifest_path)
+
+    def add_segment(self, source_path, start, end, backup_count):
+        """
+        Compress a rotated-out copy of the log into a new segment and prune old segments.
+
+        The manifest is read, changed and written under a lock shared by all
+        processes, so concurrent rotations cannot drop each other's entries.
+
+        Args:
+            source_path (str): Uncompressed copy of the rotated-out lines
+            start (str): Timestamp of the first record in the segment
+            end (str): Timestamp of the last record in the segment
+            backup_count (int): Maximum number of segments to keep
+        """
+        with self._lock, file_lock(self.lock_path):
+            stamp = time.strftime('%Y%m%dT%H%M%S')
+            segment_name = f'{os.path.basename(self.log_path)}.{stamp}.gz'
+            counter = 1
+            while os.path.exists(os.path.join(self.directory, segment_name)):
+                segment_name = f'{os.path.basename(self.log_path)}.{stamp}-{counter}.gz'
+                counter += 1
+
+            with open(source_path, 'rb') as src, gzip.open(os.path.join(self.directory, segment_name), 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            size = os.path.getsize(source_path)
+            os.remove(source_path)
+
+            segments = self.load_manifest()
+            segments.append({'file': segment_name, 'start': start, 'end': end, 'size': size})
+            while backup_count > 0 and len(segments) > backup_count:
+                oldest = segments.pop(0)
+                try:
+                    os.remove(os.path.join(self.directory, oldest['file']))
+                except FileNotFoundError:
+                    pass
+            self._save_manifest(segments)
+
+    def segments(self, since=None, until=None):
+        """
+        Get the segments whose time range overlaps the query, newest first.
+
+        Args:
+            since (str): Optional inclusive lower time bound
+            until (str): Optional inclusive upper time bound
+
+        Returns:
+            list: Matching segment entries
+        """
+        matching = []
+        for segment in reversed(self.load_manifest()):
+            if since and segment.get('end') and segment['end'] < since:
+                continue
+            if until and segment.get('start') and segment['start'] > until:
+                continue
+            matching.append(segment)
+        return matching
+
+    def read_lines_reversed(self, segment):
+        """
+        Decompress a segment and yield its lines from last to first.
+
+        Args:
+            segment (dict): Segment entry from the manifest
+
+        Yields:
+            str: Lines without their trailing newline, newest first
+        """
+        try:
+            with gzip.open(os.path.join(self.directory, segment['file']), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+
+        for line in reversed(data.split(b'\n')):
+            if line:
+                yield line.decode('utf-8', errors='replace').rstrip('\r')
+
+
+def first_record_timestamp(path):
+    """Get the timestamp of the first log record in a file, or None"""
+    try:
+        with open(path, 'r', errors='replace') as f:
+            for line in f:
+                fields = parse_line(line.rstrip('\r\n'))
+                if fields is not None:
+                    return fields[0]
+    except FileNotFoundError:
+        pass
+    return None
+
+
+def record_time_range(path):
+    """
+    Get the earliest and latest record timestamps in a file.
+
+    Several processes append to the log, so records are not strictly in time
+    order and the first and last lines do not necessarily bound the file.
+
+    Returns:
+        tuple: (start, end), both None if the file has no records
+    """
+    start = end = None
+    with open(path, 'r', errors='replace') as f:
+        for line in f:
+            fields = parse_line(line.rstrip('\r\n'))
+            if fields is None:
+                continue
+            if start is None or fields[0] < start:
+                start = fields[0]
+            if end is None or fields[0] > end:
+                end = fields[0]
+    return start, end
+
+
+class SegmentRotatingFileHandler(logging.handlers.BaseRotatingHandler):
+    """
+    File handler that rotates by size or age into gzip segments listed in a manifest.
+
+    Rotation copies the live file into a segment and truncates it in place, so
+    other server processes appending to the same file keep writing to it.
+    Several processes may log to one file: appends take a shared lock and
+    rotation an exclusive one on the same lock file, and whether to rotate is
+    decided again from the file itself once the exclusive lock is held, since
+    another process may have rotated it already. Segment time ranges are the
+    earliest and latest rotated-out records rather than tracked per process.
+    """
+
+    def __init__(self, filename, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE_SECONDS,
+                 backup_count=DEFAULT_BACKUP_COUNT, encoding=None):
+        super().__init__(filename, 'a', encoding=encoding)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.backup_count = backup_count
+        self.archive = LogArchive(self.baseFilename)
+        self.lock_path = f'{self.baseFilename}.lock'
+        self._pending_size = 0
+        self._pending_created = None
+        self.segment_started_at = None
+        self._load_segment_start()
+
+    def _load_segment_start(self):
+        # Age of the live file, from its first record
+        start = first_record_timestamp(self.baseFilename)
+        self.segment_started_at = time.mktime(time.strptime(start, TIMESTAMP_FORMAT)) if start else None
+
+    def shouldRollover(self, record):
+        if self.stream is None:
+            self.stream = self._open()
+
+        msg = f'{self.format(record)}\n'
+        self._pending_size = len(msg)
+        self._pending_created = record.created
+
+        if self.max_bytes > 0:
+            self.stream.seek(0, os.SEEK_END)
+            if self.stream.tell() > 0 and self.stream.tell() + len(msg) >= self.max_bytes:
+                return True
+
+        if self.max_age > 0 and self.segment_started_at is not None:
+            if record.created - self.segment_started_at >= self.max_age:
+                return True
+
+        return False
+
+    def _rotation_due(self):
+        # Caller holds the exclusive lock; checks the shared file, not this process's view of it
+        try:
+            size = os.path.getsize(self.baseFilename)
+        except FileNotFoundError:
+            return False
+        if size == 0:
+            return False
+        if self.max_bytes > 0 and size + self._pending_size >= self.max_bytes:
+            return True
+        if self.max_age > 0 and self.segment_started_at is not None:
+            return self._pending_created - self.segment_started_at >= self.max_age
+        return False
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        with file_lock(self.lock_path):
+            self._load_segment_start()
+            if self._rotation_due():
+                fd, rotated_path = tempfile.mkstemp(dir=os.path.dirname(self.baseFilename),
+                                                    prefix=f'.{os.path.basename(self.baseFilename)}.',
+                                                    suffix='.rotating')
+                os.close(fd)
+                try:
+                    shutil.copyfile(self.baseFilename, rotated_path)
+                    with open(self.baseFilename, 'w'):
+                        pass
+                    start, end = record_time_range(rotated_path)
+                    self.archive.add_segment(rotated_path, start, end, self.backup_count)
+                finally:
+                    if os.path.exists(rotated_path):
+                        os.remove(rotated_path)
+                self.segment_started_at = None
+
+        self.stream = self._open()
+
+    def emit(self, record):
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            # Rotation cannot copy and truncate between another process's appends
+            with file_lock(self.lock_path, shared=True):
+                logging.FileHandler.emit(self, record)
+            if self.segment_started_at is None:
+                self.segment_started_at = record.created
+        except Exception:
+            self.handleError(record)
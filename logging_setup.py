@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+
+from log_rotation import SegmentRotatingFileHandler
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DEFAULT_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+
+_queue_handler = None
+_listener = None
+
+
+class CountingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that never blocks the caller and counts queued and dropped records"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.queued = 0
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Records never leave this process, so skip the copy and full format the
+        # base class does; only merge the arguments before they can change
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        # Called with the handler lock held, so the counters need no extra locking
+        try:
+            self.queue.put_nowait(record)
+            self.queued += 1
+        except queue.Full:
+            self.dropped += 1
+
+
+class DrainingQueueListener(logging.handlers.QueueListener):
+    """Queue listener whose stop() waits for room in a full queue instead of failing"""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+def configure_logging(log_file='server_status.log', level=logging.INFO, queue_size=DEFAULT_QUEUE_SIZE):
+    """
+    Configure root logging so that file and console I/O run on a background thread.
+
+    Records are put on a bounded queue and written by a QueueListener. When the
+    queue is full, records are dropped and counted rather than blocking the request.
+
+    Args:
+        log_file (str): Path of the log file
+        level (int): Root log level
+        queue_size (int): Maximum number of records waiting to be written
+
+    Returns:
+        CountingQueueHandler: The handler installed on the root logger
+    """
+    global _queue_handler, _listener
+    if _queue_handler is not None:
+        return _queue_handler
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    file_handler = SegmentRotatingFileHandler(log_file)
+    file_handler.setFormatter(formatter)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    _queue_handler = CountingQueueHandler(log_queue)
+
+    _listener = DrainingQueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    logging.basicConfig(level=level, handlers=[_queue_handler])
+    return _queue_handler
+
+
+def restart_after_fork():
+    """
+    Give a forked child process its own queue and writer thread.
+
+    The listener thread is not copied by fork, and the inherited queue may
+    have been locked by another thread at that moment, so the child gets a
+    fresh queue feeding a new listener with the same handlers.
+    """
+    global _listener
+    if _queue_handler is None:
+        return
+
+    atexit.unregister(_listener.stop)
+    log_queue = queue.Queue(maxsize=_queue_handler.queue.maxsize)
+    _queue_handler.queue = log_queue
+    _listener = DrainingQueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def logging_stats():
+    """
+    Get counters of the logging pipeline.
+
+    Returns:
+        dict: Records queued and dropped since startup, and records waiting to be written
+    """
+    if _queue_handler is None:
+        return {'queued': 0, 'dropped': 0, 'pending': 0, 'capacity': 0}
+    return {
+        'queued': _queue_handler.queued,
+        'dropped': _queue_handler.dropped,
+        'pending': _queue_handler.queue.qsize(),
+        'capacity': _queue_handler.queue.maxsize
+    }
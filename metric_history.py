@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+import os
+import re
+import threading
+from array import array
+
+# Samples kept per server and metric; 2880 covers two days of one-minute cache refreshes
+DEFAULT_CAPACITY = int(os.getenv('METRIC_HISTORY_SIZE', 2880))
+
+WINDOW_PATTERN = re.compile(r'^(\d+)([smhd]?)$')
+WINDOW_UNITS = {'': 1, 's': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_window(value):
+    """
+    Parse a window such as '90s', '15m', '1h' or '7d' into seconds.
+
+    Args:
+        value (str): Window from a query parameter; a bare number means seconds
+
+    Returns:
+        int: Window length in seconds
+
+    Raises:
+        ValueError: If the window is not recognised
+    """
+    match = WINDOW_PATTERN.match(value.strip().lower())
+    if not match:
+        raise ValueError(f'Invalid window: {value}')
+    return int(match.group(1)) * WINDOW_UNITS[match.group(2)]
+
+
+class RingBuffer:
+    """
+    Bounded ring of (timestamp, value) samples stored in two flat double arrays.
+
+    The arrays grow with the samples until they reach capacity, so servers
+    that were only seen a few times do not hold a full ring each.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.timestamps = array('d')
+        self.values = array('d')
+        self.start = 0
+        self.count = 0
+
+    def append(self, timestamp, value):
+        """Add a sample, overwriting the oldest one when the buffer is full"""
+        if self.count < self.capacity:
+            # Until the ring is full the oldest sample stays at index 0
+            self.timestamps.append(timestamp)
+            self.values.append(value)
+            self.count += 1
+            return
+        self.timestamps[self.start] = timestamp
+        self.values[self.start] = value
+        self.start = (self.start + 1) % self.capacity
+
+    def since(self, min_timestamp):
+        """
+        Get the samples at or after a timestamp, oldest first.
+
+        Args:
+            min_timestamp (float): Lower bound in epoch seconds
+
+        Returns:
+            tuple: (timestamps, values) lists
+        """
+        # Samples are appended in time order, so binary search the logical sequence
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.timestamps[(self.start + middle) % self.capacity] < min_timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        first = low
+        timestamps = []
+        values = []
+        for i in range(first, self.count):
+            index = (self.start + i) % self.capacity
+            timestamps.append(self.timestamps[index])
+            values.append(self.values[index])
+        return timestamps, values
+
+
+class MetricHistory:
+    """Bounded per-server, per-metric sample history"""
+
+    def __init__(self, metrics, capacity=DEFAULT_CAPACITY):
+        self.metrics = tuple(metrics)
+        self.capacity = capacity
+        self._buffers = {}
+        self._lock = threading.Lock()
+
+    def record(self, server_name, sample, timestamp):
+        """
+        Record the metric values of a server.
+
+        Args:
+            server_name (str): Name of the server
+            sample (dict): Server dict or other mapping holding metric values
+            timestamp (float): Sample time in epoch seconds
+        """
+        with self._lock:
+            for metric in self.metrics:
+                value = sample.get(metric)
+                if value is None:
+                    continue
+                buffer = self._buffers.get((server_name, metric))
+                if buffer is None:
+                    buffer = self._buffers[(server_name, metric)] = RingBuffer(self.capacity)
+                buffer.append(timestamp, value)
+
+    def query(self, server_name, metric, since):
+        """
+        Get the samples of one server metric at or after a timestamp.
+
+        Args:
+            server_name (str): Name of the server
+            metric (str): Metric name
+            since (float): Lower bound in epoch seconds
+
+        Returns:
+            tuple: (timestamps, values) lists, oldest first
+        """
+        with self._lock:
+            buffer = self._buffers.get((server_name, metric))
+            if buffer is None:
+                return [], []
+            return buffer.since(since)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+import concurrent.futures
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import spawn
+
+from werkzeug.security import check_password_hash
+
+# Worker processes hashing passwords on the whole host, and how many checks may be running or waiting for one
+HOST_WORKERS = int(os.getenv('PASSWORD_POOL_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+DEFAULT_MAX_PENDING = int(os.getenv('PASSWORD_POOL_MAX_PENDING', 16))
+DEFAULT_CHECK_TIMEOUT = float(os.getenv('PASSWORD_CHECK_TIMEOUT', 10))
+
+
+# Set while this module starts worker processes, see _preparation_data
+_starting_workers = threading.local()
+
+
+def _preparation_data(name, _get_preparation_data=spawn.get_preparation_data):
+    """
+    Leave the parent's __main__ out of what a new password worker sets itself up from.
+
+    Forkserver and spawn workers otherwise import the parent's entry point again before they
+    run anything, which repeats its import-time work (logging setup, seeding users, hashing
+    the default passwords) or starts a second server when it has no __main__ guard. Workers
+    only run check_password_hash, so they need werkzeug and nothing from the entry point.
+
+    Args:
+        name (str): Name of the process being started
+
+    Returns:
+        dict: Preparation data without the main module entries
+    """
+    data = _get_preparation_data(name)
+    if getattr(_starting_workers, 'active', False):
+        data.pop('init_main_from_name', None)
+        data.pop('init_main_from_path', None)
+    return data
+
+
+spawn.get_preparation_data = _preparation_data
+
+
+class PasswordPoolSaturated(Exception):
+    """Raised when a password check cannot be started or finished in time"""
+
+
+def default_workers():
+    """
+    Get this process's share of the host's password hashing workers.
+
+    Each web server process has its own pool, so HOST_WORKERS is divided
+    between the WEB_CONCURRENCY processes that run_production starts.
+
+    Returns:
+        int: Number of worker processes, at least one
+    """
+    web_workers = max(1, int(os.getenv('WEB_CONCURRENCY', 1)))
+    return max(1, HOST_WORKERS // web_workers)
+
+
+class PasswordCheckPool:
+    """
+    Bounded process pool for check_password_hash.
+
+    PBKDF2 is deliberately slow, so login bursts would otherwise take CPU away
+    from every other request in the process. At most max_workers hashes run at
+    once, and when max_pending checks are already running or queued, new ones
+    are rejected immediately instead of waiting. Without max_workers the pool
+    takes its share of the host from default_workers() when it starts.
+    """
+
+    def __init__(self, max_workers=None, max_pending=DEFAULT_MAX_PENDING, timeout=DEFAULT_CHECK_TIMEOUT):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.check_seconds = 0.0
+        self._pending = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Caller holds self._lock; workers are started on first use
+        if self._executor is None:
+            # Forking a process that runs request and background threads can copy a lock
+            # some other thread holds, so workers start from a clean forkserver or spawn.
+            # Neither re-imports __main__ for our workers (see _preparation_data), so anything
+            # submitted here must be importable from a module other than the entry point
+            methods = multiprocessing.get_all_start_methods()
+            if 'forkserver' in methods:
+                context = multiprocessing.get_context('forkserver')
+                context.set_forkserver_preload(['werkzeug.security'])
+            else:
+                context = multiprocessing.get_context('spawn')
+            self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self._workers(), mp_context=context)
+        return self._executor
+
+    def _submit(self, pwhash, password):
+        # Caller holds self._lock; submit starts any workers the pool still needs in this thread
+        _starting_workers.active = True
+        try:
+            return self._get_executor().submit(check_password_hash, pwhash, password)
+        finally:
+            _starting_workers.active = False
+
+    def _workers(self):
+        return self.max_workers if self.max_workers is not None else default_workers()
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def check(self, pwhash, password):
+        """
+        Check a password against a hash in a worker process.
+
+        Args:
+            pwhash (str): Hash from generate_password_hash
+            password (str): Password to check
+
+        Returns:
+            bool: True if the password matches
+
+        Raises:
+            PasswordPoolSaturated: If too many checks are pending or the check timed out
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordPoolSaturated('Too many password checks in progress')
+            try:
+                future = self._submit(pwhash, password)
+            except BrokenProcessPool:
+                # A worker died; start a fresh pool for this and later checks
+                self._executor = None
+                future = self._submit(pwhash, password)
+            self._pending += 1
+        # The slot is only freed when the hash finishes, even if the caller stopped waiting
+        future.add_done_callback(self._release)
+
+        start = time.perf_counter()
+        try:
+            result = future.result(timeout=self.timeout)
+        except concurrent.futures.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise PasswordPoolSaturated('Password check timed out')
+        except BrokenProcessPool:
+            with self._lock:
+                self._executor = None
+            raise PasswordPoolSaturated('Password check worker died')
+        with self._lock:
+            self.completed += 1
+            self.check_seconds += time.perf_counter() - start
+        return result
+
+    def stats(self):
+        """
+        Get pool counters.
+
+        Returns:
+            dict: Pool size and limit, checks pending, and checks completed, rejected and timed out since startup
+        """
+        with self._lock:
+            return {
+                'workers': self._workers(),
+                'max_pending': self.max_pending,
+                'pending': self._pending,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+                'avg_check_ms': round(self.check_seconds / self.completed * 1000, 3) if self.completed else 0.0
+            }
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+
+# Shared pool used by the login endpoints
+pool = PasswordCheckPool()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+import logging
+import os
+
+from logging_setup import restart_after_fork
+
+logger = logging.getLogger(__name__)
+
+# Gunicorn's usual sizing: two workers per core plus one
+DEFAULT_WORKERS = int(os.getenv('WEB_CONCURRENCY', (os.cpu_count() or 1) * 2 + 1))
+DEFAULT_THREADS = int(os.getenv('WEB_THREADS', 4))
+DEFAULT_TIMEOUT = int(os.getenv('WEB_TIMEOUT', 60))
+
+
+def run_production(app, port, host='0.0.0.0', workers=DEFAULT_WORKERS, threads=DEFAULT_THREADS,
+                   on_worker_start=None):
+    """
+    Serve a WSGI app with gunicorn worker processes instead of the development server.
+
+    Each worker is a forked copy of this process with its own threads, so
+    in-memory state such as caches is per worker. Background work that must
+    run in every worker, such as periodic refreshes, belongs in on_worker_start.
+
+    Args:
+        app: WSGI application, e.g. a Flask app (Socket.IO apps are wrapped by SocketIO already)
+        port (int): Port to listen on
+        host (str): Interface to listen on
+        workers (int): Number of worker processes
+        threads (int): Threads per worker, each serving one request or WebSocket at a time
+        on_worker_start (callable): Optional function called in each worker after it starts
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise SystemExit('Production mode needs gunicorn: pip install gunicorn')
+
+    # Per-process pools, such as the password check pool, split the host between the workers
+    os.environ['WEB_CONCURRENCY'] = str(workers)
+
+    def post_fork(server, worker):
+        # The logging thread of the parent does not exist in the worker
+        restart_after_fork()
+        if on_worker_start is not None:
+            on_worker_start()
+
+    options = {
+        'bind': f'{host}:{port}',
+        'workers': workers,
+        'threads': threads,
+        'worker_class': 'gthread',
+        'timeout': DEFAULT_TIMEOUT,
+        'preload_app': True,
+        'post_fork': post_fork
+    }
+
+    class StandaloneApplication(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    logger.info(f"Starting {workers} worker(s) with {threads} thread(s) each on {host}:{port}")
+    StandaloneApplication().run()
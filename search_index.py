@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+import bisect
+import ipaddress
+import threading
+from collections import defaultdict
+
+# Server fields matched by the search filter
+SEARCH_FIELDS = ('name', 'ip', 'location')
+
+# Longest n-gram kept in the index; longer terms intersect their n-grams and are verified
+NGRAM_SIZE = 3
+
+
+def ngrams(text):
+    """Get every substring of text up to NGRAM_SIZE characters long"""
+    return {
+        text[start:start + size]
+        for size in range(1, NGRAM_SIZE + 1)
+        for start in range(len(text) - size + 1)
+    }
+
+
+def parse_cidr(cidr):
+    """
+    Parse a CIDR range such as 172.16.1.0/24.
+
+    Raises:
+        ValueError: If cidr is not a valid network
+    """
+    try:
+        return ipaddress.ip_network(cidr.strip(), strict=False)
+    except ValueError:
+        raise ValueError(f'Invalid CIDR range: {cidr}')
+
+
+class SearchIndex:
+    """
+    N-gram index over server name, IP and location, plus a sorted integer IP index for CIDR ranges.
+
+    A search term of up to NGRAM_SIZE characters is a single posting lookup;
+    longer terms intersect the postings of their n-grams and check the few
+    remaining candidates, so the cost depends on the matches rather than on
+    the fleet size. update() only re-indexes servers whose searchable fields
+    changed since the previous fleet.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._texts = {}
+        self._postings = defaultdict(set)
+        self._positions = {}
+        self._servers = []
+        self._ips = []
+
+    def _text(self, server):
+        return tuple(str(server.get(field) or '').lower() for field in SEARCH_FIELDS)
+
+    def update(self, servers):
+        """
+        Index a new fleet, re-indexing only servers that were added, removed or whose searchable fields changed.
+
+        Args:
+            servers (list): Server dicts in fleet order
+        """
+        texts = {server.get('name'): self._text(server) for server in servers}
+        ips = []
+        for position, server in enumerate(servers):
+            try:
+                address = ipaddress.ip_address(str(server.get('ip') or '').strip())
+            except ValueError:
+                continue
+            ips.append((address.version, int(address), position))
+        ips.sort()
+
+        with self._lock:
+            for name, text in self._texts.items():
+                if texts.get(name) != text:
+                    for gram in set().union(*(ngrams(value) for value in text)):
+                        postings = self._postings[gram]
+                        postings.discard(name)
+                        if not postings:
+                            del self._postings[gram]
+            for name, text in texts.items():
+                if self._texts.get(name) != text:
+                    for gram in set().union(*(ngrams(value) for value in text)):
+                        self._postings[gram].add(name)
+            self._texts = texts
+            self._positions = {server.get('name'): position for position, server in enumerate(servers)}
+            self._servers = list(servers)
+            self._ips = ips
+
+    def _match_names(self, term):
+        # Caller holds the lock
+        if len(term) <= NGRAM_SIZE:
+            return set(self._postings.get(term, ()))
+        grams = sorted((term[start:start + NGRAM_SIZE] for start in range(len(term) - NGRAM_SIZE + 1)),
+                       key=lambda gram: len(self._postings.get(gram, ())))
+        candidates = set(self._postings.get(grams[0], ()))
+        for gram in grams[1:]:
+            if not candidates:
+                break
+            candidates &= self._postings.get(gram, set())
+        return {name for name in candidates if any(term in value for value in self._texts[name])}
+
+    def _match_cidr(self, network):
+        # Caller holds the lock; the IP index is sorted by (version, address)
+        low = bisect.bisect_left(self._ips, (network.version, int(network.network_address), -1))
+        high = bisect.bisect_right(self._ips, (network.version, int(network.broadcast_address), len(self._ips)))
+        return {position for _, _, position in self._ips[low:high]}
+
+    def match(self, term='', cidr=''):
+        """
+        Get the fleet positions of the servers matching a search term and a CIDR range.
+
+        Args:
+            term (str): Case-insensitive substring of the name, IP or location; empty matches all
+            cidr (str): CIDR range the server IP must be in, e.g. 172.16.1.0/24; empty matches all
+
+        Returns:
+            set or None: Positions in the list given to update(), or None if neither filter is given
+
+        Raises:
+            ValueError: If cidr is not a valid network
+        """
+        network = parse_cidr(cidr) if cidr else None
+        term = term.lower()
+        if not term and network is None:
+            return None
+
+        with self._lock:
+            positions = None
+            if term:
+                positions = {self._positions[name] for name in self._match_names(term)}
+            if network is not None:
+                in_range = self._match_cidr(network)
+                positions = in_range if positions is None else positions & in_range
+            return positions
+
+    def search(self, term='', cidr=''):
+        """
+        Get the servers matching a search term and a CIDR range, in fleet order.
+
+        Returns:
+            list or None: Matching server dicts, or None if neither filter is given
+
+        Raises:
+            ValueError: If cidr is not a valid network
+        """
+        with self._lock:
+            positions = self.match(term, cidr)
+            if positions is None:
+                return None
+            return [self._servers[position] for position in sorted(positions)]
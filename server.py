@@ -1,12 +1,13 @@
 from flask import Flask, jsonify, request, make_response
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
-import winrm
 import requests
 import secrets
 import os
 import dotenv
 import json
+import logging
+import sqlite3
 import time
 import sys
 from pathlib import Path
@@ -14,10 +15,16 @@ from pathlib import Path
 # Add parent directory to path to import port_utils
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from port_utils import find_free_port, save_port
+from winrm_pool import pool as winrm_pool
+import json_provider
+from json_files import CachedJSONFile
+from inventory_store import InventoryStore
 
 # Load environment variables from .env file
 dotenv.load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Create data directory if it doesn't exist
 data_dir = Path('data')
 data_dir.mkdir(exist_ok=True)
@@ -25,10 +32,19 @@ data_dir.mkdir(exist_ok=True)
 # Path to server data file
 SERVERS_FILE = data_dir / 'servers_data.json'
 CONFIG_FILE = data_dir / 'config_data.json'
+INVENTORY_DB = data_dir / 'inventory.db'
+
+# Page size of /api/servers when only a cursor is given
+DEFAULT_PAGE_SIZE = int(os.getenv('INVENTORY_PAGE_SIZE', 100))
+
+# Parsed data files, re-read only when their mtime or size changes
+servers_file = CachedJSONFile(SERVERS_FILE)
+config_file = CachedJSONFile(CONFIG_FILE)
 
 app = Flask(__name__)
+json_provider.init_app(app)
 CORS(app)
-socketio = SocketIO(app, cors_allowed_origins=os.getenv('CORS_ALLOWED_ORIGINS', '*'))
+socketio = SocketIO(app, cors_allowed_origins=os.getenv('CORS_ALLOWED_ORIGINS', '*'), json=json_provider)
 
 # Basic Authentication Mechanism
 authorized_tokens = set()
@@ -75,12 +91,12 @@ def broadcast_update():
 
 def load_servers_data():
     """Load servers data from file or return default data if file doesn't exist"""
-    if SERVERS_FILE.exists():
-        try:
-            with open(SERVERS_FILE, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError) as e:
-            print(f"Error loading servers data: {e}")
+    try:
+        servers = servers_file.load()
+        if servers is not None:
+            return servers
+    except (json.JSONDecodeError, IOError) as e:
+        logger.error(f"Error loading servers data: {e}")
     
     # Default server data if file doesn't exist or is invalid
     return [
@@ -124,23 +140,22 @@ def load_servers_data():
     ]
 
 def save_servers_data(servers):
-    """Save servers data to file"""
+    """Save servers data to the inventory store"""
     try:
-        with open(SERVERS_FILE, 'w') as f:
-            json.dump(servers, f, indent=2)
+        inventory.replace_all(servers)
         return True
-    except IOError as e:
-        print(f"Error saving servers data: {e}")
+    except sqlite3.Error as e:
+        logger.error(f"Error saving servers data: {e}")
         return False
 
 def load_config_data():
     """Load configuration data from file or return default data if file doesn't exist"""
-    if CONFIG_FILE.exists():
-        try:
-            with open(CONFIG_FILE, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError) as e:
-            print(f"Error loading config data: {e}")
+    try:
+        config = config_file.load()
+        if config is not None:
+            return config
+    except (json.JSONDecodeError, IOError) as e:
+        logger.error(f"Error loading config data: {e}")
     
     # Default config data if file doesn't exist or is invalid
     return {
@@ -153,28 +168,57 @@ def load_config_data():
 def save_config_data(config):
     """Save configuration data to file"""
     try:
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(config, f, indent=2)
+        config_file.save(config)
         return True
     except IOError as e:
-        print(f"Error saving config data: {e}")
+        logger.error(f"Error saving config data: {e}")
         return False
 
+# Indexed inventory, seeded from servers_data.json (or the default servers) when empty
+inventory = InventoryStore(str(INVENTORY_DB))
+if inventory.is_empty():
+    inventory.replace_all(load_servers_data())
+
+def validate_server(server):
+    """
+    Check that a server dict can be stored in the inventory.
+
+    Args:
+        server: Decoded request body for one server
+
+    Returns:
+        str or None: Description of the first problem found, or None if the server is valid
+    """
+    if not isinstance(server, dict):
+        return 'Server must be an object'
+    if not isinstance(server.get('name'), str) or not server['name']:
+        return 'Server name must be a non-empty string'
+    name = server['name']
+    if server.get('ip') is not None and not isinstance(server['ip'], str):
+        return f'Server {name}: ip must be a string'
+    services = server.get('services', [])
+    if not isinstance(services, list):
+        return f'Server {name}: services must be a list'
+    for service in services:
+        if not isinstance(service, dict) or not isinstance(service.get('name'), str) or not service['name']:
+            return f'Server {name}: every service must be an object with a non-empty name'
+        if service.get('status') is not None and not isinstance(service['status'], str):
+            return f'Server {name}: service status must be a string'
+    if server.get('specs') is not None and not isinstance(server['specs'], dict):
+        return f'Server {name}: specs must be an object'
+    return None
+
 def fetch_live_server_status():
     """Fetch live server status or use stored data"""
-    servers = load_servers_data()
+    servers = inventory.list_servers()
     
     # In a real implementation, you would update the status of each server
     # by querying them. For now, we'll just return the stored data.
     return servers
 
-def execute_winrm_command(server_ip, command):
-    winrm_port = os.getenv('WINRM_PORT', 5985)
-    winrm_username = os.getenv('WINRM_USERNAME', 'username')
-    winrm_password = os.getenv('WINRM_PASSWORD', 'password')
-    session = winrm.Session(f'http://{server_ip}:{winrm_port}/wsman', auth=(winrm_username, winrm_password))
-    response = session.run_cmd(command)
-    return response.status_code, response.std_out.decode(), response.std_err.decode()
+def execute_winrm_command(server_ip, command, idempotent=False):
+    """Run a command on a server over its pooled WinRM session and shell; only idempotent commands are retried after a possible start"""
+    return winrm_pool.run_cmd(server_ip, command, idempotent=idempotent)
 
 @app.route('/api/services/start', methods=['POST'])
 def start_service():
@@ -206,7 +250,7 @@ def get_service_status():
     server_ip = data.get('ip')
     service_name = data.get('service')
     command = f'sc query {service_name}'
-    status_code, std_out, std_err = execute_winrm_command(server_ip, command)
+    status_code, std_out, std_err = execute_winrm_command(server_ip, command, idempotent=True)
     if status_code == 0:
         return jsonify({'status': 'Service status retrieved', 'output': std_out})
     else:
@@ -217,7 +261,7 @@ def get_server_status():
     data = request.get_json()
     server_ip = data.get('ip')
     command = 'systeminfo'
-    status_code, std_out, std_err = execute_winrm_command(server_ip, command)
+    status_code, std_out, std_err = execute_winrm_command(server_ip, command, idempotent=True)
     if status_code == 0:
         return jsonify({'status': 'Server status retrieved', 'output': std_out})
     else:
@@ -230,7 +274,7 @@ def get_winrm_status():
         return jsonify({'status': 'Failed', 'error': 'Server IP is required'}), 400
     try:
         # Attempt to execute a simple command to check WINRM connection
-        status_code, _, _ = execute_winrm_command(server_ip, 'echo WINRM Test')
+        status_code, _, _ = execute_winrm_command(server_ip, 'echo WINRM Test', idempotent=True)
         if status_code == 0:
             return jsonify({'status': 'Connected'})
         else:
@@ -240,7 +284,61 @@ def get_winrm_status():
 
 @app.route('/api/servers', methods=['GET'])
 def get_servers():
-    return jsonify(fetch_live_server_status())
+    """Get all servers, or one page of them ordered by name when limit or cursor is given"""
+    if 'limit' not in request.args and 'cursor' not in request.args:
+        # Legacy response: the whole inventory as a list
+        return jsonify(fetch_live_server_status())
+    
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+        servers, next_cursor = inventory.page(
+            limit,
+            cursor=request.args.get('cursor'),
+            status=request.args.get('status', ''),
+            ip=request.args.get('ip', '')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'servers': servers, 'next_cursor': next_cursor})
+
+@app.route('/api/servers/<server_name>', methods=['GET'])
+def get_server(server_name):
+    """Get one server from the inventory"""
+    server = inventory.get_server(server_name)
+    if server is None:
+        return jsonify({'error': 'Server not found'}), 404
+    return jsonify(server)
+
+@app.route('/api/servers/<server_name>', methods=['PUT'])
+def save_server(server_name):
+    """Add or replace one server without rewriting the rest of the inventory"""
+    data = request.get_json()
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Invalid server data format'}), 400
+    
+    data['name'] = server_name
+    error = validate_server(data)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    try:
+        inventory.upsert_server(data)
+    except sqlite3.Error as e:
+        logger.error(f"Error saving server {server_name}: {e}")
+        return jsonify({'error': 'Failed to save server data'}), 500
+    
+    socketio.emit('server-change', {'server': server_name, 'change': data})
+    return jsonify({'message': f'Server {server_name} saved successfully'})
+
+@app.route('/api/servers/<server_name>', methods=['DELETE'])
+def delete_server(server_name):
+    """Remove one server from the inventory"""
+    if not inventory.delete_server(server_name):
+        return jsonify({'error': 'Server not found'}), 404
+    
+    socketio.emit('server-change', {'server': server_name, 'removed': True})
+    return jsonify({'message': f'Server {server_name} deleted successfully'})
 
 @app.route('/api/servers', methods=['POST'])
 def save_servers():
@@ -248,6 +346,12 @@ def save_servers():
     data = request.get_json()
     if not isinstance(data, list):
         return jsonify({'error': 'Invalid server data format'}), 400
+    for server in data:
+        error = validate_server(server)
+        if error:
+            return jsonify({'error': error}), 400
+    if len({server['name'] for server in data}) != len(data):
+        return jsonify({'error': 'Server names must be unique'}), 400
     
     if save_servers_data(data):
         # Broadcast the update to all connected clients
@@ -276,14 +380,13 @@ def save_config():
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
     """Get server statistics"""
-    servers = fetch_live_server_status()
-    
-    # Calculate statistics
-    total_servers = len(servers)
-    total_services = sum(len(server.get('services', [])) for server in servers)
-    online_services = sum(1 for server in servers for service in server.get('services', []) if service.get('status') == 'online')
-    warning_services = sum(1 for server in servers for service in server.get('services', []) if service.get('status') == 'warning')
-    offline_services = sum(1 for server in servers for service in server.get('services', []) if service.get('status') == 'offline')
+    # Read the running server and service status counts kept by the inventory store
+    stats = inventory.stats()
+    total_servers = stats['total_servers']
+    total_services = stats['total_services']
+    online_services = stats['online_services']
+    warning_services = stats['warning_services']
+    offline_services = stats['offline_services']
     
     # Calculate uptime percentage
     uptime_percentage = round((online_services / total_services) * 100) if total_services > 0 else 0
@@ -2,18 +2,21 @@ from flask import Flask, jsonify, request, make_response
 from flask_cors import CORS
 # We'll remove emit from the import to avoid the corruption issue:
 from flask_socketio import SocketIO
-import winrm
 import requests
 import secrets
 import os
 import dotenv
+from fleet_poller import FleetPoller
+from winrm_pool import pool as winrm_pool
+import json_provider
 
 # Load environment variables from .env file
 dotenv.load_dotenv()
 
 app = Flask(__name__)
+json_provider.init_app(app)
 CORS(app)
-socketio = SocketIO(app, cors_allowed_origins=os.getenv('CORS_ALLOWED_ORIGINS', '*'))
+socketio = SocketIO(app, cors_allowed_origins=os.getenv('CORS_ALLOWED_ORIGINS', '*'), json=json_provider)
 
 # Basic Authentication Mechanism
 authorized_tokens = set()
@@ -59,41 +62,51 @@ def broadcast_update():
     socketio.emit('server-update', data)
     return jsonify({'message': 'Real-time update broadcast'})
 
+INVENTORY = [
+    {"name": "VXSQL1", "ip": "172.16.1.150"},
+    {"name": "VXDIRSRV", "ip": "172.16.1.151"},
+    {"name": "VXOADMIN", "ip": "172.16.1.160"},
+    {"name": "VXSERVNO", "ip": "172.16.1.27"},
+    {"name": "VXCATI1", "ip": "172.16.1.156"},
+    {"name": "VXCATI2", "ip": "172.16.1.157"},
+    {"name": "VXREPORT", "ip": "172.16.1.153"}
+]
+
+# Shared poller so worker threads and their keep-alive sessions survive between cycles
+poller = FleetPoller()
+
+def fetch_server_status(server, session, timeout):
+    """Query the status endpoint of a single server"""
+    try:
+        response = session.get(f"http://{server['ip']}/status", timeout=timeout)
+        server_status = response.json()
+        return {
+            "name": server["name"],
+            "ip": server["ip"],
+            "services": server_status.get("services", [])
+        }
+    except (requests.RequestException, ValueError):
+        return {
+            "name": server["name"],
+            "ip": server["ip"],
+            "services": [{"name": "Unknown", "status": "offline"}]
+        }
+
+def missed_server_status(server):
+    """Placeholder for a server that did not answer before the cycle deadline"""
+    return {
+        "name": server["name"],
+        "ip": server["ip"],
+        "services": [{"name": "Unknown", "status": "warning"}],
+        "timed_out": True
+    }
+
 def fetch_live_server_status():
-    servers = [
-        {"name": "VXSQL1", "ip": "172.16.1.150"},
-        {"name": "VXDIRSRV", "ip": "172.16.1.151"},
-        {"name": "VXOADMIN", "ip": "172.16.1.160"},
-        {"name": "VXSERVNO", "ip": "172.16.1.27"},
-        {"name": "VXCATI1", "ip": "172.16.1.156"},
-        {"name": "VXCATI2", "ip": "172.16.1.157"},
-        {"name": "VXREPORT", "ip": "172.16.1.153"}
-    ]
-    live_status = []
-    for server in servers:
-        try:
-            response = requests.get(f"http://{server['ip']}/status", timeout=5)
-            server_status = response.json()
-            live_status.append({
-                "name": server["name"],
-                "ip": server["ip"],
-                "services": server_status.get("services", [])
-            })
-        except requests.RequestException:
-            live_status.append({
-                "name": server["name"],
-                "ip": server["ip"],
-                "services": [{"name": "Unknown", "status": "offline"}]
-            })
-    return live_status
-
-def execute_winrm_command(server_ip, command):
-    winrm_port = os.getenv('WINRM_PORT', 5985)
-    winrm_username = os.getenv('WINRM_USERNAME', 'username')
-    winrm_password = os.getenv('WINRM_PASSWORD', 'password')
-    session = winrm.Session(f'http://{server_ip}:{winrm_port}/wsman', auth=(winrm_username, winrm_password))
-    response = session.run_cmd(command)
-    return response.status_code, response.std_out.decode(), response.std_err.decode()
+    return poller.poll(INVENTORY, fetch_server_status, missed_server_status)
+
+def execute_winrm_command(server_ip, command, idempotent=False):
+    """Run a command on a server over its pooled WinRM session and shell; only idempotent commands are retried after a possible start"""
+    return winrm_pool.run_cmd(server_ip, command, idempotent=idempotent)
 
 @app.route('/api/services/start', methods=['POST'])
 def start_service():
@@ -125,7 +138,7 @@ def get_service_status():
     server_ip = data.get('ip')
     service_name = data.get('service')
     command = f'sc query {service_name}'
-    status_code, std_out, std_err = execute_winrm_command(server_ip, command)
+    status_code, std_out, std_err = execute_winrm_command(server_ip, command, idempotent=True)
     if status_code == 0:
         return jsonify({'status': 'Service status retrieved', 'output': std_out})
     else:
@@ -136,7 +149,7 @@ def get_server_status():
     data = request.get_json()
     server_ip = data.get('ip')
     command = 'systeminfo'
-    status_code, std_out, std_err = execute_winrm_command(server_ip, command)
+    status_code, std_out, std_err = execute_winrm_command(server_ip, command, idempotent=True)
     if status_code == 0:
         return jsonify({'status': 'Server status retrieved', 'output': std_out})
     else:
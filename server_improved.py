@@ -1,6 +1,6 @@
 from flask import Flask, jsonify, request, make_response
 from flask_cors import CORS
-from flask_socketio import SocketIO
+from flask_socketio import SocketIO, join_room, leave_room
 import requests
 import secrets
 import jwt
@@ -12,7 +12,7 @@ import time
 import random
 import dotenv
 from functools import wraps
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import generate_password_hash
 from werkzeug.serving import WSGIRequestHandler
 import sys
 from datetime import datetime, timedelta
@@ -20,19 +20,25 @@ from datetime import datetime, timedelta
 # Add parent directory to path to import port_utils
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from port_utils import find_free_port, save_port
+from fleet_store import FleetStore, METRICS
+from fleet_delta import DeltaBroadcaster
+from metric_history import MetricHistory, parse_window
+from log_rotation import LogArchive
+from logging_setup import configure_logging, logging_stats
+from log_reader import tail_matching
+from log_index import LogIndex, normalize_timestamp
+from http_cache import ResponseCache, cached_json_response, not_modified, with_etag
+from fleet_query import parse_fleet_query, run_fleet_query
+from search_index import parse_cidr
+import json_provider
+from token_cache import TokenCache
+from password_pool import pool as password_pool, PasswordPoolSaturated
 
 # Load environment variables from .env file
 dotenv.load_dotenv()
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("server_status.log"),
-        logging.StreamHandler()
-    ]
-)
+# Set up logging; file and console output are written by a background thread
+configure_logging("server_status.log")
 logger = logging.getLogger(__name__)
 
 # Get CORS allowed origins from environment variable or use default
@@ -41,6 +47,7 @@ cors_origins_list = cors_origins.split(',')
 
 # Configure Flask with larger header size limit
 app = Flask(__name__)
+json_provider.init_app(app)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max size
 app.config['MAX_COOKIE_SIZE'] = 16 * 1024  # 16KB max cookie size
 
@@ -51,7 +58,9 @@ if hasattr(WSGIRequestHandler, 'header_size_limit'):
     WSGIRequestHandler.header_size_limit = 32 * 1024  # 32KB max header size
 
 # Configure CORS
-CORS(app, resources={r"/api/*": {"origins": cors_origins_list}}, supports_credentials=True)
+# Browsers reuse a preflight result for max_age seconds instead of repeating it per request
+CORS(app, resources={r"/api/*": {"origins": cors_origins_list}}, supports_credentials=True,
+     max_age=int(os.getenv('CORS_MAX_AGE', 600)))
 
 # Configure Socket.IO with compatible options
 socketio = SocketIO(
@@ -62,6 +71,7 @@ socketio = SocketIO(
     ping_timeout=60,
     ping_interval=25,
     max_http_buffer_size=1e8,  # 100MB
+    json=json_provider,        # Encode event payloads with the same backend as jsonify
     # Only use options that are compatible with the installed version
     async_mode='threading'     # Use threading mode for better performance
 )
@@ -95,6 +105,52 @@ users = {
 # Server status history for monitoring
 server_status_history = {}
 
+# Indexed view of cache['servers'] for O(1) lookups
+fleet = FleetStore()
+
+# Encoded /api/servers bodies per query, dropped whenever the fleet version changes
+response_cache = ResponseCache()
+
+# Bounded CPU, memory and disk history per server
+metric_history = MetricHistory(METRICS)
+
+# Socket.IO room for clients that follow the whole fleet
+FLEET_ROOM = 'fleet'
+
+def server_room(server_name):
+    """Socket.IO room for clients that follow a single server"""
+    return f'server:{server_name}'
+
+def emit_delta(delta):
+    """Send a fleet delta to fleet subscribers and each server's change to its own room"""
+    socketio.emit('server-delta', delta, to=FLEET_ROOM)
+    for change in delta['changed']:
+        socketio.emit('server-change', {
+            'server': change['name'],
+            'version': delta['versions'][change['name']],
+            'change': change,
+            'timestamp': delta['timestamp']
+        }, to=server_room(change['name']))
+    for server_name in delta['removed']:
+        socketio.emit('server-change', {
+            'server': server_name,
+            'version': delta['versions'][server_name],
+            'removed': True,
+            'timestamp': delta['timestamp']
+        }, to=server_room(server_name))
+
+# Sequenced deltas of the fleet for Socket.IO clients, emitted in seq order
+broadcaster = DeltaBroadcaster(emit_delta)
+
+# Sidecar index of server_status.log for time-range log queries
+log_index = LogIndex("server_status.log")
+
+# Compressed segments rotated out of server_status.log
+log_archive = LogArchive("server_status.log")
+
+# Claims of already verified tokens, so repeat requests skip the HMAC check
+token_cache = TokenCache()
+
 # JWT Authentication
 def token_required(f):
     @wraps(f)
@@ -112,7 +168,7 @@ def token_required(f):
             return jsonify({'error': 'Token is missing'}), 401
             
         try:
-            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=["HS256"])
+            data = token_cache.verify(token, app.config['SECRET_KEY'])
             current_user = data['username']
         except jwt.ExpiredSignatureError:
             return jsonify({'error': 'Token has expired'}), 401
@@ -142,7 +198,15 @@ def login():
             logger.warning(f"Login attempt with unknown username: {username}")
             return jsonify({'message': 'Invalid credentials'}), 401
             
-        if check_password_hash(users[username]['password'], password):
+        try:
+            password_valid = password_pool.check(users[username]['password'], password)
+        except PasswordPoolSaturated as e:
+            logger.warning(f"Login attempt for user {username} rejected: {e}")
+            response = make_response(jsonify({'message': 'Server busy, please try again'}), 503)
+            response.headers['Retry-After'] = '1'
+            return response
+            
+        if password_valid:
             # Generate JWT token with minimal payload to reduce size
             token = jwt.encode({
                 'username': username,
@@ -259,10 +323,10 @@ def simulate_server_status():
     
     detailed_servers = []
     for server in servers:
-        # Get services for this server
-        services = common_services.copy()
+        # Get services for this server, copied so each server tracks its own status
+        services = [dict(service) for service in common_services]
         if server["type"] in specific_services:
-            services.extend(specific_services[server["type"]])
+            services.extend(dict(service) for service in specific_services[server["type"]])
         
         # Assign status to each service
         for service in services:
@@ -312,52 +376,111 @@ def get_cached_servers():
         logger.info("Cache expired, refreshing server data")
         cache['servers'] = simulate_server_status()
         cache['last_updated'] = current_time
+        fleet.replace(cache['servers'])
+        for server in cache['servers']:
+            metric_history.record(server['name'], server, current_time)
         
-        # Broadcast updates via WebSocket
-        socketio.emit('server-update', {'servers': cache['servers'], 'timestamp': datetime.utcnow().isoformat()})
+        # Broadcast only what changed since the last update via WebSocket
+        broadcaster.diff(cache['servers'])
     
     return cache['servers']
 
+def broadcast_server_change(server_name):
+    """Broadcast a delta for a single server after a service action"""
+    broadcaster.record_change(fleet.get_server(server_name))
+
 @app.route('/api/servers', methods=['GET'])
 @token_required
 def get_servers(current_user):
-    """Get all servers with optional filtering"""
-    servers = get_cached_servers()
+    """Get servers with optional filtering, sorting, paging and field selection"""
+    get_cached_servers()
+    
+    etag = fleet.etag('servers', request.query_string)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
     
     # Apply filters if provided
     search = request.args.get('search', '').lower()
     status = request.args.get('status', '')
+    cidr = request.args.get('cidr', '')
     
-    if search or status:
-        filtered_servers = []
-        for server in servers:
-            # Filter by search term
-            if search and not (search in server['name'].lower() or search in server['ip'].lower() or search in server['location'].lower()):
-                continue
-                
-            # Filter by status
-            if status:
-                has_status = any(service['status'] == status for service in server['services'])
-                if not has_status:
-                    continue
-                    
-            filtered_servers.append(server)
-        
-        return jsonify(filtered_servers)
+    try:
+        query = parse_fleet_query(request.args)
+        if cidr:
+            parse_cidr(cidr)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify(servers)
+    entry = response_cache.get(fleet.version, ('servers', request.query_string),
+                               lambda: run_fleet_query(fleet.filter(search, cidr, status), query))
+    return cached_json_response(entry, etag)
 
 @app.route('/api/servers/<server_name>', methods=['GET'])
 @token_required
 def get_server_details(current_user, server_name):
     """Get detailed information about a specific server"""
-    servers = get_cached_servers()
+    get_cached_servers()
     
-    for server in servers:
-        if server['name'] == server_name:
-            return jsonify(server)
+    server = fleet.get_server(server_name)
+    if server is None:
+        return jsonify({'error': 'Server not found'}), 404
+    
+    etag = fleet.etag('server', server_name)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
     
-    return jsonify({'error': 'Server not found'}), 404
+    return with_etag(jsonify(server), etag)
+
+@app.route('/api/services/<service_name>/servers', methods=['GET'])
+@token_required
+def get_service_servers(current_user, service_name):
+    """Get the servers running a service, optionally only those where it has the given status"""
+    get_cached_servers()
+    status = request.args.get('status', '')
+    
+    etag = fleet.etag('service-servers', service_name, status)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    
+    servers = []
+    for server in fleet.filter(status=status, service=service_name):
+        service = fleet.get_service(server['name'], service_name)
+        servers.append({
+            'name': server['name'],
+            'ip': server.get('ip'),
+            'location': server.get('location'),
+            'status': service.get('status')
+        })
+    return with_etag(jsonify({'service': service_name, 'status': status or None, 'servers': servers}), etag)
+
+@app.route('/api/servers/<server_name>/history', methods=['GET'])
+@token_required
+def get_server_history(current_user, server_name):
+    """Get the recorded samples of one server metric over a time window"""
+    metric = request.args.get('metric', 'cpu_usage')
+    if metric not in METRICS:
+        return jsonify({'error': f'Unknown metric, expected one of: {", ".join(METRICS)}'}), 400
+    
+    try:
+        window = parse_window(request.args.get('window', '1h'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    get_cached_servers()
+    if fleet.get_server(server_name) is None:
+        return jsonify({'error': 'Server not found'}), 404
+    
+    timestamps, values = metric_history.query(server_name, metric, time.time() - window)
+    return jsonify({
+        'server': server_name,
+        'metric': metric,
+        'window': window,
+        'timestamps': timestamps,
+        'values': values
+    })
 
 @app.route('/api/services/start', methods=['POST'])
 @token_required
@@ -371,38 +494,34 @@ def start_service(current_user):
         return jsonify({'error': 'Missing server or service name'}), 400
     
     # Simulate starting the service
-    servers = get_cached_servers()
-    for server in servers:
-        if server['name'] == server_name:
-            for service in server['services']:
-                if service['name'] == service_name:
-                    if service['status'] == 'online':
-                        return jsonify({'message': f'Service {service_name} is already running'})
-                    
-                    # Update service status
-                    old_status = service['status']
-                    service['status'] = 'online'
-                    
-                    # Log the change
-                    logger.info(f"Service {service_name} on {server_name} started by {current_user} (changed from {old_status} to online)")
-                    
-                    # Update cache
-                    cache['servers'] = servers
-                    
-                    # Broadcast update
-                    socketio.emit('service-update', {
-                        'server': server_name,
-                        'service': service_name,
-                        'status': 'online',
-                        'timestamp': datetime.utcnow().isoformat(),
-                        'user': current_user
-                    })
-                    
-                    return jsonify({'message': f'Service {service_name} started successfully'})
-            
-            return jsonify({'error': 'Service not found'}), 404
+    get_cached_servers()
+    if fleet.get_server(server_name) is None:
+        return jsonify({'error': 'Server not found'}), 404
+    
+    service = fleet.get_service(server_name, service_name)
+    if service is None:
+        return jsonify({'error': 'Service not found'}), 404
+    
+    if service['status'] == 'online':
+        return jsonify({'message': f'Service {service_name} is already running'})
+    
+    # Update service status
+    old_status = fleet.set_service_status(server_name, service_name, 'online')
+    
+    # Log the change
+    logger.info(f"Service {service_name} on {server_name} started by {current_user} (changed from {old_status} to online)")
+    
+    # Broadcast update
+    socketio.emit('service-update', {
+        'server': server_name,
+        'service': service_name,
+        'status': 'online',
+        'timestamp': datetime.utcnow().isoformat(),
+        'user': current_user
+    }, to=server_room(server_name))
+    broadcast_server_change(server_name)
     
-    return jsonify({'error': 'Server not found'}), 404
+    return jsonify({'message': f'Service {service_name} started successfully'})
 
 @app.route('/api/services/stop', methods=['POST'])
 @token_required
@@ -416,38 +535,34 @@ def stop_service(current_user):
         return jsonify({'error': 'Missing server or service name'}), 400
     
     # Simulate stopping the service
-    servers = get_cached_servers()
-    for server in servers:
-        if server['name'] == server_name:
-            for service in server['services']:
-                if service['name'] == service_name:
-                    if service['status'] == 'offline':
-                        return jsonify({'message': f'Service {service_name} is already stopped'})
-                    
-                    # Update service status
-                    old_status = service['status']
-                    service['status'] = 'offline'
-                    
-                    # Log the change
-                    logger.info(f"Service {service_name} on {server_name} stopped by {current_user} (changed from {old_status} to offline)")
-                    
-                    # Update cache
-                    cache['servers'] = servers
-                    
-                    # Broadcast update
-                    socketio.emit('service-update', {
-                        'server': server_name,
-                        'service': service_name,
-                        'status': 'offline',
-                        'timestamp': datetime.utcnow().isoformat(),
-                        'user': current_user
-                    })
-                    
-                    return jsonify({'message': f'Service {service_name} stopped successfully'})
-            
-            return jsonify({'error': 'Service not found'}), 404
+    get_cached_servers()
+    if fleet.get_server(server_name) is None:
+        return jsonify({'error': 'Server not found'}), 404
+    
+    service = fleet.get_service(server_name, service_name)
+    if service is None:
+        return jsonify({'error': 'Service not found'}), 404
+    
+    if service['status'] == 'offline':
+        return jsonify({'message': f'Service {service_name} is already stopped'})
+    
+    # Update service status
+    old_status = fleet.set_service_status(server_name, service_name, 'offline')
+    
+    # Log the change
+    logger.info(f"Service {service_name} on {server_name} stopped by {current_user} (changed from {old_status} to offline)")
     
-    return jsonify({'error': 'Server not found'}), 404
+    # Broadcast update
+    socketio.emit('service-update', {
+        'server': server_name,
+        'service': service_name,
+        'status': 'offline',
+        'timestamp': datetime.utcnow().isoformat(),
+        'user': current_user
+    }, to=server_room(server_name))
+    broadcast_server_change(server_name)
+    
+    return jsonify({'message': f'Service {service_name} stopped successfully'})
 
 @app.route('/api/services/restart', methods=['POST'])
 @token_required
@@ -461,35 +576,31 @@ def restart_service(current_user):
         return jsonify({'error': 'Missing server or service name'}), 400
     
     # Simulate restarting the service
-    servers = get_cached_servers()
-    for server in servers:
-        if server['name'] == server_name:
-            for service in server['services']:
-                if service['name'] == service_name:
-                    # Update service status
-                    old_status = service['status']
-                    service['status'] = 'online'
-                    
-                    # Log the change
-                    logger.info(f"Service {service_name} on {server_name} restarted by {current_user} (changed from {old_status} to online)")
-                    
-                    # Update cache
-                    cache['servers'] = servers
-                    
-                    # Broadcast update
-                    socketio.emit('service-update', {
-                        'server': server_name,
-                        'service': service_name,
-                        'status': 'online',
-                        'timestamp': datetime.utcnow().isoformat(),
-                        'user': current_user
-                    })
-                    
-                    return jsonify({'message': f'Service {service_name} restarted successfully'})
-            
-            return jsonify({'error': 'Service not found'}), 404
+    get_cached_servers()
+    if fleet.get_server(server_name) is None:
+        return jsonify({'error': 'Server not found'}), 404
+    
+    service = fleet.get_service(server_name, service_name)
+    if service is None:
+        return jsonify({'error': 'Service not found'}), 404
+    
+    # Update service status
+    old_status = fleet.set_service_status(server_name, service_name, 'online')
+    
+    # Log the change
+    logger.info(f"Service {service_name} on {server_name} restarted by {current_user} (changed from {old_status} to online)")
     
-    return jsonify({'error': 'Server not found'}), 404
+    # Broadcast update
+    socketio.emit('service-update', {
+        'server': server_name,
+        'service': service_name,
+        'status': 'online',
+        'timestamp': datetime.utcnow().isoformat(),
+        'user': current_user
+    }, to=server_room(server_name))
+    broadcast_server_change(server_name)
+    
+    return jsonify({'message': f'Service {service_name} restarted successfully'})
 
 @app.route('/api/server/reboot', methods=['POST'])
 @token_required
@@ -502,50 +613,65 @@ def reboot_server(current_user):
         return jsonify({'error': 'Missing server name'}), 400
     
     # Simulate rebooting the server
-    servers = get_cached_servers()
-    for server in servers:
-        if server['name'] == server_name:
-            # Log the reboot
-            logger.info(f"Server {server_name} rebooted by {current_user}")
-            
-            # Set all services to offline temporarily
-            for service in server['services']:
-                service['status'] = 'offline'
-            
-            # Update cache
-            cache['servers'] = servers
-            
-            # Broadcast update
-            socketio.emit('server-reboot', {
-                'server': server_name,
-                'timestamp': datetime.utcnow().isoformat(),
-                'user': current_user
-            })
-            
-            # Schedule services to come back online after a delay
-            def bring_services_online():
-                time.sleep(5)  # Simulate reboot time
-                for service in server['services']:
-                    service['status'] = random.choices(['online', 'warning'], [0.9, 0.1])[0]
-                
-                # Update cache
-                cache['servers'] = servers
-                
-                # Broadcast update
-                socketio.emit('server-update', {
-                    'servers': [server],
-                    'timestamp': datetime.utcnow().isoformat()
-                })
-                
-                logger.info(f"Server {server_name} completed reboot")
-            
-            # Start the reboot process in a background thread
-            import threading
-            threading.Thread(target=bring_services_online).start()
-            
-            return jsonify({'message': f'Server {server_name} is rebooting'})
+    get_cached_servers()
+    server = fleet.get_server(server_name)
+    if server is None:
+        return jsonify({'error': 'Server not found'}), 404
+    
+    # Log the reboot
+    logger.info(f"Server {server_name} rebooted by {current_user}")
+    
+    # Set all services to offline temporarily
+    for service in server['services']:
+        fleet.set_service_status(server_name, service['name'], 'offline')
+    
+    # Broadcast update
+    socketio.emit('server-reboot', {
+        'server': server_name,
+        'timestamp': datetime.utcnow().isoformat(),
+        'user': current_user
+    }, to=server_room(server_name))
+    broadcast_server_change(server_name)
+    
+    # Schedule services to come back online after a delay
+    def bring_services_online():
+        time.sleep(5)  # Simulate reboot time
+        for service in server['services']:
+            fleet.set_service_status(server_name, service['name'], random.choices(['online', 'warning'], [0.9, 0.1])[0])
+        
+        # Broadcast update
+        broadcast_server_change(server_name)
+        
+        logger.info(f"Server {server_name} completed reboot")
     
-    return jsonify({'error': 'Server not found'}), 404
+    # Start the reboot process in a background thread
+    import threading
+    threading.Thread(target=bring_services_online).start()
+    
+    return jsonify({'message': f'Server {server_name} is rebooting'})
+
+@app.route('/api/logs/stats', methods=['GET'])
+@token_required
+def get_logging_stats(current_user):
+    """Get queued, dropped and pending record counts of the logging pipeline"""
+    # Check if user has admin role
+    if users.get(current_user, {}).get('role') != 'admin':
+        return jsonify({'error': 'Unauthorized access'}), 403
+    
+    return jsonify(logging_stats())
+
+@app.route('/api/auth/stats', methods=['GET'])
+@token_required
+def get_auth_stats(current_user):
+    """Get verified-token cache and password check pool counters"""
+    # Check if user has admin role
+    if users.get(current_user, {}).get('role') != 'admin':
+        return jsonify({'error': 'Unauthorized access'}), 403
+    
+    return jsonify({
+        'token_cache': token_cache.stats(),
+        'password_checks': password_pool.stats()
+    })
 
 @app.route('/api/logs', methods=['GET'])
 @token_required
@@ -560,69 +686,60 @@ def get_logs(current_user):
     server = request.args.get('server', '')
     service = request.args.get('service', '')
     level = request.args.get('level', '')
+    since = request.args.get('since', '')
+    until = request.args.get('until', '')
     
-    # Read log file
+    # Time-range queries only read the line offsets selected by the sidecar index
+    if since or until:
+        try:
+            since = normalize_timestamp(since) if since else None
+            until = normalize_timestamp(until) if until else None
+        except ValueError:
+            return jsonify({'error': 'Invalid since/until timestamp'}), 400
+        
+        try:
+            filtered_logs = log_index.query(limit, since=since, until=until, level=level, server=server, service=service, archive=log_archive)
+        except FileNotFoundError:
+            return jsonify([])
+        
+        return jsonify(filtered_logs)
+    
+    # Scan the log backwards, then archived segments, until enough matching lines are found
     try:
-        with open("server_status.log", "r") as f:
-            logs = f.readlines()
+        filtered_logs = tail_matching("server_status.log", limit, server=server, service=service, level=level, archive=log_archive)
     except FileNotFoundError:
         return jsonify([])
     
-    # Apply filters
-    filtered_logs = []
-    for log in logs[-limit:]:
-        if server and server not in log:
-            continue
-        if service and service not in log:
-            continue
-        if level and level.upper() not in log:
-            continue
-        filtered_logs.append(log.strip())
-    
     return jsonify(filtered_logs)
 
 @app.route('/api/stats', methods=['GET'])
 @token_required
 def get_stats(current_user):
     """Get server statistics"""
-    servers = get_cached_servers()
-    
-    # Calculate statistics
-    total_servers = len(servers)
-    total_services = sum(len(server['services']) for server in servers)
-    
-    online_services = 0
-    warning_services = 0
-    offline_services = 0
-    
-    for server in servers:
-        for service in server['services']:
-            if service['status'] == 'online':
-                online_services += 1
-            elif service['status'] == 'warning':
-                warning_services += 1
-            elif service['status'] == 'offline':
-                offline_services += 1
+    get_cached_servers()
     
-    uptime_percentage = (online_services / total_services * 100) if total_services > 0 else 0
+    etag = fleet.etag('stats')
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
     
-    # Get average resource usage
-    avg_cpu = sum(server['cpu_usage'] for server in servers) / total_servers if total_servers > 0 else 0
-    avg_memory = sum(server['memory_usage'] for server in servers) / total_servers if total_servers > 0 else 0
-    avg_disk = sum(server['disk_usage'] for server in servers) / total_servers if total_servers > 0 else 0
+    # Read the running aggregates kept by the fleet store
+    stats = fleet.stats()
+    total_services = stats['total_services']
+    uptime_percentage = (stats['online_services'] / total_services * 100) if total_services > 0 else 0
     
-    return jsonify({
-        'total_servers': total_servers,
+    return with_etag(jsonify({
+        'total_servers': stats['total_servers'],
         'total_services': total_services,
-        'online_services': online_services,
-        'warning_services': warning_services,
-        'offline_services': offline_services,
+        'online_services': stats['online_services'],
+        'warning_services': stats['warning_services'],
+        'offline_services': stats['offline_services'],
         'uptime_percentage': round(uptime_percentage, 2),
-        'avg_cpu_usage': round(avg_cpu, 2),
-        'avg_memory_usage': round(avg_memory, 2),
-        'avg_disk_usage': round(avg_disk, 2),
+        'avg_cpu_usage': round(stats['avg_cpu_usage'], 2),
+        'avg_memory_usage': round(stats['avg_memory_usage'], 2),
+        'avg_disk_usage': round(stats['avg_disk_usage'], 2),
         'timestamp': datetime.utcnow().isoformat()
-    })
+    }), etag)
 
 # WebSocket event handlers
 @socketio.on('connect')
@@ -633,21 +750,45 @@ def handle_connect():
 def handle_disconnect():
     logger.info(f"Client disconnected: {request.sid}")
 
+@socketio.on('resync')
+def handle_resync(data=None):
+    """Send a snapshot to a client that detected a gap in the delta sequence"""
+    get_cached_servers()
+    server_name = (data or {}).get('server')
+    
+    # Clients following one server only need that server: 'server-snapshot' carries
+    # {server, version, data, timestamp} like 'server-change', while 'fleet-snapshot'
+    # carries {seq, servers, timestamp} like 'server-delta'
+    if server_name:
+        broadcaster.server_snapshot(server_name, send=lambda snapshot: socketio.emit('server-snapshot', snapshot, to=request.sid))
+    else:
+        broadcaster.snapshot(send=lambda snapshot: socketio.emit('fleet-snapshot', snapshot, to=request.sid))
+
 @socketio.on('subscribe')
 def handle_subscribe(data):
-    """Subscribe to updates for specific servers"""
+    """Subscribe to updates for specific servers and/or the whole fleet"""
     server_names = data.get('servers', [])
-    room = request.sid
     
     for server_name in server_names:
-        socketio.enter_room(room, server_name)
+        join_room(server_room(server_name))
         logger.info(f"Client {request.sid} subscribed to updates for server {server_name}")
+    
+    if data.get('fleet'):
+        join_room(FLEET_ROOM)
+        logger.info(f"Client {request.sid} subscribed to fleet updates")
 
-# Start the server
-if __name__ == '__main__':
-    # Initialize server data
-    get_cached_servers()
+@socketio.on('unsubscribe')
+def handle_unsubscribe(data):
+    """Stop receiving updates for specific servers and/or the whole fleet"""
+    for server_name in data.get('servers', []):
+        leave_room(server_room(server_name))
     
+    if data.get('fleet'):
+        leave_room(FLEET_ROOM)
+
+# Start the server
+def start_status_updates():
+    """Start a background thread that refreshes the server cache every 30 seconds and broadcasts changes"""
     def background_status_updates():
         while True:
             time.sleep(30)  # Update every 30 seconds
@@ -655,6 +796,19 @@ if __name__ == '__main__':
     
     import threading
     threading.Thread(target=background_status_updates, daemon=True).start()
+
+if __name__ == '__main__':
+    # Parse command line arguments
+    import argparse
+    parser = argparse.ArgumentParser(description='Start the Voxco API server with WebSocket support')
+    parser.add_argument('--production', action='store_true', default=os.getenv('SERVER_MODE') == 'production',
+                        help='Serve with gunicorn instead of the development server')
+    parser.add_argument('--threads', type=int, default=int(os.getenv('SOCKETIO_THREADS', 100)),
+                        help='Concurrent requests and WebSocket connections in production mode')
+    args = parser.parse_args()
+    
+    # Initialize server data
+    get_cached_servers()
     
     # Use a dynamic port with preference for 3000-3005
     port = find_free_port(preferred_range=(3000, 3005))
@@ -672,4 +826,11 @@ if __name__ == '__main__':
     logger.info(f"Starting server on port {port} with header_size_limit={header_size}")
     
     # Run the server with compatible options
-    socketio.run(app, **server_options)
\ No newline at end of file
+    if args.production:
+        from production_server import run_production
+        # Socket.IO clients must reach the worker holding their session and rooms, and
+        # gunicorn cannot route them there, so scale with threads in a single worker
+        run_production(app, port, workers=1, threads=args.threads, on_worker_start=start_status_updates)
+    else:
+        start_status_updates()
+        socketio.run(app, **server_options)
\ No newline at end of file
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+import os
+import secrets
+import sqlite3
+import threading
+from collections.abc import Mapping
+
+import json_provider
+
+try:
+    import fcntl
+except ImportError:
+    # No inter-process locking on Windows; every process collects for itself
+    fcntl = None
+
+# 'sqlite' shares state between worker processes, 'memory' keeps it in this process
+STATE_BACKEND = os.getenv('STATE_BACKEND', 'sqlite').lower()
+STATE_DB_PATH = os.getenv('STATE_DB_PATH', 'server_state.db')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+CREATE TABLE IF NOT EXISTS servers (
+    name TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS services (
+    server TEXT NOT NULL,
+    name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    status TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (server, name)
+);
+CREATE TABLE IF NOT EXISTS status_history (
+    server TEXT PRIMARY KEY,
+    services TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password TEXT NOT NULL,
+    role TEXT NOT NULL
+);
+'''
+
+
+def copy_servers(servers):
+    """Copy server dicts and their services so later changes do not leak between copies"""
+    copied = []
+    for server in servers:
+        server = dict(server)
+        server['services'] = [dict(service) for service in server.get('services', [])]
+        copied.append(server)
+    return copied
+
+
+class CollectorLock:
+    """
+    Non-blocking inter-process lock held by the single process refreshing shared state.
+
+    The lock is only held for the duration of one refresh, so whichever
+    process first finds the state expired collects it and the others keep
+    serving the stored fleet. Uses POSIX record locks, which are released
+    when the holder exits and are not inherited by forked children, plus a
+    thread lock because record locks do not exclude threads of one process.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._pid = None
+        self._thread_lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Start collecting if no other process or thread is.
+
+        Returns:
+            bool: True if the caller must collect and then call release()
+        """
+        if self._pid is not None and self._pid != os.getpid():
+            # Forked while the parent was collecting; neither its lock nor its thread carried over
+            self._file = None
+            self._pid = None
+            self._thread_lock = threading.Lock()
+        if not self._thread_lock.acquire(blocking=False):
+            return False
+
+        f = None
+        if fcntl is not None:
+            f = open(self.path, 'a+')
+            try:
+                fcntl.lockf(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                f.close()
+                self._thread_lock.release()
+                return False
+            f.seek(0)
+            f.truncate()
+            f.write(str(os.getpid()))
+            f.flush()
+        self._file = f
+        self._pid = os.getpid()
+        return True
+
+    def release(self):
+        """Finish collecting so the next refresh can be done by any process"""
+        if self._pid != os.getpid():
+            return
+        if self._file is not None:
+            fcntl.lockf(self._file, fcntl.LOCK_UN)
+            self._file.close()
+        self._file = None
+        self._pid = None
+        self._thread_lock.release()
+
+
+class MemoryStateBackend:
+    """Fleet, status history and users held in this process only"""
+
+    def __init__(self):
+        self.instance_id = secrets.token_hex(4)
+        self.users = {}
+        self._version = 0
+        self._updated_at = None
+        self._servers = []
+        self._history = {}
+        self._lock = threading.Lock()
+        self._collector = threading.Lock()
+
+    def acquire_collector(self):
+        """
+        Start a refresh unless another thread is already refreshing.
+
+        Returns:
+            bool: True if the caller must refresh and then call release_collector()
+        """
+        return self._collector.acquire(blocking=False)
+
+    def release_collector(self):
+        """Finish a refresh started with acquire_collector()"""
+        self._collector.release()
+
+    def fleet_version(self):
+        """
+        Get the version and refresh time of the fleet, without loading it.
+
+        Returns:
+            tuple: (version, updated_at); updated_at is None before the first refresh
+        """
+        with self._lock:
+            return self._version, self._updated_at
+
+    def load_fleet(self):
+        """
+        Get the fleet.
+
+        Returns:
+            tuple: (version, updated_at, servers)
+        """
+        with self._lock:
+            return self._version, self._updated_at, copy_servers(self._servers)
+
+    def put_fleet(self, servers, updated_at):
+        """
+        Replace the fleet after a refresh.
+
+        Args:
+            servers (list): Server dicts, each with a 'services' list
+            updated_at (float): Refresh time in epoch seconds
+
+        Returns:
+            int: New fleet version
+        """
+        with self._lock:
+            self._servers = copy_servers(servers)
+            self._updated_at = updated_at
+            self._version += 1
+            return self._version
+
+    def set_service_status(self, server_name, service_name, status):
+        """
+        Update the status of a service.
+
+        Returns:
+            str or None: Previous status, or None if the service is unknown
+        """
+        with self._lock:
+            for server in self._servers:
+                if server.get('name') != server_name:
+                    continue
+                for service in server['services']:
+                    if service.get('name') == service_name:
+                        old_status = service.get('status')
+                        service['status'] = status
+                        self._version += 1
+                        return old_status
+            return None
+
+    def get_status_history(self):
+        """Get the service statuses of each server as of the previous refresh"""
+        with self._lock:
+            return {name: [dict(service) for service in services] for name, services in self._history.items()}
+
+    def put_status_history(self, history):
+        """Store the service statuses of each server for the next refresh to compare against"""
+        with self._lock:
+            self._history = {name: [dict(service) for service in services] for name, services in history.items()}
+
+    def set_user(self, username, password_hash, role):
+        """Create or replace a user"""
+        self.users[username] = {'password': password_hash, 'role': role}
+
+
+class SQLiteUsers(Mapping):
+    """Read-only mapping of username to {'password', 'role'} backed by the users table"""
+
+    def __init__(self, backend):
+        self._backend = backend
+
+    def __getitem__(self, username):
+        row = self._backend._conn().execute(
+            'SELECT password, role FROM users WHERE username = ?', (username,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(username)
+        return {'password': row[0], 'role': row[1]}
+
+    def __iter__(self):
+        rows = self._backend._conn().execute('SELECT username FROM users ORDER BY username').fetchall()
+        return iter([row[0] for row in rows])
+
+    def __len__(self):
+        return self._backend._conn().execute('SELECT COUNT(*) FROM users').fetchone()[0]
+
+
+class SQLiteStateBackend:
+    """
+    Fleet, status history and users in a SQLite database shared by all worker processes.
+
+    The database runs in WAL mode, so readers never block the writer. Every
+    change bumps a version in the meta table, letting workers check for
+    changes with one small query before reloading the fleet.
+    """
+
+    def __init__(self, db_path=STATE_DB_PATH):
+        self.db_path = db_path
+        self.users = SQLiteUsers(self)
+        self._local = threading.local()
+        self._collector = CollectorLock(f'{db_path}.lock')
+
+        conn = self._conn()
+        with conn:
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('instance_id', ?)", (secrets.token_hex(4),))
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0)")
+        self.instance_id = conn.execute("SELECT value FROM meta WHERE key = 'instance_id'").fetchone()[0]
+
+    def _conn(self):
+        # One connection per thread and process; connections must not cross a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _write(self, conn):
+        # Take the write lock up front so concurrent writers queue instead of deadlocking
+        conn.execute('BEGIN IMMEDIATE')
+
+    def acquire_collector(self):
+        """
+        Start a refresh of the shared fleet unless another process or thread is already refreshing it.
+
+        Returns:
+            bool: True if the caller must refresh and then call release_collector()
+        """
+        return self._collector.acquire()
+
+    def release_collector(self):
+        """Finish a refresh started with acquire_collector(), letting any process do the next one"""
+        self._collector.release()
+
+    def fleet_version(self):
+        """
+        Get the version and refresh time of the fleet, without loading it.
+
+        Returns:
+            tuple: (version, updated_at); updated_at is None before the first refresh
+        """
+        meta = dict(self._conn().execute(
+            "SELECT key, value FROM meta WHERE key IN ('version', 'updated_at')"
+        ).fetchall())
+        return int(meta.get('version', 0)), meta.get('updated_at')
+
+    def load_fleet(self):
+        """
+        Get the fleet.
+
+        Returns:
+            tuple: (version, updated_at, servers)
+        """
+        conn = self._conn()
+        # Read everything from one snapshot so a concurrent write cannot mix two versions
+        conn.execute('BEGIN')
+        try:
+            meta = dict(conn.execute("SELECT key, value FROM meta WHERE key IN ('version', 'updated_at')").fetchall())
+            servers = []
+            by_name = {}
+            for name, data in conn.execute('SELECT name, data FROM servers ORDER BY position'):
+                server = json_provider.loads(data)
+                server['services'] = []
+                by_name[name] = server
+                servers.append(server)
+            for server_name, status, data in conn.execute(
+                'SELECT server, status, data FROM services ORDER BY server, position'
+            ):
+                service = json_provider.loads(data)
+                service['status'] = status
+                if server_name in by_name:
+                    by_name[server_name]['services'].append(service)
+        finally:
+            conn.execute('COMMIT')
+        return int(meta.get('version', 0)), meta.get('updated_at'), servers
+
+    def put_fleet(self, servers, updated_at):
+        """
+        Replace the fleet after a refresh.
+
+        Args:
+            servers (list): Server dicts, each with a 'services' list
+            updated_at (float): Refresh time in epoch seconds
+
+        Returns:
+            int: New fleet version
+        """
+        server_rows = []
+        service_rows = []
+        for position, server in enumerate(servers):
+            data = {key: value for key, value in server.items() if key != 'services'}
+            server_rows.append((server['name'], position, json_provider.dumps(data)))
+            for service_position, service in enumerate(server.get('services', [])):
+                service_data = {key: value for key, value in service.items() if key != 'status'}
+                service_rows.append((server['name'], service['name'], service_position,
+                                     service.get('status'), json_provider.dumps(service_data)))
+
+        conn = self._conn()
+        self._write(conn)
+        try:
+            conn.execute('DELETE FROM servers')
+            conn.execute('DELETE FROM services')
+            conn.executemany('INSERT INTO servers (name, position, data) VALUES (?, ?, ?)', server_rows)
+            conn.executemany(
+                'INSERT INTO services (server, name, position, status, data) VALUES (?, ?, ?, ?, ?)',
+                service_rows
+            )
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('updated_at', ?)", (updated_at,))
+            version = self._bump_version(conn)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return version
+
+    def _bump_version(self, conn):
+        # Caller holds the write transaction
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+        return int(conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0])
+
+    def set_service_status(self, server_name, service_name, status):
+        """
+        Update the status of a service.
+
+        Returns:
+            str or None: Previous status, or None if the service is unknown
+        """
+        conn = self._conn()
+        self._write(conn)
+        try:
+            row = conn.execute(
+                'SELECT status FROM services WHERE server = ? AND name = ?', (server_name, service_name)
+            ).fetchone()
+            if row is None:
+                conn.execute('ROLLBACK')
+                return None
+            conn.execute(
+                'UPDATE services SET status = ? WHERE server = ? AND name = ?', (status, server_name, service_name)
+            )
+            self._bump_version(conn)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return row[0]
+
+    def get_status_history(self):
+        """Get the service statuses of each server as of the previous refresh"""
+        rows = self._conn().execute('SELECT server, services FROM status_history').fetchall()
+        return {server: json_provider.loads(services) for server, services in rows}
+
+    def put_status_history(self, history):
+        """Store the service statuses of each server for the next refresh to compare against"""
+        conn = self._conn()
+        self._write(conn)
+        try:
+            conn.execute('DELETE FROM status_history')
+            conn.executemany(
+                'INSERT INTO status_history (server, services) VALUES (?, ?)',
+                [(server, json_provider.dumps(services)) for server, services in history.items()]
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def set_user(self, username, password_hash, role):
+        """Create or replace a user"""
+        self._conn().execute(
+            'INSERT OR REPLACE INTO users (username, password, role) VALUES (?, ?, ?)',
+            (username, password_hash, role)
+        )
+
+
+def create_backend(kind=STATE_BACKEND):
+    """
+    Create the configured state backend.
+
+    Args:
+        kind (str): 'sqlite' to share state between processes, or 'memory'
+
+    Returns:
+        SQLiteStateBackend or MemoryStateBackend
+    """
+    if kind == 'memory':
+        return MemoryStateBackend()
+    if kind != 'sqlite':
+        raise ValueError(f'Unknown state backend: {kind}')
+    return SQLiteStateBackend()
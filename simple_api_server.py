@@ -1,4 +1,4 @@
-from flask import Flask, jsonify, request, make_response
+from flask import Flask, jsonify, request, make_response, Response, stream_with_context
 from flask_cors import CORS
 import jwt
 import datetime
@@ -6,70 +6,92 @@ import logging
 import os
 import json
 import time
+import threading
 import random
 import dotenv
 import sys
 from functools import wraps
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import generate_password_hash
 import subprocess
 import json
 import re
 
+# Add parent directory to path to import shared modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fleet_store import FleetStore, METRICS
+from metric_history import MetricHistory, parse_window
+from log_rotation import LogArchive
+from logging_setup import configure_logging, logging_stats
+from http_cache import ResponseCache, cached_json_response, not_modified, with_etag
+from fleet_query import parse_fleet_query, run_fleet_query
+from search_index import parse_cidr
+import json_provider
+from token_cache import TokenCache
+from password_pool import pool as password_pool, PasswordPoolSaturated
+from shared_state import create_backend
+from log_reader import tail_matching
+from log_index import LogIndex, normalize_timestamp
+
 # Load environment variables from .env file
 dotenv.load_dotenv()
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("server_status.log"),
-        logging.StreamHandler()
-    ]
-)
+# Set up logging; file and console output are written by a background thread
+configure_logging("server_status.log")
 logger = logging.getLogger(__name__)
 
 # Configure Flask
 app = Flask(__name__)
+json_provider.init_app(app)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'voxco_server_dashboard_secret_key')
 app.config['JWT_EXPIRATION_SECONDS'] = int(os.getenv('JWT_EXPIRATION_SECONDS', 3600))  # 1 hour
 app.config['CACHE_EXPIRATION_SECONDS'] = int(os.getenv('CACHE_EXPIRATION_SECONDS', 60))  # 1 minute
 
 # Configure CORS
-CORS(app, resources={r"/api/*": {"origins": os.getenv('CORS_ALLOWED_ORIGINS', '*')}}, supports_credentials=True)
+# Browsers reuse a preflight result for max_age seconds instead of repeating it per request
+CORS(app, resources={r"/api/*": {"origins": os.getenv('CORS_ALLOWED_ORIGINS', '*')}}, supports_credentials=True,
+     max_age=int(os.getenv('CORS_MAX_AGE', 600)))
 
 # Set response headers for all responses
 @app.after_request
 def add_headers(response):
+    # Responses with an ETag may be kept by the browser and revalidated with If-None-Match
+    if 'ETag' in response.headers:
+        return response
     response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
     response.headers['Pragma'] = 'no-cache'
     response.headers['Expires'] = '0'
     return response
 
-# In-memory cache
-cache = {
-    'servers': None,
-    'last_updated': 0
-}
+# Fleet, service status history and users, shared by all worker processes (STATE_BACKEND)
+state = create_backend()
 
 # Get admin credentials from environment variables
 admin_username = os.getenv('ADMIN_USERNAME', 'admin')
 admin_password = os.getenv('ADMIN_PASSWORD', 'admin')
 
-# In-memory user database
-users = {
-    admin_username: {
-        'password': generate_password_hash(admin_password),
-        'role': 'admin'
-    },
-    'user': {
-        'password': generate_password_hash('user'),
-        'role': 'user'
-    }
-}
+# User database, read through a username -> {'password', 'role'} mapping
+state.set_user(admin_username, generate_password_hash(admin_password), 'admin')
+state.set_user('user', generate_password_hash('user'), 'user')
+users = state.users
+
+# Indexed view of the shared fleet for O(1) lookups, reloaded when its version changes
+fleet = FleetStore(instance_id=state.instance_id)
+fleet_sync = {'version': None, 'updated_at': None, 'lock': threading.Lock()}
+
+# Encoded /api/servers bodies per query, dropped whenever the fleet version changes
+response_cache = ResponseCache()
+
+# Bounded CPU, memory and disk history per server
+metric_history = MetricHistory(METRICS)
+
+# Sidecar index of server_status.log for time-range log queries
+log_index = LogIndex("server_status.log")
+
+# Compressed segments rotated out of server_status.log
+log_archive = LogArchive("server_status.log")
 
-# Server status history for monitoring
-server_status_history = {}
+# Claims of already verified tokens, so repeat requests skip the HMAC check
+token_cache = TokenCache()
 
 # JWT Authentication
 def token_required(f):
@@ -88,7 +110,7 @@ def token_required(f):
             return jsonify({'error': 'Token is missing'}), 401
             
         try:
-            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=["HS256"])
+            data = token_cache.verify(token, app.config['SECRET_KEY'])
             current_user = data['username']
         except jwt.ExpiredSignatureError:
             return jsonify({'error': 'Token has expired'}), 401
@@ -118,7 +140,15 @@ def login():
             logger.warning(f"Login attempt with unknown username: {username}")
             return jsonify({'message': 'Invalid credentials'}), 401
             
-        if check_password_hash(users[username]['password'], password):
+        try:
+            password_valid = password_pool.check(users[username]['password'], password)
+        except PasswordPoolSaturated as e:
+            logger.warning(f"Login attempt for user {username} rejected: {e}")
+            response = make_response(jsonify({'message': 'Server busy, please try again'}), 503)
+            response.headers['Retry-After'] = '1'
+            return response
+            
+        if password_valid:
             # Generate JWT token
             token = jwt.encode({
                 'username': username,
@@ -215,12 +245,15 @@ def simulate_server_status():
     # Status probabilities (80% online, 15% warning, 5% offline)
     status_weights = {'online': 0.8, 'warning': 0.15, 'offline': 0.05}
     
+    # Server status history for monitoring
+    server_status_history = state.get_status_history()
+    
     detailed_servers = []
     for server in servers:
-        # Get services for this server
-        services = common_services.copy()
+        # Get services for this server, copied so each server tracks its own status
+        services = [dict(service) for service in common_services]
         if server["type"] in specific_services:
-            services.extend(specific_services[server["type"]])
+            services.extend(dict(service) for service in specific_services[server["type"]])
         
         # Assign status to each service
         for service in services:
@@ -259,60 +292,139 @@ def simulate_server_status():
         # Update status history
         server_status_history[server["name"]] = services
     
+    state.put_status_history(server_status_history)
     return detailed_servers
 
+def sync_fleet():
+    """Reload the local fleet indexes if the shared state changed since the last sync"""
+    with fleet_sync['lock']:
+        version, updated_at = state.fleet_version()
+        if version == fleet_sync['version']:
+            return
+        
+        version, updated_at, servers = state.load_fleet()
+        fleet.replace(servers, version=version)
+        
+        # Each refresh is recorded once per process, whichever process collected it
+        if updated_at is not None and updated_at != fleet_sync['updated_at']:
+            for server in servers:
+                metric_history.record(server['name'], server, updated_at)
+        fleet_sync['version'] = version
+        fleet_sync['updated_at'] = updated_at
+
 def get_cached_servers():
-    """Get servers from cache or simulate new data if cache is expired"""
+    """Get servers from the shared state, refreshing it first if it expired and no other process is refreshing it"""
     current_time = time.time()
     
-    # If cache is expired or empty, refresh it
-    if cache['servers'] is None or (current_time - cache['last_updated']) > app.config['CACHE_EXPIRATION_SECONDS']:
-        logger.info("Cache expired, refreshing server data")
-        cache['servers'] = simulate_server_status()
-        cache['last_updated'] = current_time
-    
-    return cache['servers']
+    # If cache is expired or empty, refresh it; the first process to notice collects,
+    # the others serve what is stored until the new fleet is in
+    version, updated_at = state.fleet_version()
+    if updated_at is None or (current_time - updated_at) > app.config['CACHE_EXPIRATION_SECONDS']:
+        if state.acquire_collector():
+            try:
+                # Another process may have refreshed between the check and taking the lock
+                version, updated_at = state.fleet_version()
+                if updated_at is None or (current_time - updated_at) > app.config['CACHE_EXPIRATION_SECONDS']:
+                    logger.info("Cache expired, refreshing server data")
+                    state.put_fleet(simulate_server_status(), current_time)
+            finally:
+                state.release_collector()
+    
+    sync_fleet()
+    return fleet.servers
 
 @app.route('/api/servers', methods=['GET'])
 @token_required
 def get_servers(current_user):
-    """Get all servers with optional filtering"""
-    servers = get_cached_servers()
+    """Get servers with optional filtering, sorting, paging and field selection"""
+    get_cached_servers()
+    
+    etag = fleet.etag('servers', request.query_string)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
     
     # Apply filters if provided
     search = request.args.get('search', '').lower()
     status = request.args.get('status', '')
+    cidr = request.args.get('cidr', '')
+    
+    try:
+        query = parse_fleet_query(request.args)
+        if cidr:
+            parse_cidr(cidr)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    if search or status:
-        filtered_servers = []
-        for server in servers:
-            # Filter by search term
-            if search and not (search in server['name'].lower() or search in server['ip'].lower() or search in server['location'].lower()):
-                continue
-                
-            # Filter by status
-            if status:
-                has_status = any(service['status'] == status for service in server['services'])
-                if not has_status:
-                    continue
-                    
-            filtered_servers.append(server)
-        
-        return jsonify(filtered_servers)
-    
-    return jsonify(servers)
+    entry = response_cache.get(fleet.version, ('servers', request.query_string),
+                               lambda: run_fleet_query(fleet.filter(search, cidr, status), query))
+    return cached_json_response(entry, etag)
 
 @app.route('/api/servers/<server_name>', methods=['GET'])
 @token_required
 def get_server_details(current_user, server_name):
     """Get detailed information about a specific server"""
-    servers = get_cached_servers()
+    get_cached_servers()
     
-    for server in servers:
-        if server['name'] == server_name:
-            return jsonify(server)
+    server = fleet.get_server(server_name)
+    if server is None:
+        return jsonify({'error': 'Server not found'}), 404
+    
+    etag = fleet.etag('server', server_name)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    
+    return with_etag(jsonify(server), etag)
+
+@app.route('/api/services/<service_name>/servers', methods=['GET'])
+@token_required
+def get_service_servers(current_user, service_name):
+    """Get the servers running a service, optionally only those where it has the given status"""
+    get_cached_servers()
+    status = request.args.get('status', '')
+    
+    etag = fleet.etag('service-servers', service_name, status)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    
+    servers = []
+    for server in fleet.filter(status=status, service=service_name):
+        service = fleet.get_service(server['name'], service_name)
+        servers.append({
+            'name': server['name'],
+            'ip': server.get('ip'),
+            'location': server.get('location'),
+            'status': service.get('status')
+        })
+    return with_etag(jsonify({'service': service_name, 'status': status or None, 'servers': servers}), etag)
+
+@app.route('/api/servers/<server_name>/history', methods=['GET'])
+@token_required
+def get_server_history(current_user, server_name):
+    """Get the recorded samples of one server metric over a time window"""
+    metric = request.args.get('metric', 'cpu_usage')
+    if metric not in METRICS:
+        return jsonify({'error': f'Unknown metric, expected one of: {", ".join(METRICS)}'}), 400
+    
+    try:
+        window = parse_window(request.args.get('window', '1h'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    get_cached_servers()
+    if fleet.get_server(server_name) is None:
+        return jsonify({'error': 'Server not found'}), 404
     
-    return jsonify({'error': 'Server not found'}), 404
+    timestamps, values = metric_history.query(server_name, metric, time.time() - window)
+    return jsonify({
+        'server': server_name,
+        'metric': metric,
+        'window': window,
+        'timestamps': timestamps,
+        'values': values
+    })
 
 @app.route('/api/services/start', methods=['POST'])
 @token_required
@@ -326,29 +438,25 @@ def start_service(current_user):
         return jsonify({'error': 'Missing server or service name'}), 400
     
     # Simulate starting the service
-    servers = get_cached_servers()
-    for server in servers:
-        if server['name'] == server_name:
-            for service in server['services']:
-                if service['name'] == service_name:
-                    if service['status'] == 'online':
-                        return jsonify({'message': f'Service {service_name} is already running'})
-                    
-                    # Update service status
-                    old_status = service['status']
-                    service['status'] = 'online'
-                    
-                    # Log the change
-                    logger.info(f"Service {service_name} on {server_name} started by {current_user} (changed from {old_status} to online)")
-                    
-                    # Update cache
-                    cache['servers'] = servers
-                    
-                    return jsonify({'message': f'Service {service_name} started successfully'})
-            
-            return jsonify({'error': 'Service not found'}), 404
+    get_cached_servers()
+    if fleet.get_server(server_name) is None:
+        return jsonify({'error': 'Server not found'}), 404
+    
+    service = fleet.get_service(server_name, service_name)
+    if service is None:
+        return jsonify({'error': 'Service not found'}), 404
+    
+    if service['status'] == 'online':
+        return jsonify({'message': f'Service {service_name} is already running'})
     
-    return jsonify({'error': 'Server not found'}), 404
+    # Update service status
+    old_status = state.set_service_status(server_name, service_name, 'online')
+    sync_fleet()
+    
+    # Log the change
+    logger.info(f"Service {service_name} on {server_name} started by {current_user} (changed from {old_status} to online)")
+    
+    return jsonify({'message': f'Service {service_name} started successfully'})
 
 @app.route('/api/services/stop', methods=['POST'])
 @token_required
@@ -362,29 +470,25 @@ def stop_service(current_user):
         return jsonify({'error': 'Missing server or service name'}), 400
     
     # Simulate stopping the service
-    servers = get_cached_servers()
-    for server in servers:
-        if server['name'] == server_name:
-            for service in server['services']:
-                if service['name'] == service_name:
-                    if service['status'] == 'offline':
-                        return jsonify({'message': f'Service {service_name} is already stopped'})
-                    
-                    # Update service status
-                    old_status = service['status']
-                    service['status'] = 'offline'
-                    
-                    # Log the change
-                    logger.info(f"Service {service_name} on {server_name} stopped by {current_user} (changed from {old_status} to offline)")
-                    
-                    # Update cache
-                    cache['servers'] = servers
-                    
-                    return jsonify({'message': f'Service {service_name} stopped successfully'})
-            
-            return jsonify({'error': 'Service not found'}), 404
+    get_cached_servers()
+    if fleet.get_server(server_name) is None:
+        return jsonify({'error': 'Server not found'}), 404
+    
+    service = fleet.get_service(server_name, service_name)
+    if service is None:
+        return jsonify({'error': 'Service not found'}), 404
+    
+    if service['status'] == 'offline':
+        return jsonify({'message': f'Service {service_name} is already stopped'})
+    
+    # Update service status
+    old_status = state.set_service_status(server_name, service_name, 'offline')
+    sync_fleet()
     
-    return jsonify({'error': 'Server not found'}), 404
+    # Log the change
+    logger.info(f"Service {service_name} on {server_name} stopped by {current_user} (changed from {old_status} to offline)")
+    
+    return jsonify({'message': f'Service {service_name} stopped successfully'})
 
 @app.route('/api/services/restart', methods=['POST'])
 @token_required
@@ -398,26 +502,22 @@ def restart_service(current_user):
         return jsonify({'error': 'Missing server or service name'}), 400
     
     # Simulate restarting the service
-    servers = get_cached_servers()
-    for server in servers:
-        if server['name'] == server_name:
-            for service in server['services']:
-                if service['name'] == service_name:
-                    # Update service status
-                    old_status = service['status']
-                    service['status'] = 'online'
-                    
-                    # Log the change
-                    logger.info(f"Service {service_name} on {server_name} restarted by {current_user} (changed from {old_status} to online)")
-                    
-                    # Update cache
-                    cache['servers'] = servers
-                    
-                    return jsonify({'message': f'Service {service_name} restarted successfully'})
-            
-            return jsonify({'error': 'Service not found'}), 404
+    get_cached_servers()
+    if fleet.get_server(server_name) is None:
+        return jsonify({'error': 'Server not found'}), 404
     
-    return jsonify({'error': 'Server not found'}), 404
+    service = fleet.get_service(server_name, service_name)
+    if service is None:
+        return jsonify({'error': 'Service not found'}), 404
+    
+    # Update service status
+    old_status = state.set_service_status(server_name, service_name, 'online')
+    sync_fleet()
+    
+    # Log the change
+    logger.info(f"Service {service_name} on {server_name} restarted by {current_user} (changed from {old_status} to online)")
+    
+    return jsonify({'message': f'Service {service_name} restarted successfully'})
 
 @app.route('/api/server/reboot', methods=['POST'])
 @token_required
@@ -430,79 +530,84 @@ def reboot_server(current_user):
         return jsonify({'error': 'Missing server name'}), 400
     
     # Simulate rebooting the server
-    servers = get_cached_servers()
-    for server in servers:
-        if server['name'] == server_name:
-            # Log the reboot
-            logger.info(f"Server {server_name} rebooted by {current_user}")
-            
-            # Set all services to offline temporarily
-            for service in server['services']:
-                service['status'] = 'offline'
-            
-            # Update cache
-            cache['servers'] = servers
-            
-            # Schedule services to come back online after a delay
-            def bring_services_online():
-                time.sleep(5)  # Simulate reboot time
-                for service in server['services']:
-                    service['status'] = random.choices(['online', 'warning'], [0.9, 0.1])[0]
-                
-                # Update cache
-                cache['servers'] = servers
-                
-                logger.info(f"Server {server_name} completed reboot")
-            
-            # Start the reboot process in a background thread
-            import threading
-            threading.Thread(target=bring_services_online, daemon=True).start()
-            
-            return jsonify({'message': f'Server {server_name} is rebooting'})
+    get_cached_servers()
+    server = fleet.get_server(server_name)
+    if server is None:
+        return jsonify({'error': 'Server not found'}), 404
+    
+    # Log the reboot
+    logger.info(f"Server {server_name} rebooted by {current_user}")
+    
+    # Set all services to offline temporarily
+    for service in server['services']:
+        state.set_service_status(server_name, service['name'], 'offline')
+    sync_fleet()
     
-    return jsonify({'error': 'Server not found'}), 404
+    # Schedule services to come back online after a delay
+    def bring_services_online():
+        time.sleep(5)  # Simulate reboot time
+        for service in server['services']:
+            state.set_service_status(server_name, service['name'], random.choices(['online', 'warning'], [0.9, 0.1])[0])
+        sync_fleet()
+        
+        logger.info(f"Server {server_name} completed reboot")
+    
+    # Start the reboot process in a background thread
+    import threading
+    threading.Thread(target=bring_services_online, daemon=True).start()
+    
+    return jsonify({'message': f'Server {server_name} is rebooting'})
 
 @app.route('/api/stats', methods=['GET'])
 @token_required
 def get_stats(current_user):
     """Get server statistics"""
-    servers = get_cached_servers()
-    
-    # Calculate statistics
-    total_servers = len(servers)
-    total_services = sum(len(server['services']) for server in servers)
-    
-    online_services = 0
-    warning_services = 0
-    offline_services = 0
-    
-    for server in servers:
-        for service in server['services']:
-            if service['status'] == 'online':
-                online_services += 1
-            elif service['status'] == 'warning':
-                warning_services += 1
-            elif service['status'] == 'offline':
-                offline_services += 1
+    get_cached_servers()
     
-    uptime_percentage = (online_services / total_services * 100) if total_services > 0 else 0
+    etag = fleet.etag('stats')
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
     
-    # Get average resource usage
-    avg_cpu = sum(server['cpu_usage'] for server in servers) / total_servers if total_servers > 0 else 0
-    avg_memory = sum(server['memory_usage'] for server in servers) / total_servers if total_servers > 0 else 0
-    avg_disk = sum(server['disk_usage'] for server in servers) / total_servers if total_servers > 0 else 0
+    # Read the running aggregates kept by the fleet store
+    stats = fleet.stats()
+    total_services = stats['total_services']
+    uptime_percentage = (stats['online_services'] / total_services * 100) if total_services > 0 else 0
     
-    return jsonify({
-        'total_servers': total_servers,
+    return with_etag(jsonify({
+        'total_servers': stats['total_servers'],
         'total_services': total_services,
-        'online_services': online_services,
-        'warning_services': warning_services,
-        'offline_services': offline_services,
+        'online_services': stats['online_services'],
+        'warning_services': stats['warning_services'],
+        'offline_services': stats['offline_services'],
         'uptime_percentage': round(uptime_percentage, 2),
-        'avg_cpu_usage': round(avg_cpu, 2),
-        'avg_memory_usage': round(avg_memory, 2),
-        'avg_disk_usage': round(avg_disk, 2),
+        'avg_cpu_usage': round(stats['avg_cpu_usage'], 2),
+        'avg_memory_usage': round(stats['avg_memory_usage'], 2),
+        'avg_disk_usage': round(stats['avg_disk_usage'], 2),
         'timestamp': datetime.datetime.now().isoformat()
+    }), etag)
+
+@app.route('/api/logs/stats', methods=['GET'])
+@token_required
+def get_logging_stats(current_user):
+    """Get queued, dropped and pending record counts of the logging pipeline"""
+    # Check if user has admin role
+    if users.get(current_user, {}).get('role') != 'admin':
+        return jsonify({'error': 'Unauthorized access'}), 403
+    
+    return jsonify(logging_stats())
+
+@app.route('/api/auth/stats', methods=['GET'])
+@token_required
+def get_auth_stats(current_user):
+    """Get verified-token cache and password check pool counters"""
+    # Check if user has admin role
+    if users.get(current_user, {}).get('role') != 'admin':
+        return jsonify({'error': 'Unauthorized access'}), 403
+    
+    return jsonify({
+        'token_cache': token_cache.stats(),
+        'password_checks': password_pool.stats()
     })
 
 @app.route('/api/logs', methods=['GET'])
@@ -518,25 +623,30 @@ def get_logs(current_user):
     server = request.args.get('server', '')
     service = request.args.get('service', '')
     level = request.args.get('level', '')
+    since = request.args.get('since', '')
+    until = request.args.get('until', '')
+    
+    # Time-range queries only read the line offsets selected by the sidecar index
+    if since or until:
+        try:
+            since = normalize_timestamp(since) if since else None
+            until = normalize_timestamp(until) if until else None
+        except ValueError:
+            return jsonify({'error': 'Invalid since/until timestamp'}), 400
+        
+        try:
+            filtered_logs = log_index.query(limit, since=since, until=until, level=level, server=server, service=service, archive=log_archive)
+        except FileNotFoundError:
+            return jsonify([])
+        
+        return jsonify(filtered_logs)
     
-    # Read log file
+    # Scan the log backwards, then archived segments, until enough matching lines are found
     try:
-        with open("server_status.log", "r") as f:
-            logs = f.readlines()
+        filtered_logs = tail_matching("server_status.log", limit, server=server, service=service, level=level, archive=log_archive)
     except FileNotFoundError:
         return jsonify([])
     
-    # Apply filters
-    filtered_logs = []
-    for log in logs[-limit:]:
-        if server and server not in log:
-            continue
-        if service and service not in log:
-            continue
-        if level and level.upper() not in log:
-            continue
-        filtered_logs.append(log.strip())
-    
     return jsonify(filtered_logs)
 
 @app.route('/api/winrm/config', methods=['GET'])
@@ -653,30 +763,64 @@ def get_server_metrics_winrm(current_user, server_ip):
         if not server_ip:
             return jsonify({'error': 'Server IP is required'}), 400
         
-        # Import winrmConnection module
+        # Import winrm_metrics module
         sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        import winrmConnection as winrm
-        
-        # Get metrics
-        cpu_usage = winrm.getCPUUsage(server_ip)
-        memory_usage = winrm.getMemoryUsage(server_ip)
-        disk_usage = winrm.getDiskUsage(server_ip)
-        uptime = winrm.getUptime(server_ip)
-        server_info = winrm.getServerInfo(server_ip)
+        from winrm_metrics import collect_server_metrics
         
-        metrics = {
-            'cpuUsage': cpu_usage,
-            'memoryUsage': memory_usage,
-            'diskUsage': disk_usage,
-            'uptime': uptime,
-            'serverInfo': server_info
-        }
+        # Get all metrics in a single remote script run
+        metrics = collect_server_metrics(server_ip)
         
         return jsonify(metrics)
     except Exception as e:
         app.logger.error(f"Error getting server metrics via WinRM: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+# Shared poller for fleet-wide WinRM collection
+metrics_poller = None
+
+def get_metrics_poller():
+    """Get the fleet metrics poller, creating it on first use"""
+    global metrics_poller
+    if metrics_poller is None:
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        from fleet_poller import FleetPoller
+        metrics_poller = FleetPoller(request_timeout=int(os.getenv('WINRM_METRICS_TIMEOUT', 30)))
+    return metrics_poller
+
+@app.route('/api/winrm/metrics', methods=['GET'])
+@token_required
+def get_fleet_metrics_winrm(current_user):
+    """Stream WinRM metrics for every server as NDJSON, one line per server as it answers"""
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from winrm_metrics import collect_server_metrics
+    
+    poller = get_metrics_poller()
+    host_timeout = poller.request_timeout
+    if 'timeout' in request.args:
+        try:
+            host_timeout = float(request.args['timeout'])
+        except ValueError:
+            host_timeout = None
+        # Callers may shorten the per-host timeout, never lengthen it; nan fails both comparisons
+        if host_timeout is None or not 0 < host_timeout <= poller.request_timeout:
+            return jsonify({'error': f'timeout must be more than 0 and at most {poller.request_timeout} seconds'}), 400
+    servers = [{'name': server['name'], 'ip': server['ip']} for server in get_cached_servers()]
+    
+    def fetch_metrics(server, session, timeout):
+        try:
+            return {'name': server['name'], 'ip': server['ip'], 'metrics': collect_server_metrics(server['ip'], timeout=timeout)}
+        except Exception as e:
+            return {'name': server['name'], 'ip': server['ip'], 'error': str(e)}
+    
+    def missed_metrics(server):
+        return {'name': server['name'], 'ip': server['ip'], 'error': 'Timed out', 'timed_out': True}
+    
+    def generate():
+        for result in poller.poll_iter(servers, fetch_metrics, missed_metrics, host_timeout=host_timeout):
+            yield json_provider.dumps(result) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/api/winrm/server/<server_ip>/info', methods=['GET'])
 @token_required
 def get_server_info_winrm(current_user, server_ip):
@@ -806,6 +950,16 @@ def reboot_server_winrm(current_user, server_ip):
         app.logger.error(f"Error rebooting server via WinRM: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+def start_status_updates():
+    """Start a background thread that refreshes the server cache every 30 seconds"""
+    def background_status_updates():
+        while True:
+            time.sleep(30)  # Update every 30 seconds
+            get_cached_servers()  # This will refresh the cache
+    
+    import threading
+    threading.Thread(target=background_status_updates, daemon=True).start()
+
 if __name__ == '__main__':
     # Add parent directory to path to import port_utils
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -815,20 +969,14 @@ if __name__ == '__main__':
     import argparse
     parser = argparse.ArgumentParser(description='Start the Voxco API server')
     parser.add_argument('--port', type=int, help='Port to run the server on')
+    parser.add_argument('--production', action='store_true', default=os.getenv('SERVER_MODE') == 'production',
+                        help='Serve with multiple gunicorn workers instead of the development server')
+    parser.add_argument('--workers', type=int, help='Number of worker processes in production mode (default: 2 per CPU + 1)')
     args = parser.parse_args()
     
     # Initialize server data
     get_cached_servers()
     
-    # Start background task to periodically update server status
-    def background_status_updates():
-        while True:
-            time.sleep(30)  # Update every 30 seconds
-            get_cached_servers()  # This will refresh the cache
-    
-    import threading
-    threading.Thread(target=background_status_updates, daemon=True).start()
-    
     # Use specified port or find a dynamic port
     if args.port:
         port = args.port
@@ -842,4 +990,12 @@ if __name__ == '__main__':
     logger.info(f"Starting server on port {port}")
     
     # Run the server
-    app.run(debug=True, host='0.0.0.0', port=port)
\ No newline at end of file
+    if args.production:
+        from production_server import run_production, DEFAULT_WORKERS
+        run_production(app, port, workers=args.workers or DEFAULT_WORKERS, on_worker_start=start_status_updates)
+    else:
+        # Start background task to periodically update server status, in the reloader's
+        # serving child only
+        if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            start_status_updates()
+        app.run(debug=True, host='0.0.0.0', port=port)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, make_response
 from flask_cors import CORS
 import jwt
 import datetime
@@ -6,20 +6,21 @@ import logging
 import os
 import dotenv
 import sys
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import generate_password_hash
+
+# Add parent directory to path to import shared modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fleet_store import FleetStore
+from logging_setup import configure_logging
+import json_provider
+from token_cache import TokenCache
+from password_pool import pool as password_pool, PasswordPoolSaturated
 
 # Load environment variables from .env file
 dotenv.load_dotenv()
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("server_status.log"),
-        logging.StreamHandler()
-    ]
-)
+# Set up logging; file and console output are written by a background thread
+configure_logging("server_status.log")
 logger = logging.getLogger(__name__)
 
 # Get CORS allowed origins from environment variable or use default
@@ -28,6 +29,7 @@ cors_origins_list = cors_origins.split(',')
 
 # Configure Flask with larger header size limit
 app = Flask(__name__)
+json_provider.init_app(app)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max size
 app.config['MAX_COOKIE_SIZE'] = 16 * 1024  # 16KB max cookie size
 
@@ -88,7 +90,15 @@ def login():
             logger.warning(f"Login attempt with unknown username: {username}")
             return jsonify({'message': 'Invalid credentials'}), 401
             
-        if check_password_hash(users[username]['password'], password):
+        try:
+            password_valid = password_pool.check(users[username]['password'], password)
+        except PasswordPoolSaturated as e:
+            logger.warning(f"Login attempt for user {username} rejected: {e}")
+            response = make_response(jsonify({'message': 'Server busy, please try again'}), 503)
+            response.headers['Retry-After'] = '1'
+            return response
+            
+        if password_valid:
             # Generate JWT token with minimal payload to reduce size
             token = jwt.encode({
                 'username': username,
@@ -109,6 +119,9 @@ def login():
 def test():
     return jsonify({'message': 'API is working'})
 
+# Claims of already verified tokens, so repeat requests skip the HMAC check
+token_cache = TokenCache()
+
 # Mock JWT Authentication
 def token_required(f):
     from functools import wraps
@@ -127,7 +140,7 @@ def token_required(f):
             return jsonify({'error': 'Token is missing'}), 401
             
         try:
-            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=["HS256"])
+            data = token_cache.verify(token, app.config['SECRET_KEY'])
             current_user = data['username']
         except jwt.ExpiredSignatureError:
             return jsonify({'error': 'Token has expired'}), 401
@@ -151,6 +164,9 @@ server_cache = {
     'last_updated': 0
 }
 
+# Indexed view of the cached servers with running stats aggregates
+fleet = FleetStore()
+
 @app.route('/api/servers', methods=['GET'])
 @token_required
 def get_servers(current_user):
@@ -162,6 +178,8 @@ def get_servers(current_user):
     # Placeholder for fetching live server data
     # Implement logic to fetch live data from your data source
     server_cache['data'] = []  # Replace with live data fetching logic
+    server_cache['last_updated'] = current_time
+    fleet.replace(server_cache['data'])
     logger.info("Server data refreshed in cache")
     
     servers = server_cache['data']
@@ -193,51 +211,22 @@ def get_servers(current_user):
 @token_required
 def get_stats(current_user):
     """Get server statistics"""
-    import time
-    
-    # Use cached server data if available
-    current_time = time.time()
-    if server_cache['data'] is None or (current_time - server_cache['last_updated']) > 30:
-        server_cache['data'] = get_mock_servers()
-        server_cache['last_updated'] = current_time
-        logger.info("Server data refreshed in cache for stats")
-    
-    servers = server_cache['data']
-    
-    # Calculate statistics
-    total_servers = len(servers)
-    total_services = sum(len(server['services']) for server in servers)
-    
-    online_services = 0
-    warning_services = 0
-    offline_services = 0
-    
-    for server in servers:
-        for service in server['services']:
-            if service['status'] == 'online':
-                online_services += 1
-            elif service['status'] == 'warning':
-                warning_services += 1
-            elif service['status'] == 'offline':
-                offline_services += 1
-    
-    uptime_percentage = (online_services / total_services * 100) if total_services > 0 else 0
-    
-    # Get average resource usage
-    avg_cpu = sum(server['cpu_usage'] for server in servers) / total_servers if total_servers > 0 else 0
-    avg_memory = sum(server['memory_usage'] for server in servers) / total_servers if total_servers > 0 else 0
-    avg_disk = sum(server['disk_usage'] for server in servers) / total_servers if total_servers > 0 else 0
+    # Read the running aggregates kept by the fleet store, which is
+    # refreshed together with the server cache
+    stats = fleet.stats()
+    total_services = stats['total_services']
+    uptime_percentage = (stats['online_services'] / total_services * 100) if total_services > 0 else 0
     
     return jsonify({
-        'total_servers': total_servers,
+        'total_servers': stats['total_servers'],
         'total_services': total_services,
-        'online_services': online_services,
-        'warning_services': warning_services,
-        'offline_services': offline_services,
+        'online_services': stats['online_services'],
+        'warning_services': stats['warning_services'],
+        'offline_services': stats['offline_services'],
         'uptime_percentage': round(uptime_percentage, 2),
-        'avg_cpu_usage': round(avg_cpu, 2),
-        'avg_memory_usage': round(avg_memory, 2),
-        'avg_disk_usage': round(avg_disk, 2),
+        'avg_cpu_usage': round(stats['avg_cpu_usage'], 2),
+        'avg_memory_usage': round(stats['avg_memory_usage'], 2),
+        'avg_disk_usage': round(stats['avg_disk_usage'], 2),
         'timestamp': datetime.datetime.now().isoformat()
     })
 
@@ -247,6 +236,14 @@ if __name__ == '__main__':
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     from port_utils import find_free_port, save_port
     
+    # Parse command line arguments
+    import argparse
+    parser = argparse.ArgumentParser(description='Start the simple Voxco API server')
+    parser.add_argument('--production', action='store_true', default=os.getenv('SERVER_MODE') == 'production',
+                        help='Serve with multiple gunicorn workers instead of the development server')
+    parser.add_argument('--workers', type=int, help='Number of worker processes in production mode (default: 2 per CPU + 1)')
+    args = parser.parse_args()
+    
     # Use a dynamic port with preference for 3000-3005
     port = find_free_port(preferred_range=(3000, 3005))
     save_port('simple_server', port)
@@ -255,4 +252,8 @@ if __name__ == '__main__':
     logger.info(f"Starting simple server on port {port}")
     
     # Run the server
-    app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
+    if args.production:
+        from production_server import run_production, DEFAULT_WORKERS
+        run_production(app, port, workers=args.workers or DEFAULT_WORKERS)
+    else:
+        app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
@@ -0,0 +1,46 @@
+import threading
+import time
+
+from fleet_delta import DeltaBroadcaster
+
+
+def test_deltas_are_sent_in_seq_order_across_threads():
+    sent = []
+
+    def send(delta):
+        # Widen the window between numbering a delta and sending it
+        time.sleep(0.001)
+        sent.append(delta['seq'])
+
+    broadcaster = DeltaBroadcaster(send)
+
+    def refresh(worker):
+        for round_ in range(50):
+            broadcaster.record_change({'name': f'web-{worker:02d}', 'cpu_usage': round_})
+
+    threads = [threading.Thread(target=refresh, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sent == list(range(1, 201))
+
+
+def test_diff_sends_only_changes_and_snapshot_matches_seq():
+    sent = []
+    broadcaster = DeltaBroadcaster(sent.append)
+
+    broadcaster.diff([{'name': 'web-01', 'cpu_usage': 1, 'services': []}])
+    assert broadcaster.diff([{'name': 'web-01', 'cpu_usage': 1, 'services': []}]) is None
+    broadcaster.diff([{'name': 'web-01', 'cpu_usage': 2, 'services': []}])
+    broadcaster.diff([])
+
+    assert [delta['seq'] for delta in sent] == [1, 2, 3]
+    assert sent[1]['changed'] == [{'name': 'web-01', 'cpu_usage': 2}]
+    assert sent[2]['removed'] == ['web-01']
+    assert sent[2]['versions'] == {'web-01': 3}
+
+    snapshots = []
+    assert broadcaster.snapshot(send=snapshots.append)['seq'] == 3
+    assert snapshots[0]['servers'] == []
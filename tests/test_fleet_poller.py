@@ -0,0 +1,91 @@
+import threading
+import time
+
+from fleet_poller import FleetPoller
+
+
+def test_poll_iter_passes_host_timeout_to_fetch():
+    poller = FleetPoller(max_workers=2, request_timeout=5)
+    timeouts = []
+
+    def fetch(server, session, timeout):
+        timeouts.append(timeout)
+        return server['name']
+
+    results = list(poller.poll_iter([{'name': 'a'}, {'name': 'b'}], fetch, lambda server: None, host_timeout=0.5))
+    poller.shutdown()
+    assert sorted(results) == ['a', 'b']
+    assert timeouts == [0.5, 0.5]
+
+
+def test_poll_iter_cancels_unstarted_hosts_when_closed():
+    poller = FleetPoller(max_workers=1)
+    release = threading.Event()
+    fetched = []
+
+    def fetch(server, session, timeout):
+        fetched.append(server['name'])
+        if server['name'] != 'first':
+            release.wait(timeout)
+        return server['name']
+
+    servers = [{'name': 'first'}] + [{'name': f'host{number}'} for number in range(10)]
+    results = poller.poll_iter(servers, fetch, lambda server: None, host_timeout=5)
+    assert next(results) == 'first'
+    results.close()
+    release.set()
+    time.sleep(0.2)
+    poller.shutdown()
+
+    # Only the host a worker had already picked up ran after the client went away
+    assert len(fetched) <= 2
+
+
+def test_poll_returns_partial_results_at_the_cycle_deadline():
+    poller = FleetPoller(max_workers=4, request_timeout=5, cycle_deadline=0.3)
+    release = threading.Event()
+
+    def fetch(server, session, timeout):
+        if server['name'] == 'slow':
+            release.wait(timeout)
+        return {'name': server['name'], 'status': 'online'}
+
+    def on_missed(server):
+        return {'name': server['name'], 'status': 'unknown', 'timed_out': True}
+
+    servers = [{'name': 'fast1'}, {'name': 'slow'}, {'name': 'fast2'}]
+    started = time.monotonic()
+    results = poller.poll(servers, fetch, on_missed)
+    elapsed = time.monotonic() - started
+    release.set()
+    poller.shutdown()
+
+    assert 0.3 <= elapsed < 0.6
+    assert results == [
+        {'name': 'fast1', 'status': 'online'},
+        {'name': 'slow', 'status': 'unknown', 'timed_out': True},
+        {'name': 'fast2', 'status': 'online'},
+    ]
+
+
+def test_poll_deadline_override_and_queued_hosts_are_missed():
+    poller = FleetPoller(max_workers=1, request_timeout=5, cycle_deadline=10)
+    release = threading.Event()
+    fetched = []
+
+    def fetch(server, session, timeout):
+        fetched.append(server['name'])
+        release.wait(timeout)
+        return server['name']
+
+    started = time.monotonic()
+    results = poller.poll([{'name': 'a'}, {'name': 'b'}], fetch, lambda server: f"missed {server['name']}",
+                          deadline=0.2)
+    assert time.monotonic() - started < 0.5
+    release.set()
+    time.sleep(0.1)
+    poller.shutdown()
+
+    assert results == ['missed a', 'missed b']
+    # The queued host was cancelled rather than polled after the cycle ended
+    assert fetched == ['a']
@@ -0,0 +1,105 @@
+from fleet_store import FleetStore
+
+
+def make_server(name, ip, services, location='Montreal', **metrics):
+    server = {'name': name, 'ip': ip, 'location': location,
+              'services': [{'name': service, 'status': status} for service, status in services]}
+    server.update(metrics)
+    return server
+
+
+def test_stats_average_over_servers_reporting_each_metric():
+    store = FleetStore()
+    store.replace([
+        make_server('VXSQL1', '172.16.1.10', [('MSSQLSERVER', 'online')], cpu_usage=40.0, memory_usage=None),
+        make_server('VXWEB1', '172.16.1.20', [('W3SVC', 'offline'), ('WAS', 'online')], cpu_usage=20.0),
+        make_server('VXDLR1', '172.16.2.10', []),
+    ])
+
+    stats = store.stats()
+    assert stats['total_servers'] == 3
+    assert stats['total_services'] == 3
+    assert stats['online_services'] == 2
+    assert stats['offline_services'] == 1
+    assert stats['avg_cpu_usage'] == 30.0
+    assert stats['avg_memory_usage'] == 0
+
+    store.set_service_status('VXWEB1', 'W3SVC', 'online')
+    assert store.stats()['online_services'] == 3
+    assert store.stats()['offline_services'] == 0
+
+
+def brute_force_search(servers, term):
+    term = term.lower()
+    return [server for server in servers
+            if any(term in str(server.get(field) or '').lower() for field in ('name', 'ip', 'location'))]
+
+
+def test_search_index_follows_replace():
+    store = FleetStore()
+    first = [
+        make_server('VXSQL1', '172.16.1.10', [], location='Montreal'),
+        make_server('VXWEB1', '172.16.1.20', [], location='Toronto'),
+        make_server('VXDLR1', '10.0.0.5', [], location='Paris'),
+    ]
+    store.replace(first)
+    for term in ('vx', 'sql', 'VXWEB1', 'tor', '172.16', 'montreal', 'nowhere'):
+        assert store.search(term) == brute_force_search(first, term)
+
+    # Moved, renamed and removed servers must not be found under their old values
+    second = [
+        make_server('VXSQL1', '172.16.1.10', [], location='Paris'),
+        make_server('VXAPP1', '10.0.0.6', [], location='Toronto'),
+    ]
+    store.replace(second)
+    for term in ('montreal', 'paris', 'vxweb', 'vxdlr', 'app', '10.0.0', 'tor'):
+        assert store.search(term) == brute_force_search(second, term)
+
+    assert store.search(cidr='10.0.0.0/24') == [second[1]]
+    assert store.filter(search='paris', cidr='172.16.0.0/16') == [second[0]]
+    assert store.search() is None
+
+
+def brute_force_filter(servers, status='', service=''):
+    return [server for server in servers
+            if any((not status or entry['status'] == status) and (not service or entry['name'] == service)
+                   for entry in server['services'])]
+
+
+def assert_filters_match(store, servers):
+    for status in ('', 'online', 'offline', 'warning'):
+        for service in ('', 'W3SVC', 'WAS', 'MSSQLSERVER'):
+            if status or service:
+                assert store.filter(status=status, service=service) == brute_force_filter(servers, status, service)
+
+
+def test_status_and_service_indexes_follow_status_changes_and_replace():
+    servers = [
+        make_server('VXSQL1', '172.16.1.10', [('MSSQLSERVER', 'online'), ('W3SVC', 'offline')]),
+        make_server('VXWEB1', '172.16.1.20', [('W3SVC', 'offline'), ('WAS', 'offline')]),
+        make_server('VXWEB2', '172.16.1.21', [('W3SVC', 'online')]),
+    ]
+    store = FleetStore()
+    store.replace(servers)
+    assert_filters_match(store, servers)
+
+    # VXWEB1 has two offline services, so it stays offline until both are back
+    store.set_service_status('VXWEB1', 'W3SVC', 'online')
+    assert_filters_match(store, servers)
+    assert store.get_server('VXWEB1') in store.filter(status='offline')
+    store.set_service_status('VXWEB1', 'WAS', 'warning')
+    assert_filters_match(store, servers)
+    assert store.get_server('VXWEB1') not in store.filter(status='offline')
+
+    assert store.set_service_status('VXWEB1', 'MISSING', 'online') is None
+    assert_filters_match(store, servers)
+
+    replaced = [
+        make_server('VXWEB1', '172.16.1.20', [('WAS', 'offline')]),
+        make_server('VXAPP1', '172.16.1.30', [('W3SVC', 'warning')]),
+    ]
+    store.replace(replaced)
+    assert_filters_match(store, replaced)
+    store.set_service_status('VXAPP1', 'W3SVC', 'offline')
+    assert_filters_match(store, replaced)
+    assert store.filter(status='offline', search='app') == [replaced[1]]
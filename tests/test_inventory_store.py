@@ -0,0 +1,183 @@
+import importlib
+import random
+import sqlite3
+import sys
+
+import pytest
+
+from inventory_store import InventoryStore, encode_cursor
+
+STATUSES = ['online', 'warning', 'offline', None]
+
+
+def make_server(name, rng):
+    return {
+        'name': name,
+        'ip': f'10.0.0.{rng.randint(1, 254)}',
+        'services': [{'name': f'svc{number}', 'status': rng.choice(STATUSES)} for number in range(rng.randint(0, 4))],
+        'specs': {'cpu': 'Xeon', 'cores': 8}
+    }
+
+
+def counted_stats(store):
+    statuses = [service.get('status') for server in store.list_servers() for service in server['services']]
+    return {
+        'total_servers': len(store.list_servers()),
+        'total_services': len(statuses),
+        'online_services': statuses.count('online'),
+        'warning_services': statuses.count('warning'),
+        'offline_services': statuses.count('offline')
+    }
+
+
+def test_stats_follow_every_write(tmp_path):
+    rng = random.Random(7)
+    store = InventoryStore(str(tmp_path / 'inventory.db'))
+    assert store.stats() == counted_stats(store)
+
+    store.replace_all([make_server(f'VX{number:03d}', rng) for number in range(30)])
+    assert store.stats() == counted_stats(store)
+
+    store.upsert_server(make_server('VX005', rng))
+    store.upsert_server(make_server('NEW', rng))
+    store.upsert_server({'name': 'DUP', 'services': [{'name': 'a', 'status': 'online'},
+                                                     {'name': 'a', 'status': 'offline'}]})
+    assert store.stats() == counted_stats(store)
+
+    assert store.delete_server('VX010')
+    store.replace_all([make_server(f'T{number}', rng) for number in range(5)])
+    assert store.stats() == counted_stats(store)
+
+
+def test_stats_are_counted_once_for_existing_inventories(tmp_path):
+    db_path = str(tmp_path / 'inventory.db')
+    store = InventoryStore(db_path)
+    store.replace_all([make_server(f'VX{number}', random.Random(number)) for number in range(10)])
+    expected = counted_stats(store)
+
+    # An inventory written before the counts table existed
+    conn = sqlite3.connect(db_path)
+    conn.execute('DROP TABLE counts')
+    conn.commit()
+    conn.close()
+
+    assert InventoryStore(db_path).stats() == expected
+
+
+def test_cursor_paging_visits_every_server_once(tmp_path):
+    rng = random.Random(3)
+    store = InventoryStore(str(tmp_path / 'inventory.db'))
+    servers = [make_server(f'VX{number:03d}', rng) for number in range(57)]
+    rng.shuffle(servers)
+    store.replace_all(servers)
+
+    names = []
+    cursor = None
+    while True:
+        page, cursor = store.page(10, cursor=cursor)
+        names.extend(server['name'] for server in page)
+        if cursor is None:
+            break
+    assert names == sorted(server['name'] for server in servers)
+
+    # A cursor stays valid when servers before it are removed
+    first_page, cursor = store.page(10)
+    store.delete_server(first_page[0]['name'])
+    page, _ = store.page(10, cursor=cursor)
+    assert page[0]['name'] == names[10]
+
+
+def test_cursor_paging_with_status_filter(tmp_path):
+    rng = random.Random(5)
+    store = InventoryStore(str(tmp_path / 'inventory.db'))
+    store.replace_all([make_server(f'VX{number:03d}', rng) for number in range(40)])
+
+    expected = [server['name'] for server in sorted(store.list_servers(), key=lambda server: server['name'])
+                if any(service['status'] == 'offline' for service in server['services'])]
+    names = []
+    cursor = None
+    while True:
+        page, cursor = store.page(3, cursor=cursor, status='offline')
+        names.extend(server['name'] for server in page)
+        if cursor is None:
+            break
+    assert names == expected
+
+
+def test_invalid_cursor_is_rejected(tmp_path):
+    store = InventoryStore(str(tmp_path / 'inventory.db'))
+    with pytest.raises(ValueError):
+        store.page(10, cursor='not a cursor!')
+    assert store.page(10, cursor=encode_cursor('ZZZ')) == ([], None)
+
+
+@pytest.fixture
+def inventory_app(tmp_path, monkeypatch):
+    pytest.importorskip('flask_socketio')
+    # server.py keeps its data files and inventory under ./data
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('ADMIN_PASSWORD', 'secret')
+    sys.modules.pop('server', None)
+    server = importlib.import_module('server')
+    client = server.app.test_client()
+    token = client.post('/api/login', json={'username': 'admin', 'password': 'secret'}).get_json()['token']
+    yield client, {'Authorization': f'Bearer {token}'}
+    sys.modules.pop('server', None)
+
+
+@pytest.mark.parametrize('body', [
+    {'services': [{'status': 'online'}]},
+    {'services': 'W3SVC'},
+    {'services': [{'name': 'W3SVC', 'status': 3}]},
+    {'specs': ['Xeon']},
+    {'ip': 17216},
+])
+def test_put_server_rejects_malformed_bodies(inventory_app, body):
+    client, headers = inventory_app
+    response = client.put('/api/servers/VXNEW', json=body, headers=headers)
+    assert response.status_code == 400
+    assert client.get('/api/servers/VXNEW', headers=headers).status_code == 404
+
+
+def test_post_servers_rejects_malformed_or_duplicate_servers(inventory_app):
+    client, headers = inventory_app
+    before = client.get('/api/stats', headers=headers).get_json()
+
+    assert client.post('/api/servers', json=[{'name': 'A', 'specs': 'big'}], headers=headers).status_code == 400
+    assert client.post('/api/servers', json=[{'name': 'A'}, {'name': 'A'}], headers=headers).status_code == 400
+    assert client.get('/api/stats', headers=headers).get_json() == before
+
+    response = client.post('/api/servers', json=[{'name': 'A', 'services': [{'name': 'W3SVC', 'status': 'offline'}]}],
+                           headers=headers)
+    assert response.status_code == 200
+    stats = client.get('/api/stats', headers=headers).get_json()
+    assert (stats['total_servers'], stats['offline_services']) == (1, 1)
+
+
+def test_admin_paging_and_per_server_saves(inventory_app):
+    # The admin interface pages through the inventory and saves one server at a time
+    client, headers = inventory_app
+
+    def all_pages():
+        names, cursor = [], None
+        while True:
+            query = {'limit': 1} if cursor is None else {'limit': 1, 'cursor': cursor}
+            page = client.get('/api/servers', query_string=query, headers=headers).get_json()
+            names.extend(server['name'] for server in page['servers'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                return names
+
+    before = all_pages()
+    assert len(before) == len(set(before)) > 1
+
+    edited = {'name': 'VXADMIN1', 'ip': '172.16.9.1', 'uptime': '100%', 'lastReboot': '2025-03-11 00:00:00',
+              'specs': {'cpu': '', 'cores': 4, 'ram': '16GB', 'storage': '', 'os': ''},
+              'services': [{'name': 'W3SVC', 'status': 'online', 'winrmName': 'W3SVC'}]}
+    assert client.put('/api/servers/VXADMIN1', json=edited, headers=headers).status_code == 200
+    assert client.delete(f'/api/servers/{before[0]}', headers=headers).status_code == 200
+
+    after = all_pages()
+    assert sorted(after) == sorted(set(before[1:]) | {'VXADMIN1'})
+    saved = client.get('/api/servers/VXADMIN1', headers=headers).get_json()
+    assert saved['specs']['cores'] == 4 and saved['services'][0]['status'] == 'online'
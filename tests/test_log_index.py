@@ -0,0 +1,113 @@
+import sqlite3
+import time
+
+import pytest
+
+import log_index
+from log_index import LogIndex, normalize_timestamp
+from log_reader import tail_matching
+
+
+@pytest.mark.parametrize('value', ['1e20', '-1e20', 'inf', '-inf', 'nan', '', 'yesterday', '2025-13-01'])
+def test_normalize_timestamp_rejects_invalid_values(value):
+    with pytest.raises(ValueError):
+        normalize_timestamp(value)
+
+
+def test_normalize_timestamp_accepts_epoch_and_iso():
+    epoch = time.mktime(time.strptime('2025-03-11 10:00:00', '%Y-%m-%d %H:%M:%S'))
+    assert normalize_timestamp(str(epoch)) == '2025-03-11 10:00:00'
+    assert normalize_timestamp(' 2025-03-11T10:00:00 ') == '2025-03-11 10:00:00'
+    assert normalize_timestamp('0001-01-01T00:00:00') == '0001-01-01 00:00:00'
+    utc = normalize_timestamp('2025-03-11T10:00:00Z')
+    assert len(utc) == 19 and utc.startswith('2025-03-1')
+
+
+def write_log(path, count):
+    lines = []
+    for number in range(count):
+        server = f'VXSQL{number % 3}'
+        level = 'WARNING' if number % 5 == 0 else 'INFO'
+        lines.append(f'2025-03-11 10:{number // 60:02d}:{number % 60:02d},000 - simple_api_server - {level} - '
+                     f'Service status change: {server} - W3SVC changed from online to offline')
+    path.write_text('\n'.join(lines) + '\n')
+    return lines
+
+
+def test_update_indexes_in_chunks_and_waits_for_complete_lines(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_index, 'INDEX_CHUNK_SIZE', 100)
+    log_path = tmp_path / 'server_status.log'
+    lines = write_log(log_path, 50)
+    with open(log_path, 'a') as f:
+        f.write('2025-03-11 10:59:59,000 - simple_api_server - INFO - partial')
+
+    index = LogIndex(str(log_path))
+    assert index.update() == 50
+    assert index.query(limit=1000, since='2025-03-11 00:00:00') == lines
+
+    with open(log_path, 'a') as f:
+        f.write(' line\n')
+    assert index.update() == 1
+    assert index.query(limit=1, since='2025-03-11 00:00:00')[-1].endswith('partial line')
+
+
+def test_query_matches_like_the_unindexed_path(tmp_path):
+    log_path = tmp_path / 'server_status.log'
+    write_log(log_path, 120)
+    index = LogIndex(str(log_path))
+
+    # Substring matches, e.g. 'SQL1' or 'warn', behave the same with and without a time range
+    for filters in ({'server': 'SQL1'}, {'server': 'VXSQL1', 'level': 'warn'}, {'service': 'W3'}, {'level': 'info'}):
+        expected = tail_matching(str(log_path), 10, **filters)
+        assert expected
+        assert index.query(limit=10, since='2025-03-11 00:00:00', **filters) == expected
+
+    ranged = index.query(limit=1000, since='2025-03-11 10:01:00', until='2025-03-11 10:01:09', server='VXSQL2')
+    assert [line[11:19] for line in ranged] == ['10:01:02', '10:01:05', '10:01:08']
+
+
+def test_query_reads_only_lines_containing_the_filter_terms(tmp_path, monkeypatch):
+    log_path = tmp_path / 'server_status.log'
+    lines = write_log(log_path, 300)
+    with open(log_path, 'a') as f:
+        f.write('2025-03-11 10:59:00,000 - simple_api_server - ERROR - Lost connection to VXSQL7\n')
+    index = LogIndex(str(log_path))
+
+    checked = []
+    log_filter = log_index.log_filter
+
+    def counting_filter(*args):
+        matches = log_filter(*args)
+
+        def check(line):
+            checked.append(line)
+            return matches(line)
+        return check
+
+    monkeypatch.setattr(log_index, 'log_filter', counting_filter)
+
+    warnings = index.query(limit=1000, since='2025-03-11 00:00:00', level='warn', server='VXSQL1')
+    assert warnings == [line for line in lines if 'WARNING' in line and 'VXSQL1' in line]
+    assert len(checked) == len(warnings)
+
+    # Terms outside the parsed header, e.g. a server only named in the message, are indexed too
+    checked.clear()
+    assert index.query(limit=10, since='2025-03-11 00:00:00', server='VXSQL7')[0].endswith('VXSQL7')
+    assert len(checked) == 1
+
+
+def test_index_from_an_older_schema_is_rebuilt(tmp_path):
+    log_path = tmp_path / 'server_status.log'
+    lines = write_log(log_path, 10)
+    conn = sqlite3.connect(f'{log_path}.idx')
+    conn.executescript('''
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE lines (offset INTEGER PRIMARY KEY, ts TEXT NOT NULL, level TEXT NOT NULL,
+                            logger TEXT NOT NULL, server TEXT, service TEXT);
+        INSERT INTO meta (key, value) VALUES ('offset', '0');
+    ''')
+    conn.close()
+
+    index = LogIndex(str(log_path))
+    assert index.query(limit=100, since='2025-03-11 00:00:00', server='VXSQL2') == [
+        line for line in lines if 'VXSQL2' in line]
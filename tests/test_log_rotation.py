@@ -0,0 +1,107 @@
+import glob
+import gzip
+import json
+import logging
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from log_index import parse_line
+from log_rotation import LogArchive, SegmentRotatingFileHandler
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+def make_handler(path, **kwargs):
+    handler = SegmentRotatingFileHandler(str(path), **kwargs)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    return handler
+
+
+def make_record(message, created):
+    record = logging.makeLogRecord({'name': 'test', 'levelname': 'INFO', 'levelno': logging.INFO, 'msg': message})
+    record.created = created
+    record.msecs = 0
+    return record
+
+
+def archived_lines(log_path):
+    archive = LogArchive(str(log_path))
+    lines = {}
+    for segment in archive.load_manifest():
+        with gzip.open(os.path.join(archive.directory, segment['file']), 'rt') as f:
+            lines[segment['file']] = [line for line in f.read().splitlines() if line]
+    return archive.load_manifest(), lines
+
+
+def write_records(path, worker, count):
+    handler = make_handler(path, max_bytes=2000, max_age=0, backup_count=0)
+    for number in range(count):
+        handler.emit(make_record(f'worker {worker} record {number}', time.time()))
+    handler.close()
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_concurrent_processes_lose_no_lines_or_segments(tmp_path):
+    log_path = tmp_path / 'server_status.log'
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=write_records, args=(log_path, worker, 300)) for worker in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+        assert process.exitcode == 0
+
+    manifest, segments = archived_lines(log_path)
+    live = [line for line in log_path.read_text().splitlines() if line]
+    all_lines = live + [line for lines in segments.values() for line in lines]
+    assert len(all_lines) == 4 * 300
+    assert len(set(all_lines)) == len(all_lines)
+
+    # Every compressed segment is listed, and no temporary copies are left behind
+    assert sorted(glob.glob(str(tmp_path / '*.gz'))) == sorted(str(tmp_path / entry['file']) for entry in manifest)
+    assert not glob.glob(str(tmp_path / '*.rotating')) and not glob.glob(str(tmp_path / '.*.rotating'))
+
+    for entry in manifest:
+        timestamps = [parse_line(line)[0] for line in segments[entry['file']]]
+        assert entry['start'] == min(timestamps)
+        assert entry['end'] == max(timestamps)
+        # Rotating only once the shared file is full leaves no tiny segments; concurrent
+        # appends between the size check and the write may overshoot by a few lines
+        assert 1500 <= entry['size'] < 2000 + 4 * 100
+
+
+def test_stale_handler_does_not_rotate_again_by_age(tmp_path):
+    log_path = tmp_path / 'server_status.log'
+    first = make_handler(log_path, max_bytes=0, max_age=60)
+    second = make_handler(log_path, max_bytes=0, max_age=60)
+    start = time.mktime(time.strptime('2025-03-11 10:00:00', '%Y-%m-%d %H:%M:%S'))
+
+    first.emit(make_record('a', start))
+    second.emit(make_record('b', start + 1))
+    # The first handler rotates; the second still believes the segment started at start
+    first.emit(make_record('c', start + 61))
+    second.emit(make_record('d', start + 62))
+    first.close()
+    second.close()
+
+    manifest, segments = archived_lines(log_path)
+    assert len(manifest) == 1
+    assert manifest[0]['start'] == '2025-03-11 10:00:00'
+    assert manifest[0]['end'] == '2025-03-11 10:00:01'
+    live = log_path.read_text().splitlines()
+    assert [line.rsplit(' - ', 1)[1] for line in live] == ['c', 'd']
+
+
+def test_manifest_keeps_backup_count_segments(tmp_path):
+    log_path = tmp_path / 'server_status.log'
+    handler = make_handler(log_path, max_bytes=200, max_age=0, backup_count=3)
+    for number in range(60):
+        handler.emit(make_record(f'record {number}', time.time()))
+    handler.close()
+
+    manifest = json.loads((tmp_path / 'server_status.log.manifest.json').read_text())
+    assert len(manifest) == 3
+    assert len(glob.glob(str(tmp_path / '*.gz'))) == 3
@@ -0,0 +1,40 @@
+import pytest
+
+from metric_history import MetricHistory, RingBuffer, parse_window
+
+
+def test_ring_buffer_grows_lazily_up_to_capacity():
+    buffer = RingBuffer(4)
+    assert len(buffer.timestamps) == 0
+
+    for timestamp in range(3):
+        buffer.append(timestamp, timestamp * 10)
+    assert len(buffer.timestamps) == len(buffer.values) == 3
+    assert buffer.since(0) == ([0, 1, 2], [0, 10, 20])
+
+    for timestamp in range(3, 10):
+        buffer.append(timestamp, timestamp * 10)
+    assert len(buffer.timestamps) == len(buffer.values) == 4
+    assert buffer.since(0) == ([6, 7, 8, 9], [60, 70, 80, 90])
+    assert buffer.since(8) == ([8, 9], [80, 90])
+    assert buffer.since(10) == ([], [])
+
+
+def test_metric_history_skips_missing_values():
+    history = MetricHistory(('cpu_usage', 'memory_usage'), capacity=2)
+    history.record('web-01', {'cpu_usage': 5, 'memory_usage': None}, 100)
+    history.record('web-01', {'cpu_usage': 6}, 160)
+
+    assert history.query('web-01', 'cpu_usage', 0) == ([100, 160], [5, 6])
+    assert history.query('web-01', 'memory_usage', 0) == ([], [])
+    assert history.query('web-02', 'cpu_usage', 0) == ([], [])
+
+
+@pytest.mark.parametrize('value, seconds', [('90', 90), ('90s', 90), ('15m', 900), ('1h', 3600), ('7D', 604800)])
+def test_parse_window(value, seconds):
+    assert parse_window(value) == seconds
+
+
+def test_parse_window_rejects_garbage():
+    with pytest.raises(ValueError):
+        parse_window('1w')
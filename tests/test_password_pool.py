@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+import password_pool
+from password_pool import PasswordCheckPool
+
+
+@pytest.mark.parametrize('web_workers, expected', [(None, 4), ('1', 4), ('3', 1), ('16', 1)])
+def test_default_workers_share_the_host(monkeypatch, web_workers, expected):
+    monkeypatch.setattr(password_pool, 'HOST_WORKERS', 4)
+    if web_workers is None:
+        monkeypatch.delenv('WEB_CONCURRENCY', raising=False)
+    else:
+        monkeypatch.setenv('WEB_CONCURRENCY', web_workers)
+    assert password_pool.default_workers() == expected
+    assert PasswordCheckPool().stats()['workers'] == expected
+
+
+def test_check_runs_in_workers_not_forked_from_this_process():
+    pool = PasswordCheckPool(max_workers=1)
+    pwhash = generate_password_hash('secret', method='pbkdf2:sha256:1000')
+    try:
+        assert pool.check(pwhash, 'secret') is True
+        assert pool.check(pwhash, 'wrong') is False
+        assert pool._executor._mp_context.get_start_method() in ('forkserver', 'spawn')
+    finally:
+        pool.shutdown()
+    assert pool.stats()['completed'] == 2
+
+
+def test_workers_do_not_rerun_an_unguarded_entry_point(tmp_path):
+    # Without a __main__ guard, a worker importing this script would start its own pool
+    script = tmp_path / 'entry_point.py'
+    script.write_text(
+        'import sys\n'
+        f'sys.path.insert(0, {os.path.dirname(os.path.dirname(os.path.abspath(__file__)))!r})\n'
+        "print('entry point ran', flush=True)\n"
+        'from werkzeug.security import generate_password_hash\n'
+        'from password_pool import PasswordCheckPool\n'
+        'pool = PasswordCheckPool(max_workers=1)\n'
+        "pwhash = generate_password_hash('secret', method='pbkdf2:sha256:1000')\n"
+        "print(pool.check(pwhash, 'secret'), pool.check(pwhash, 'wrong'))\n"
+        'pool.shutdown()\n'
+    )
+    result = subprocess.run([sys.executable, str(script)], cwd=tmp_path, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines() == ['entry point ran', 'True False']
@@ -0,0 +1,76 @@
+import os
+import threading
+
+import pytest
+
+from shared_state import CollectorLock, MemoryStateBackend, SQLiteStateBackend
+
+fork_only = pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs os.fork')
+
+
+def run_in_child(func):
+    """Run func in a forked child and return its exit code"""
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os._exit(func())
+        except BaseException:
+            os._exit(99)
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status)
+
+
+@fork_only
+def test_collector_lock_excludes_forked_children(tmp_path):
+    lock = CollectorLock(str(tmp_path / 'state.db.lock'))
+    assert lock.acquire()
+
+    # Record locks are not inherited: the child must not think it holds the parent's lock
+    assert run_in_child(lambda: 1 if lock.acquire() else 0) == 0
+
+    lock.release()
+    assert run_in_child(lambda: 1 if lock.acquire() else 0) == 1
+
+
+@fork_only
+def test_collector_lock_is_free_for_workers_after_parent_refresh(tmp_path):
+    lock = CollectorLock(str(tmp_path / 'state.db.lock'))
+    assert lock.acquire()
+    lock.release()
+
+    def worker():
+        if not lock.acquire():
+            return 0
+        lock.release()
+        return 1 if lock.acquire() else 0
+
+    assert [run_in_child(worker) for _ in range(3)] == [1, 1, 1]
+
+
+def test_collector_lock_excludes_threads(tmp_path):
+    lock = CollectorLock(str(tmp_path / 'state.db.lock'))
+    assert lock.acquire()
+    results = []
+    thread = threading.Thread(target=lambda: results.append(lock.acquire()))
+    thread.start()
+    thread.join()
+    assert results == [False]
+
+    lock.release()
+    assert lock.acquire()
+    lock.release()
+
+
+@pytest.mark.parametrize('backend', ['memory', 'sqlite'])
+def test_backend_collector_round_trip(tmp_path, backend):
+    state = MemoryStateBackend() if backend == 'memory' else SQLiteStateBackend(str(tmp_path / 'state.db'))
+    assert state.acquire_collector()
+    assert not state.acquire_collector()
+    state.put_fleet([{'name': 'VXSQL1', 'services': [{'name': 'W3SVC', 'status': 'online'}]}], 100.0)
+    state.release_collector()
+    assert state.acquire_collector()
+    state.release_collector()
+
+    version, updated_at, servers = state.load_fleet()
+    assert updated_at == 100.0
+    assert servers[0]['services'][0]['status'] == 'online'
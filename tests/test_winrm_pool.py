@@ -0,0 +1,158 @@
+import contextlib
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('winrm')
+import requests
+from winrm.exceptions import WinRMError, WinRMOperationTimeoutError
+
+from winrm_pool import WinRMCommandTimeout, WinRMConnection
+
+
+class HangingProtocol:
+    """Protocol stand-in whose command never finishes"""
+
+    def __init__(self, protocol):
+        self.operation_timeout_sec = protocol.operation_timeout_sec
+        self.read_timeout_sec = protocol.read_timeout_sec
+        self.transport = protocol.transport
+        self.cleaned_up = []
+        self.seen_timeouts = []
+
+    def open_shell(self):
+        return 'shell'
+
+    def run_command(self, shell_id, command, args):
+        return 'command'
+
+    def get_command_output_raw(self, shell_id, command_id):
+        self.seen_timeouts.append((self.operation_timeout_sec, self.transport.read_timeout_sec))
+        time.sleep(0.05)
+        raise WinRMOperationTimeoutError()
+
+    def cleanup_command(self, shell_id, command_id):
+        self.cleaned_up.append(command_id)
+
+
+def test_run_cmd_stops_at_timeout_and_restores_protocol_timeouts():
+    connection = WinRMConnection('192.0.2.1', 5985, 'user', 'password')
+    protocol = HangingProtocol(connection.session.protocol)
+    connection.session.protocol = protocol
+    saved = (protocol.operation_timeout_sec, protocol.read_timeout_sec, protocol.transport.read_timeout_sec)
+
+    started = time.monotonic()
+    with pytest.raises(WinRMCommandTimeout):
+        connection.run_cmd('sc query', timeout=0.3)
+    assert time.monotonic() - started < 1
+
+    assert protocol.cleaned_up == ['command']
+    assert protocol.seen_timeouts[0] == (1, 2)
+    assert (protocol.operation_timeout_sec, protocol.read_timeout_sec, protocol.transport.read_timeout_sec) == saved
+
+
+class FlakyProtocol:
+    """Protocol stand-in that fails run_command calls listed in failures"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.commands = []
+        self.hanging = False
+
+    def open_shell(self):
+        return 'shell'
+
+    def run_command(self, shell_id, command, args):
+        self.commands.append(command)
+        failure = self.failures.pop(0) if self.failures else None
+        if failure is not None:
+            raise failure
+        return 'command'
+
+    def get_command_output_raw(self, shell_id, command_id):
+        if self.hanging:
+            time.sleep(0.05)
+            raise WinRMOperationTimeoutError()
+        return b'ok', b'', 0, True
+
+    def cleanup_command(self, shell_id, command_id):
+        pass
+
+    def close_shell(self, shell_id):
+        pass
+
+
+@pytest.fixture
+def flaky_pool(monkeypatch):
+    import winrm_pool
+
+    failures = []
+    protocol = FlakyProtocol(failures)
+
+    class FakeSession:
+        def __init__(self):
+            self.protocol = protocol
+
+    def init(self, server_ip, port, username, password):
+        self.server_ip = server_ip
+        self.key = (server_ip, str(port), username, password)
+        self.session = FakeSession()
+        self.shell_id = None
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()
+        self.command_sent = False
+
+    monkeypatch.setattr(winrm_pool.WinRMConnection, '__init__', init)
+    monkeypatch.setattr(winrm_pool.WinRMConnection, '_timeouts', lambda self, timeout: contextlib.nullcontext())
+    pool = winrm_pool.WinRMPool()
+    pool.run_cmd('192.0.2.1', 'echo warm')
+    protocol.commands.clear()
+    return pool, protocol, failures
+
+
+def test_reused_connection_does_not_rerun_command_that_may_have_started(flaky_pool):
+    pool, protocol, failures = flaky_pool
+    failures.append(requests.exceptions.ReadTimeout())
+
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        pool.run_cmd('192.0.2.1', 'sc start Spooler')
+    assert protocol.commands == ['sc start Spooler']
+
+
+def test_reused_connection_retries_idempotent_command(flaky_pool):
+    pool, protocol, failures = flaky_pool
+    failures.append(requests.exceptions.ReadTimeout())
+
+    assert pool.run_cmd('192.0.2.1', 'sc query Spooler', idempotent=True) == (0, 'ok', '')
+    assert protocol.commands == ['sc query Spooler', 'sc query Spooler']
+
+
+def test_reused_connection_retries_command_the_host_refused(flaky_pool):
+    pool, protocol, failures = flaky_pool
+    failures.append(WinRMError('The request for the Windows Remote Shell with ShellId shell failed'))
+
+    assert pool.run_cmd('192.0.2.1', 'sc stop Spooler') == (0, 'ok', '')
+    assert protocol.commands == ['sc stop Spooler', 'sc stop Spooler']
+
+
+def test_health_check_of_hanging_host_stops_at_the_command_deadline(flaky_pool):
+    pool, protocol, failures = flaky_pool
+    pool.health_check_interval = 0
+    protocol.hanging = True
+
+    started = time.monotonic()
+    with pytest.raises(WinRMCommandTimeout):
+        pool.run_cmd('192.0.2.1', 'sc query Spooler', timeout=0.3, idempotent=True)
+    assert time.monotonic() - started < 0.6
+    assert protocol.commands[0] == 'echo ok'
+
+
+def test_retry_only_gets_the_time_left(flaky_pool):
+    pool, protocol, failures = flaky_pool
+    protocol.hanging = True
+
+    started = time.monotonic()
+    with pytest.raises(WinRMCommandTimeout):
+        pool.run_cmd('192.0.2.1', 'sc query Spooler', timeout=0.3, idempotent=True)
+    assert time.monotonic() - started < 0.5
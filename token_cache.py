@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+
+# Verified tokens kept; one per signed-in dashboard client is enough
+DEFAULT_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 1024))
+
+
+class TokenCache:
+    """
+    Bounded LRU of verified JWT claims keyed by a SHA-256 digest of the token.
+
+    A cached entry is only used until the token's exp; after that the token
+    goes through jwt.decode again, which rejects it as expired. Changing the
+    secret key drops every entry, so tokens signed with a rotated-out key
+    are verified (and rejected) again.
+    """
+
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.verifications = 0
+        self.verify_seconds = 0.0
+        self._secret_key = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def verify(self, token, secret_key, algorithms=('HS256',)):
+        """
+        Get the claims of a token, verifying its signature unless it was verified before.
+
+        Args:
+            token (str): Encoded JWT from the Authorization header
+            secret_key (str): Key the token must be signed with
+            algorithms (tuple): Accepted signing algorithms
+
+        Returns:
+            dict: Token claims
+
+        Raises:
+            jwt.ExpiredSignatureError: If the token has expired
+            jwt.InvalidTokenError: If the token is invalid
+        """
+        key = hashlib.sha256(token.encode('utf-8')).digest()
+        now = time.time()
+
+        with self._lock:
+            if secret_key != self._secret_key:
+                self._entries.clear()
+                self._secret_key = secret_key
+            entry = self._entries.get(key)
+            if entry is not None:
+                claims, expires = entry
+                if now < expires:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return claims
+                del self._entries[key]
+            self.misses += 1
+
+        start = time.perf_counter()
+        try:
+            claims = jwt.decode(token, secret_key, algorithms=list(algorithms))
+        finally:
+            with self._lock:
+                self.verifications += 1
+                self.verify_seconds += time.perf_counter() - start
+
+        # Tokens without an expiry are never cached
+        expires = claims.get('exp')
+        if isinstance(expires, (int, float)):
+            with self._lock:
+                if secret_key == self._secret_key:
+                    self._entries[key] = (claims, expires)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+        return claims
+
+    def clear(self):
+        """Drop all cached tokens, e.g. after a user is removed or logs out"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Get cache counters.
+
+        Returns:
+            dict: Entries held, hits, misses, hit rate, and the number and mean time of signature verifications
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'verifications': self.verifications,
+                'avg_verify_ms': round(self.verify_seconds / self.verifications * 1000, 3) if self.verifications else 0.0
+            }
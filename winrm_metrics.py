@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+import json
+
+from winrm_pool import pool as winrm_pool
+
+# Collects CPU, memory, disk, uptime and server info in a single remote run
+# and emits them as one compact JSON document
+METRICS_SCRIPT = r'''
+$ErrorActionPreference = 'Stop'
+$os = Get-WmiObject Win32_OperatingSystem
+$cpu = @(Get-WmiObject Win32_Processor)
+$cs = Get-WmiObject Win32_ComputerSystem
+
+$cpuUsage = ($cpu | Measure-Object -Property LoadPercentage -Average).Average
+$memoryUsage = [math]::Round((($os.TotalVisibleMemorySize - $os.FreePhysicalMemory) / $os.TotalVisibleMemorySize) * 100, 2)
+$disks = @(Get-WmiObject Win32_LogicalDisk -Filter "DriveType=3" |
+    Select-Object DeviceID,
+        @{Name="Size";Expression={[math]::Round($_.Size/1GB, 2)}},
+        @{Name="FreeSpace";Expression={[math]::Round($_.FreeSpace/1GB, 2)}},
+        @{Name="PercentUsed";Expression={[math]::Round(($_.Size - $_.FreeSpace) / $_.Size * 100, 2)}})
+$uptime = (Get-Date) - $os.ConvertToDateTime($os.LastBootUpTime)
+
+@{
+    cpuUsage = $cpuUsage
+    memoryUsage = $memoryUsage
+    diskUsage = $disks
+    uptime = "$($uptime.Days) days, $($uptime.Hours) hours, $($uptime.Minutes) minutes"
+    serverInfo = @{
+        OSName = $os.Caption
+        OSVersion = $os.Version
+        CPUName = $cpu[0].Name
+        CPUCores = ($cpu | Measure-Object -Property NumberOfCores -Sum).Sum
+        TotalRAM = [math]::Round($cs.TotalPhysicalMemory / 1GB, 2)
+        Hostname = $env:COMPUTERNAME
+    }
+} | ConvertTo-Json -Depth 4 -Compress
+'''
+
+
+class WinRMMetricsError(Exception):
+    """Raised when the remote metrics script fails or returns unparseable output"""
+
+
+def collect_server_metrics(server_ip, timeout=None):
+    """
+    Collect all server metrics with one remote PowerShell run.
+
+    Args:
+        server_ip (str): IP address of the server
+        timeout (float): Optional seconds to wait for the host before giving up
+
+    Returns:
+        dict: cpuUsage, memoryUsage, diskUsage, uptime and serverInfo
+    """
+    status_code, std_out, std_err = winrm_pool.run_ps(server_ip, METRICS_SCRIPT, timeout=timeout, idempotent=True)
+    if status_code != 0:
+        raise WinRMMetricsError(std_err.strip() or f'Metrics script exited with status {status_code}')
+
+    try:
+        metrics = json.loads(std_out)
+    except ValueError as e:
+        raise WinRMMetricsError(f'Invalid metrics output: {e}')
+
+    # ConvertTo-Json collapses single-element arrays into an object
+    disk_usage = metrics.get('diskUsage') or []
+    if isinstance(disk_usage, dict):
+        disk_usage = [disk_usage]
+
+    return {
+        'cpuUsage': float(metrics.get('cpuUsage') or 0),
+        'memoryUsage': float(metrics.get('memoryUsage') or 0),
+        'diskUsage': disk_usage,
+        'uptime': metrics.get('uptime'),
+        'serverInfo': metrics.get('serverInfo') or {}
+    }
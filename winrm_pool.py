@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+import os
+import threading
+import time
+from base64 import b64encode
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import winrm
+from requests.exceptions import ConnectTimeout
+from winrm.exceptions import WinRMError, WinRMOperationTimeoutError, WinRMTransportError
+
+# Pool limits can be tuned per deployment through environment variables
+DEFAULT_MAX_HOSTS = int(os.getenv('WINRM_POOL_MAX_HOSTS', 64))
+DEFAULT_IDLE_TIMEOUT = float(os.getenv('WINRM_POOL_IDLE_TIMEOUT', 300))
+DEFAULT_HEALTH_CHECK_INTERVAL = float(os.getenv('WINRM_POOL_HEALTH_CHECK_INTERVAL', 60))
+
+# Seconds a command may run when the caller gives no timeout, and the most a health check may take
+DEFAULT_COMMAND_TIMEOUT = float(os.getenv('WINRM_COMMAND_TIMEOUT', 300))
+HEALTH_CHECK_TIMEOUT = float(os.getenv('WINRM_POOL_HEALTH_CHECK_TIMEOUT', 10))
+
+
+class WinRMCommandTimeout(TimeoutError):
+    """Raised when a remote command does not finish within its timeout"""
+
+
+class WinRMConnection:
+    """An authenticated WinRM session to one host with a long-lived remote shell"""
+
+    def __init__(self, server_ip, port, username, password):
+        self.server_ip = server_ip
+        self.key = (server_ip, str(port), username, password)
+        self.session = winrm.Session(f'http://{server_ip}:{port}/wsman', auth=(username, password))
+        self.shell_id = None
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()
+        # Whether the last run_cmd may have started its command on the host
+        self.command_sent = False
+
+    def run_cmd(self, command, args=(), timeout=None):
+        """
+        Run a command over the shared remote shell, opening the shell on first use.
+
+        Args:
+            command (str): Command to run
+            args (tuple): Optional command arguments
+            timeout (float): Seconds to wait for the command before stopping it, DEFAULT_COMMAND_TIMEOUT if None
+
+        Returns:
+            tuple: (status_code, std_out, std_err)
+
+        Raises:
+            WinRMCommandTimeout: If the command did not finish within timeout
+        """
+        protocol = self.session.protocol
+        if timeout is None:
+            timeout = DEFAULT_COMMAND_TIMEOUT
+        deadline = time.monotonic() + timeout
+        self.command_sent = False
+        with self._timeouts(timeout):
+            if self.shell_id is None:
+                self.shell_id = protocol.open_shell()
+
+            self.command_sent = True
+            try:
+                command_id = protocol.run_command(self.shell_id, command, args)
+            except (WinRMError, WinRMTransportError, ConnectTimeout):
+                # The host refused the request, e.g. for a shell it dropped, or was never reached;
+                # other errors, such as read timeouts, may come after the command started
+                self.command_sent = False
+                raise
+            try:
+                std_out, std_err, status_code = self._command_output(command_id, deadline, timeout)
+            finally:
+                # Also stops a command that is still running after a timeout
+                protocol.cleanup_command(self.shell_id, command_id)
+
+        self.last_used = time.monotonic()
+        return status_code, std_out.decode(), std_err.decode()
+
+    @contextmanager
+    def _timeouts(self, timeout):
+        # Shorten the WS-Man operation and HTTP read timeouts so no single request outlives
+        # the command timeout; the caller holds self.lock, so nothing else uses the protocol
+        protocol = self.session.protocol
+        saved = protocol.operation_timeout_sec, protocol.read_timeout_sec, protocol.transport.read_timeout_sec
+        operation_timeout = max(1, min(int(protocol.operation_timeout_sec), int(timeout)))
+        protocol.operation_timeout_sec = operation_timeout
+        protocol.read_timeout_sec = protocol.transport.read_timeout_sec = operation_timeout + 1
+        try:
+            yield
+        finally:
+            protocol.operation_timeout_sec, protocol.read_timeout_sec, protocol.transport.read_timeout_sec = saved
+
+    def _command_output(self, command_id, deadline, timeout):
+        # Like protocol.get_command_output, which retries receive timeouts forever, but with a deadline
+        protocol = self.session.protocol
+        receive = getattr(protocol, 'get_command_output_raw', None) or protocol._raw_get_command_output
+        std_out = []
+        std_err = []
+        while True:
+            try:
+                out, err, status_code, done = receive(self.shell_id, command_id)
+                std_out.append(out)
+                std_err.append(err)
+                if done:
+                    return b''.join(std_out), b''.join(std_err), status_code
+            except WinRMOperationTimeoutError:
+                pass
+            if time.monotonic() >= deadline:
+                raise WinRMCommandTimeout(f'Command on {self.server_ip} did not finish within {timeout} seconds')
+
+    def is_healthy(self, timeout=HEALTH_CHECK_TIMEOUT):
+        """Check that the remote shell still answers within timeout seconds"""
+        try:
+            status_code, _, _ = self.run_cmd('echo ok', timeout=timeout)
+            return status_code == 0
+        except Exception:
+            return False
+
+    def close(self):
+        """Close the remote shell, ignoring errors from hosts that already dropped it"""
+        if self.shell_id is None:
+            return
+        try:
+            self.session.protocol.close_shell(self.shell_id)
+        except Exception:
+            pass
+        self.shell_id = None
+
+
+class WinRMPool:
+    """Per-host pool of WinRM connections with idle eviction and health checks"""
+
+    def __init__(self, max_hosts=DEFAULT_MAX_HOSTS, idle_timeout=DEFAULT_IDLE_TIMEOUT,
+                 health_check_interval=DEFAULT_HEALTH_CHECK_INTERVAL):
+        self.max_hosts = max_hosts
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self._connections = OrderedDict()
+        self._lock = threading.Lock()
+
+    def run_cmd(self, server_ip, command, args=(), timeout=None, idempotent=False):
+        """
+        Run a command on a server, reusing its pooled session and shell.
+
+        A command that fails on a reused connection before it reached the host is
+        retried once on a fresh connection, since the host may have dropped the
+        shell since it was last used. Failures after the command may have started,
+        such as read timeouts, are only retried for idempotent commands, so
+        service control commands never run twice.
+
+        timeout bounds the whole call: health check, command and retry share it.
+
+        Args:
+            server_ip (str): IP address of the server
+            command (str): Command to run
+            args (tuple): Optional command arguments
+            timeout (float): Seconds to wait for the command before stopping it, DEFAULT_COMMAND_TIMEOUT if None
+            idempotent (bool): Whether running the command twice is harmless, e.g. queries
+
+        Returns:
+            tuple: (status_code, std_out, std_err)
+
+        Raises:
+            WinRMCommandTimeout: If the command did not finish within timeout
+        """
+        deadline = time.monotonic() + (DEFAULT_COMMAND_TIMEOUT if timeout is None else timeout)
+        connection, reused = self._acquire(server_ip, deadline)
+        retry = False
+        try:
+            with connection.lock:
+                try:
+                    return connection.run_cmd(command, args, timeout=self._remaining(server_ip, deadline))
+                except Exception:
+                    retry = reused and (idempotent or not connection.command_sent)
+                    raise
+        except Exception:
+            self._discard(connection)
+            if not retry:
+                raise
+
+        connection, _ = self._acquire(server_ip, deadline)
+        try:
+            with connection.lock:
+                return connection.run_cmd(command, args, timeout=self._remaining(server_ip, deadline))
+        except Exception:
+            self._discard(connection)
+            raise
+
+    def _remaining(self, server_ip, deadline):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise WinRMCommandTimeout(f'No time left for a command on {server_ip}')
+        return remaining
+
+    def run_ps(self, server_ip, script, timeout=None, idempotent=False):
+        """
+        Run a PowerShell script on a server over its pooled session and shell.
+
+        Args:
+            server_ip (str): IP address of the server
+            script (str): PowerShell script to run
+            timeout (float): Seconds to wait for the script before stopping it, DEFAULT_COMMAND_TIMEOUT if None
+            idempotent (bool): Whether running the script twice is harmless, see run_cmd
+
+        Returns:
+            tuple: (status_code, std_out, std_err)
+        """
+        encoded_script = b64encode(script.encode('utf_16_le')).decode('ascii')
+        return self.run_cmd(server_ip, f'powershell -NoProfile -NonInteractive -EncodedCommand {encoded_script}',
+                            timeout=timeout, idempotent=idempotent)
+
+    def _acquire(self, server_ip, deadline):
+        port = os.getenv('WINRM_PORT', 5985)
+        username = os.getenv('WINRM_USERNAME', 'username')
+        password = os.getenv('WINRM_PASSWORD', 'password')
+        key = (server_ip, str(port), username, password)
+
+        stale = []
+        with self._lock:
+            stale.extend(self._evict_idle())
+            connection = self._connections.get(key)
+            if connection is not None:
+                self._connections.move_to_end(key)
+            else:
+                connection = WinRMConnection(server_ip, port, username, password)
+                self._connections[key] = connection
+                while len(self._connections) > self.max_hosts:
+                    _, oldest = self._connections.popitem(last=False)
+                    stale.append(oldest)
+
+        for old_connection in stale:
+            self._close(old_connection)
+
+        reused = connection.shell_id is not None
+        if reused and time.monotonic() - connection.last_used > self.health_check_interval:
+            # The check spends the caller's time, so it never outlasts the command's deadline
+            timeout = min(HEALTH_CHECK_TIMEOUT, self._remaining(server_ip, deadline))
+            with connection.lock:
+                healthy = connection.is_healthy(timeout)
+            if not healthy:
+                self._discard(connection)
+                return self._acquire(server_ip, deadline)
+        return connection, reused
+
+    def _evict_idle(self):
+        # Caller holds self._lock
+        now = time.monotonic()
+        idle = [key for key, connection in self._connections.items()
+                if now - connection.last_used > self.idle_timeout]
+        return [self._connections.pop(key) for key in idle]
+
+    def _discard(self, connection):
+        with self._lock:
+            if self._connections.get(connection.key) is connection:
+                del self._connections[connection.key]
+        self._close(connection)
+
+    def _close(self, connection):
+        with connection.lock:
+            connection.close()
+
+    def close_all(self):
+        """Close every pooled shell"""
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for connection in connections:
+            self._close(connection)
+
+    def stats(self):
+        """Get the number of pooled hosts and open shells"""
+        with self._lock:
+            connections = list(self._connections.values())
+        return {
+            'hosts': len(connections),
+            'open_shells': sum(1 for connection in connections if connection.shell_id is not None),
+            'max_hosts': self.max_hosts
+        }
+
+
+# Shared pool used by the API servers
+pool = WinRMPool()